@@ -0,0 +1,111 @@
+"""Startup benchmark: import cost of the app's modules and first-render latency.
+
+Runs each import in a fresh interpreter with ``python -X importtime`` and
+reports the cumulative self+children time of the top-level modules, then
+times a cold warm-up render of the English and Mandarin reports.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --json startup.json --top 15
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What a cold start pays for, lightest first
+TARGETS = [
+    ("report_data", "import report_data"),
+    ("glossary", "import glossary"),
+    ("dotenv", "import dotenv"),
+    ("pytz", "import pytz"),
+    ("streamlit", "import streamlit"),
+    ("openai", "import openai"),
+    ("report_pdf", "import report_pdf"),
+]
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_time(statement, skip=()):
+    """Run one import under -X importtime, return (total_us, [(us, module)])
+
+    The module list holds top-level imports and their direct children.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1:]
+
+    total = 0
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match or match.group(4).split(".")[0] in skip:
+            continue
+        # One leading space marks a top-level import, each level adds two
+        depth = (len(match.group(3)) + 1) // 2
+        if depth == 1:
+            total += int(match.group(2))
+        if depth <= 2:
+            modules.append((int(match.group(2)), match.group(4)))
+    return total, sorted(modules, reverse=True)
+
+
+def warmup_time():
+    """Time a cold interpreter rendering both warm-up reports"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "report_pdf.py"], cwd=ROOT, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - start
+    return elapsed, result.stdout.strip().splitlines(), result.returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--json", help="write results to this file for tracking")
+    parser.add_argument("--top", type=int, default=10, help="top-level modules to list per target")
+    args = parser.parse_args()
+
+    results = {"python": sys.version.split()[0], "imports": {}, "warmup": {}}
+
+    # Modules every interpreter loads at startup are not ours to optimize
+    _, baseline = import_time("pass")
+    interpreter_modules = {module for _, module in baseline}
+
+    print(f"{'target':<14}{'import ms':>12}")
+    for name, statement in TARGETS:
+        total, modules = import_time(statement, skip=interpreter_modules)
+        if total is None:
+            print(f"{name:<14}{'failed':>12}  {' '.join(modules)}")
+            results["imports"][name] = None
+            continue
+        print(f"{name:<14}{total / 1000:>12.1f}")
+        for us, module in modules[:args.top]:
+            print(f"{'':<16}{us / 1000:>8.1f}  {module}")
+        results["imports"][name] = {
+            "total_ms": round(total / 1000, 1),
+            "top": [[module, round(us / 1000, 1)] for us, module in modules[:args.top]],
+        }
+
+    elapsed, lines, returncode = warmup_time()
+    print(f"\ncold warm-up process: {elapsed * 1000:.1f} ms")
+    for line in lines:
+        print(f"  {line}")
+    results["warmup"] = {"process_ms": round(elapsed * 1000, 1), "ok": returncode == 0, "renders": lines}
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nwrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+"""Load test: N concurrent browser sessions driving s.py end to end.
+
+Starts the OpenAI stub and a Streamlit server (unless --url is given), then
+runs N headless Chromium sessions that fill every tab, switch UI and PDF
+languages and generate a report. Reports p50/p95/p99 rerun latency, time to
+PDF, and the server's CPU and RSS (including render worker processes).
+
+Needs Playwright and a browser:
+
+    pip install playwright && python -m playwright install chromium
+    python benchmarks/load_test.py --sessions 8
+    python benchmarks/load_test.py --sessions 20 --ramp 0.5 --json load.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from openai_stub import start_stub  # noqa: E402
+
+APP = "[data-testid='stApp']"
+RUNNING = f"{APP}[data-test-script-state='running']"
+NOT_RUNNING = f"{APP}[data-test-script-state='notRunning']"
+GENERATE_LABEL = re.compile(r"Generate PDF Report|生成PDF报告")
+# Specimen readings inputs (key <item>_readings_text) need numbers, or the
+# app refuses to generate the report
+READINGS_INPUT = re.compile(r"\bst-key-\S+_readings_text\b")
+RESULT_SELECT = re.compile(r"\bst-key-\S+_result\b")
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def free_port():
+    """An unused local TCP port"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile, None for no values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(values):
+    """Latency percentiles in milliseconds"""
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 1) if values else None,
+        "p95_ms": round(percentile(values, 95) * 1000, 1) if values else None,
+        "p99_ms": round(percentile(values, 99) * 1000, 1) if values else None,
+        "max_ms": round(max(values) * 1000, 1) if values else None,
+    }
+
+
+# Server resource usage from /proc
+
+def process_tree(root_pid):
+    """root_pid and all its descendants"""
+    children = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(name))
+    pids, todo = [], [root_pid]
+    while todo:
+        pid = todo.pop()
+        pids.append(pid)
+        todo.extend(children.get(pid, []))
+    return pids
+
+
+def usage(pids):
+    """(cpu seconds, rss bytes) summed over pids"""
+    cpu = rss = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{pid}/statm") as f:
+                resident = int(f.read().split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        cpu += (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+        rss += resident * PAGE_SIZE
+    return cpu, rss
+
+
+class ResourceMonitor:
+    """Samples CPU and RSS of a server process tree on a background thread"""
+
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while not self.stopped.is_set():
+            cpu, rss = usage(process_tree(self.pid))
+            self.samples.append((time.monotonic(), cpu, rss))
+            self.stopped.wait(self.interval)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def summary(self):
+        """CPU percent (of one core) and RSS over the run"""
+        if len(self.samples) < 2:
+            return {}
+        cpu_percent = [
+            (c2 - c1) / (t2 - t1) * 100
+            for (t1, c1, _), (t2, c2, _) in zip(self.samples, self.samples[1:])
+        ]
+        rss = [sample[2] for sample in self.samples]
+        return {
+            "cpu_avg_percent": round(sum(cpu_percent) / len(cpu_percent), 1),
+            "cpu_max_percent": round(max(cpu_percent), 1),
+            "rss_start_mb": round(rss[0] / 2**20, 1),
+            "rss_max_mb": round(max(rss) / 2**20, 1),
+            "rss_end_mb": round(rss[-1] / 2**20, 1),
+        }
+
+
+# One browser session
+
+async def wait_for_rerun(page, timeout=60000):
+    """Wait for the rerun an interaction triggered to finish"""
+    try:
+        await page.wait_for_selector(RUNNING, timeout=500)
+    except Exception:
+        # Fast reruns can finish before we look
+        pass
+    await page.wait_for_selector(NOT_RUNNING, timeout=timeout)
+
+
+async def timed(page, action, latencies):
+    """Run an interaction and record how long its rerun took"""
+    start = time.perf_counter()
+    await action()
+    await wait_for_rerun(page)
+    latencies.append(time.perf_counter() - start)
+
+
+async def choose(page, container, options, rng, latencies):
+    """Pick a different option in a selectbox inside container, one of
+    options if given, else any it lists (material and heel height variants);
+    picking the current value would not rerun and would skew the latencies"""
+    select = container.locator("[data-baseweb='select']")
+    if await select.locator("input[disabled], [aria-disabled='true']").count():
+        # Results derived from readings are read-only
+        return
+    current = await select.inner_text()
+    await select.click()
+    listed = await page.get_by_role("option").all_inner_texts()
+    candidates = [option for option in listed if option not in current and (options is None or option in options)]
+    if not candidates:
+        await page.keyboard.press("Escape")
+        return
+    option = rng.choice(candidates)
+
+    async def action():
+        await page.get_by_role("option", name=option, exact=True).click()
+    await timed(page, action, latencies)
+
+
+async def fill_visible_tab(page, rng, latencies, max_fields):
+    """Fill the text inputs and selectboxes of the open tab, one rerun each"""
+    panel = page.locator("[role='tabpanel']:visible")
+    filled = 0
+
+    text_inputs = panel.locator("[data-testid='stElementContainer']:has([data-testid='stTextInput'])")
+    for i in range(await text_inputs.count()):
+        if filled >= max_fields:
+            return
+        container = text_inputs.nth(i)
+        if READINGS_INPUT.search(await container.get_attribute("class") or ""):
+            value = " ".join(str(rng.randint(200, 240)) for _ in range(3))
+        else:
+            value = f"LT-{rng.randint(1000, 9999)}"
+
+        async def action(field=container.locator("input"), value=value):
+            await field.fill(value)
+            await field.press("Enter")
+        await timed(page, action, latencies)
+        filled += 1
+
+    selectboxes = panel.locator("[data-testid='stElementContainer']:has([data-testid='stSelectbox'])")
+    for i in range(await selectboxes.count()):
+        if filled >= max_fields:
+            return
+        container = selectboxes.nth(i)
+        options = ["Pass", "Fail"] if RESULT_SELECT.search(await container.get_attribute("class") or "") else None
+        await choose(page, container, options, rng, latencies)
+        filled += 1
+
+
+async def run_session(browser, url, index, args, results):
+    """One inspector: open the app, switch languages, fill all tabs, generate"""
+    rng = random.Random(index)
+    latencies = []
+    context = await browser.new_context()
+    page = await context.new_page()
+    session = {"session": index, "rerun_s": latencies, "pdf_s": None, "error": None}
+    try:
+        start = time.perf_counter()
+        await page.goto(url)
+        await page.wait_for_selector(NOT_RUNNING, timeout=60000)
+        session["first_render_s"] = time.perf_counter() - start
+
+        # Alternate languages across sessions so both paths get load
+        ui_lang = "Mandarin" if index % 2 else "English"
+        pdf_lang = ["English", "Mandarin", "Both"][index % 3]
+        await choose(page, page.locator(".st-key-ui_lang_select"), [ui_lang], rng, latencies)
+        await choose(page, page.locator(".st-key-pdf_lang_select"), [pdf_lang], rng, latencies)
+
+        tabs = page.get_by_role("tab")
+        for i in range(await tabs.count()):
+            await tabs.nth(i).click()
+            await fill_visible_tab(page, rng, latencies, args.max_fields)
+
+        await tabs.first.click()
+        start = time.perf_counter()
+        await page.get_by_role("button", name=GENERATE_LABEL).click()
+        await page.wait_for_selector("[data-testid='stDownloadButton']", timeout=args.pdf_timeout * 1000)
+        session["pdf_s"] = time.perf_counter() - start
+    except Exception as e:
+        session["error"] = f"{type(e).__name__}: {e}".splitlines()[0]
+    finally:
+        await context.close()
+    results.append(session)
+
+
+async def run_load(url, args):
+    """Run all sessions against url with a ramp-up, returns per-session results"""
+    from playwright.async_api import async_playwright
+
+    results = []
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=True, executable_path=args.chromium)
+        tasks = []
+        for index in range(args.sessions):
+            tasks.append(asyncio.create_task(run_session(browser, url, index, args, results)))
+            await asyncio.sleep(args.ramp)
+        await asyncio.gather(*tasks)
+        await browser.close()
+    return results
+
+
+# Server under test
+
+def start_server(port, base_url, args):
+    """Start s.py against the stub and wait until it is healthy"""
+    env = dict(
+        os.environ,
+        OPENAI_API_KEY="stub",
+        OPENAI_BASE_URL=base_url,
+        PTR_WARMUP="1" if args.warmup else "0",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "s.py",
+         "--server.headless", "true", "--server.port", str(port),
+         "--browser.gatherUsageStats", "false"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    health = f"http://127.0.0.1:{port}/_stcore/health"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(health, timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.3)
+    server.terminate()
+    raise RuntimeError("Streamlit server did not become healthy")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=4, help="concurrent browser sessions")
+    parser.add_argument("--ramp", type=float, default=1.0, help="seconds between session starts")
+    parser.add_argument("--max-fields", type=int, default=12, help="fields to fill per tab")
+    parser.add_argument("--stub-latency-ms", type=float, default=200, help="OpenAI stub delay")
+    parser.add_argument("--pdf-timeout", type=float, default=120, help="seconds to wait for a PDF")
+    parser.add_argument("--url", help="test an already running app instead of starting one")
+    parser.add_argument("--warmup", action="store_true", help="start the server with PTR_WARMUP=1")
+    parser.add_argument("--chromium", help="Chromium or Chrome executable instead of Playwright's own")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    stub, base_url = start_stub(latency=args.stub_latency_ms / 1000)
+    server = monitor = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        server = start_server(port, base_url, args)
+        url = f"http://127.0.0.1:{port}/"
+        monitor = ResourceMonitor(server.pid).start()
+
+    try:
+        start = time.perf_counter()
+        sessions = asyncio.run(run_load(url, args))
+        wall = time.perf_counter() - start
+    finally:
+        if monitor:
+            monitor.stop()
+        if server:
+            server.terminate()
+            server.wait()
+        stub.shutdown()
+
+    reruns = [latency for session in sessions for latency in session["rerun_s"]]
+    pdfs = [session["pdf_s"] for session in sessions if session["pdf_s"] is not None]
+    first = [session["first_render_s"] for session in sessions if session.get("first_render_s")]
+    errors = [session["error"] for session in sessions if session["error"]]
+    results = {
+        "sessions": args.sessions,
+        "wall_s": round(wall, 1),
+        "first_render": summarize(first),
+        "rerun": summarize(reruns),
+        "time_to_pdf": summarize(pdfs),
+        "server": monitor.summary() if monitor else {},
+        "errors": errors,
+    }
+
+    print(f"{args.sessions} sessions in {results['wall_s']} s, {len(errors)} failed")
+    for name in ("first_render", "rerun", "time_to_pdf"):
+        stats = results[name]
+        print(f"{name:<14}n={stats['count']:<5} p50={stats['p50_ms']} p95={stats['p95_ms']} p99={stats['p99_ms']} max={stats['max_ms']} ms")
+    for key, value in results["server"].items():
+        print(f"{key:<16}{value}")
+    for error in errors[:5]:
+        print(f"error: {error}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import argparse
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime
+
+from jobs import JOBS_DIR, decode_data, encode_value
+from report_data import CHINA_TZ, field_token
+
+# Drafts of reports being typed, one row per report number and field
+DRAFTS_DB = os.getenv("PTR_DRAFTS_DB", os.path.join(JOBS_DIR, "drafts.sqlite3"))
+
+# A report's changes are written once its fields have been quiet this long,
+# and at the latest after DRAFT_MAX_DELAY while typing goes on
+DRAFT_DEBOUNCE_SECONDS = float(os.getenv("PTR_DRAFT_DEBOUNCE_SECONDS", "2"))
+DRAFT_MAX_DELAY = float(os.getenv("PTR_DRAFT_MAX_DELAY", "10"))
+# Drafts not touched for this many days are dropped when the store opens
+DRAFT_KEEP_DAYS = float(os.getenv("PTR_DRAFT_KEEP_DAYS", "30"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS drafts (
+    report_no TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS drafts_updated ON drafts (updated);
+CREATE TABLE IF NOT EXISTS draft_fields (
+    report_no TEXT NOT NULL,
+    field TEXT NOT NULL,
+    value TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (report_no, field)
+);
+"""
+
+def encode_field(value):
+    """One field as JSON; readings arrays become lists, dates ISO strings"""
+    return json.dumps(encode_value(value), ensure_ascii=False, default=encode_value)
+
+def changed_fields(data, saved):
+    """Fields of data that differ from the saved snapshot {field: (value,
+    token)}, which is brought up to date. Unchanged objects are recognised
+    by identity first, so large fields cost nothing until they change"""
+    changes = {}
+    for key, value in data.items():
+        last = saved.get(key)
+        if last is not None and last[0] is value:
+            continue
+        token = field_token(value)
+        if last is None or last[1] != token:
+            changes[key] = value
+        saved[key] = (value, token)
+    return changes
+
+class DraftStore:
+    """Report drafts in SQLite. App sessions hand over changed fields with
+    save(), which only queues them; a writer thread coalesces each report's
+    changes and writes them once the report has been quiet for a moment"""
+    
+    def __init__(self, path=DRAFTS_DB, debounce=DRAFT_DEBOUNCE_SECONDS, max_delay=DRAFT_MAX_DELAY):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Shared by the writer and the sessions' reads, always under _db_lock
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._db_lock = threading.Lock()
+        # {report_no: [owner, {field: json}, first change, last change]}
+        self._pending = {}
+        self._changed = threading.Condition()
+        self.prune()
+        threading.Thread(target=self._writer, name="draft-writer", daemon=True).start()
+        atexit.register(self.flush)
+    
+    def save(self, report_no, owner, fields):
+        """Queue changed fields of a report; returns at once"""
+        encoded = {key: encode_field(value) for key, value in fields.items()}
+        now = time.time()
+        with self._changed:
+            entry = self._pending.setdefault(report_no, [owner, {}, now, now])
+            entry[0] = owner
+            entry[1].update(encoded)
+            entry[3] = now
+            self._changed.notify()
+    
+    def _due(self, now):
+        """Pending reports quiet for the debounce time or waiting too long"""
+        return [
+            report_no for report_no, (_, _, first, last) in self._pending.items()
+            if now - last >= self.debounce or now - first >= self.max_delay
+        ]
+    
+    def _writer(self):
+        while True:
+            with self._changed:
+                while not self._pending:
+                    self._changed.wait()
+                due = self._due(time.time())
+                if not due:
+                    self._changed.wait(self.debounce / 4)
+                    continue
+                batch = {report_no: self._pending.pop(report_no) for report_no in due}
+            self._write(batch)
+    
+    def _write(self, batch):
+        """Upsert the changed fields of each report in one transaction"""
+        now = time.time()
+        rows = [
+            (report_no, field, value, now)
+            for report_no, (_, fields, _, _) in batch.items() for field, value in fields.items()
+        ]
+        with self._db_lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO drafts (report_no, owner, created, updated) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (report_no) DO UPDATE SET owner = excluded.owner, updated = excluded.updated",
+                [(report_no, owner, now, now) for report_no, (owner, _, _, _) in batch.items()]
+            )
+            self._conn.executemany(
+                "INSERT INTO draft_fields (report_no, field, value, updated) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (report_no, field) DO UPDATE SET value = excluded.value, updated = excluded.updated",
+                rows
+            )
+            self._conn.execute("COMMIT")
+    
+    def flush(self, report_no=None):
+        """Write pending changes now, of one report or all"""
+        with self._changed:
+            keys = [report_no] if report_no is not None else list(self._pending)
+            batch = {key: self._pending.pop(key) for key in keys if key in self._pending}
+        if batch:
+            self._write(batch)
+    
+    def exists(self, report_no):
+        with self._changed:
+            if report_no in self._pending:
+                return True
+        with self._db_lock:
+            return self._conn.execute("SELECT 1 FROM drafts WHERE report_no = ?", (report_no,)).fetchone() is not None
+    
+    def load(self, report_no):
+        """Fields of a draft as session state values, {} if there is none"""
+        self.flush(report_no)
+        with self._db_lock:
+            rows = self._conn.execute("SELECT field, value FROM draft_fields WHERE report_no = ?", (report_no,)).fetchall()
+        return decode_data({row["field"]: json.loads(row["value"]) for row in rows}) if rows else {}
+    
+    def recent(self, limit=20):
+        """Newest drafts as dicts with report_no, owner, updated and style_no;
+        changes still queued show up once written"""
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT d.report_no, d.owner, d.updated, f.value AS style_no FROM drafts d "
+                "LEFT JOIN draft_fields f ON f.report_no = d.report_no AND f.field = 'style_no' "
+                "ORDER BY d.updated DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [{**dict(row), "style_no": json.loads(row["style_no"]) if row["style_no"] else ""} for row in rows]
+    
+    def discard(self, report_no):
+        with self._changed:
+            self._pending.pop(report_no, None)
+        with self._db_lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM draft_fields WHERE report_no = ?", (report_no,))
+            self._conn.execute("DELETE FROM drafts WHERE report_no = ?", (report_no,))
+            self._conn.execute("COMMIT")
+    
+    def prune(self, keep_days=DRAFT_KEEP_DAYS):
+        cutoff = time.time() - keep_days * 86400
+        with self._db_lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM draft_fields WHERE report_no IN (SELECT report_no FROM drafts WHERE updated < ?)", (cutoff,))
+            self._conn.execute("DELETE FROM drafts WHERE updated < ?", (cutoff,))
+            self._conn.execute("COMMIT")
+    
+    def close(self):
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+
+if __name__ == "__main__":
+    from report_data import REPORT_FIELDS, sample_report_data
+    
+    parser = argparse.ArgumentParser(description="List, show or time report drafts")
+    parser.add_argument("--show", help="report number whose draft fields to print")
+    parser.add_argument("--bench", type=int, default=0, help="time this many autosave reruns of a sample report")
+    args = parser.parse_args()
+    
+    with closing(DraftStore()) as store:
+        if args.bench:
+            data = {key: "" for key in REPORT_FIELDS}
+            data.update(sample_report_data())
+            saved = {}
+            start = time.perf_counter()
+            for i in range(args.bench):
+                # One field typed per rerun, as in the app
+                data["verified_by"] = f"QC {i}"
+                store.save("BENCH", "bench", changed_fields(data, saved))
+            elapsed = time.perf_counter() - start
+            print(f"{args.bench} reruns in {elapsed * 1000:.1f} ms, {elapsed / args.bench * 1e6:.1f} µs each")
+            store.discard("BENCH")
+        elif args.show:
+            for key, value in sorted(store.load(args.show).items()):
+                print(f"{key}: {value!r}")
+        else:
+            for draft in store.recent():
+                updated = datetime.fromtimestamp(draft["updated"], CHINA_TZ).strftime("%Y-%m-%d %H:%M:%S")
+                print(f"{draft['report_no']:<20} {draft['style_no']:<16} {updated}  {draft['owner'][:8]}")
@@ -0,0 +1,186 @@
+import argparse
+import json
+import re
+import time
+from contextlib import closing
+
+import numpy as np
+
+from report_data import MEASURED_ITEMS, measurement_key, variant_key
+from standards import DEFAULT_STANDARDS, StandardsError, get_standards
+
+# Result per evaluation code; NO_RESULT leaves the hand-picked result alone
+NO_RESULT, PASS, FAIL = 0, 1, 2
+RESULT_LABELS = np.array(["", "Pass", "Fail"], dtype=object)
+
+RESULT_KEYS = [item["result"] for item in MEASURED_ITEMS]
+
+# (standard item, readings key, variant key) per column, built once
+COLUMNS = [
+    (item["standard"], measurement_key(item["result"]), variant_key(item["result"]))
+    for item in MEASURED_ITEMS
+]
+
+def item_limit(item, variant=None, standards=DEFAULT_STANDARDS):
+    """The limit that applies to a measured item for the chosen variant;
+    no variant means the first (the one the form shows first)"""
+    return standards.limit(item["standard"], variant)
+
+# Readings are typed separated by spaces, semicolons, line breaks or commas
+# followed by a space. A comma inside a reading is only read as grouping
+# thousands ("250,000"), and only where the readings are separated otherwise;
+# "212,208,230" alone could be a list and "12,5" a decimal comma, so both are
+# reported instead of guessed
+READING_SEPARATORS = re.compile(r"[;\s]+|,\s+")
+NUMBER = re.compile(r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+THOUSANDS = re.compile(r"[+-]?\d{1,3}(?:,\d{3})+(?:\.\d+)?")
+
+def read_readings(text):
+    """(readings, problems) of specimen readings typed into the form:
+    a float array and (token, reason) pairs of what could not be read,
+    reason "ambiguous_comma" or "not_a_number" (also for inf and nan)"""
+    tokens = [token.rstrip(",") for token in READING_SEPARATORS.split(str(text or "").strip())]
+    tokens = [token for token in tokens if token]
+    readings, problems = [], []
+    for token in tokens:
+        if "," in token:
+            if THOUSANDS.fullmatch(token) and len(tokens) > 1:
+                readings.append(float(token.replace(",", "")))
+            else:
+                problems.append((token, "ambiguous_comma"))
+            continue
+        value = float(token) if NUMBER.fullmatch(token) else np.nan
+        if np.isfinite(value):
+            readings.append(value)
+        else:
+            problems.append((token, "not_a_number"))
+    return np.array(readings, dtype=float), problems
+
+def parse_readings(text):
+    """Readings of typed text as a float array, without what could not be
+    read; the form uses read_readings() to report those"""
+    return read_readings(text)[0]
+
+def readings_text(readings):
+    """Inverse of parse_readings(), for filling the form from stored data"""
+    return " ".join(f"{value:g}" for value in as_readings(readings))
+
+def as_readings(value):
+    """Stored readings as a 1-D float array: arrays, lists (from JSON), a
+    single number or typed text; empty when missing"""
+    if isinstance(value, str):
+        return parse_readings(value)
+    if value is None or isinstance(value, bool):
+        return np.empty(0)
+    readings = np.asarray(value, dtype=float).ravel()
+    return readings[~np.isnan(readings)]
+
+def reading_stats(readings):
+    """{"n", "min", "mean", "max", "std"} of one item's readings, None if
+    there are none; std is the sample standard deviation"""
+    readings = as_readings(readings)
+    if not readings.size:
+        return None
+    return {
+        "n": int(readings.size),
+        "min": float(readings.min()),
+        "mean": float(readings.mean()),
+        "max": float(readings.max()),
+        "std": float(readings.std(ddof=1)) if readings.size > 1 else 0.0,
+    }
+
+def segment_stats(flat, lengths):
+    """Min, mean and max of consecutive segments of flat, one per length;
+    NaN for empty segments"""
+    count = len(lengths)
+    mins, means, maxs = np.full(count, np.nan), np.full(count, np.nan), np.full(count, np.nan)
+    filled = lengths > 0
+    if flat.size:
+        starts = (np.cumsum(lengths) - lengths)[filled]
+        mins[filled] = np.minimum.reduceat(flat, starts)
+        maxs[filled] = np.maximum.reduceat(flat, starts)
+        means[filled] = np.add.reduceat(flat, starts) / lengths[filled]
+    return mins, means, maxs
+
+STATISTIC_INDEX = {"min": 0, "mean": 1, "max": 2}
+
+def report_arrays(reports, standards=DEFAULT_STANDARDS):
+    """Judged statistic, limits and operators of many reports as (reports,
+    items) arrays. Python only gathers the readings; the statistics of all
+    items of all reports come from one reduceat pass each"""
+    shape = (len(reports), len(MEASURED_ITEMS))
+    limits = np.zeros(shape)
+    at_most = np.zeros(shape, dtype=bool)
+    statistic = np.zeros(shape, dtype=np.intp)
+    lengths = np.zeros(shape, dtype=np.intp)
+    chunks = []
+    for row, report in enumerate(reports):
+        for col, (standard, readings_key, variant) in enumerate(COLUMNS):
+            try:
+                item_limits = standards.limit(standard, report.get(variant))
+            except StandardsError:
+                # A variant this standard does not have: no limit to judge by
+                item_limits = None
+            if item_limits is None:
+                # Not covered by this standard: leave the result to the tester
+                continue
+            readings = as_readings(report.get(readings_key))
+            if readings.size:
+                chunks.append(readings)
+                lengths[row, col] = readings.size
+            limits[row, col] = item_limits["limit"]
+            at_most[row, col] = item_limits["op"] == "<="
+            statistic[row, col] = STATISTIC_INDEX[item_limits["statistic"]]
+    
+    flat = np.concatenate(chunks) if chunks else np.empty(0)
+    stats = np.stack(segment_stats(flat, lengths.ravel()))
+    values = np.take_along_axis(stats, statistic.reshape(1, -1), axis=0).reshape(shape)
+    return values, limits, at_most
+
+def evaluate(values, limits, at_most):
+    """Vectorized Pass/Fail: codes array shaped like values"""
+    with np.errstate(invalid="ignore"):
+        passed = np.where(at_most, values <= limits, values >= limits)
+    return np.where(np.isnan(values), NO_RESULT, np.where(passed, PASS, FAIL))
+
+def evaluate_reports(reports, standards=DEFAULT_STANDARDS):
+    """Derived results of many reports, one {result_key: "Pass"/"Fail"} dict
+    per report holding only the items that have readings"""
+    codes = evaluate(*report_arrays(reports, standards))
+    labels = RESULT_LABELS[codes]
+    return [
+        {key: label for key, code, label in zip(RESULT_KEYS, row_codes, row_labels) if code != NO_RESULT}
+        for row_codes, row_labels in zip(codes, labels)
+    ]
+
+def derive_results(state, standards=DEFAULT_STANDARDS):
+    """Derived results of the report being edited"""
+    return evaluate_reports([state], standards)[0]
+
+def failed_items(results):
+    """Result keys that failed, from one evaluate_reports() entry"""
+    return [key for key, result in results.items() if result == "Fail"]
+
+
+if __name__ == "__main__":
+    from jobs import connect, decode_data
+    
+    parser = argparse.ArgumentParser(description="Re-evaluate stored reports against a standard profile")
+    parser.add_argument("--profile", default="", help="standard_profiles/ key, empty for the company standard")
+    parser.add_argument("--limit", type=int, default=10000, help="newest reports to evaluate")
+    args = parser.parse_args()
+    
+    with closing(connect()) as conn:
+        rows = conn.execute("SELECT id, params FROM jobs ORDER BY created DESC LIMIT ?", (args.limit,)).fetchall()
+    reports = [decode_data(json.loads(row["params"])["data"]) for row in rows]
+    standards = get_standards(args.profile)
+    
+    start = time.perf_counter()
+    results = evaluate_reports(reports, standards)
+    elapsed = time.perf_counter() - start
+    
+    failing = [(row["id"], failed_items(result)) for row, result in zip(rows, results)]
+    failing = [(job_id, keys) for job_id, keys in failing if keys]
+    print(f"{len(reports)} reports against {standards.name} in {elapsed * 1000:.1f} ms, {len(failing)} with failures")
+    for job_id, keys in failing:
+        print(f"{job_id[:8]}  {', '.join(keys)}")
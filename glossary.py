@@ -0,0 +1,109 @@
+import json
+import os
+import re
+
+# Editable term file, merged on top of the fixed PDF texts
+TERMS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "glossary_terms.json")
+
+# Leading section numbers such as "1. " in "1. BASIC INFORMATION"
+SECTION_NUMBER = re.compile(r"^\d+\.\s*")
+
+# Tokens that never need translating (numbers, dates, units, punctuation)
+PASSTHROUGH_TOKEN = re.compile(r"^[\d.,:;/%+\-()#&²³~≤≥<>=]+$")
+
+
+def normalize_term(text):
+    """Normalize a label for glossary lookup"""
+    text = re.sub(r"\s+", " ", str(text)).strip()
+    return text.rstrip(":：").strip().casefold()
+
+
+class Glossary:
+    """Deterministic English to Chinese lookup for footwear test terms"""
+
+    def __init__(self, terms=None):
+        self.terms = {}
+        self.max_words = 1
+        for english, chinese in (terms or {}).items():
+            self.add(english, chinese)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def add(self, english, chinese):
+        """Add or replace a single term"""
+        key = normalize_term(english)
+        if not key or not chinese:
+            return
+        self.terms[key] = str(chinese).strip().rstrip(":：").strip()
+        self.max_words = max(self.max_words, len(key.split(" ")))
+
+    def lookup(self, text):
+        """Exact lookup of a whole label, None on miss"""
+        return self.terms.get(normalize_term(text))
+
+    def translate(self, text):
+        """Translate a label or phrase, None if any word is unknown"""
+        if not text or not str(text).strip():
+            return None
+
+        exact = self.lookup(text)
+        if exact is not None:
+            return exact
+
+        # Greedy longest-match over words, so "Top Lift Comments" resolves
+        # from "Top Lift" + "Comments" without a dedicated entry
+        words = normalize_term(text).split(" ")
+        parts = []
+        i = 0
+        while i < len(words):
+            for size in range(min(self.max_words, len(words) - i), 0, -1):
+                match = self.terms.get(" ".join(words[i:i + size]))
+                if match is not None:
+                    parts.append(match)
+                    i += size
+                    break
+            else:
+                if not PASSTHROUGH_TOKEN.match(words[i]):
+                    return None
+                parts.append(words[i])
+                i += 1
+
+        # Chinese terms join without spaces, numbers keep theirs
+        translated = ""
+        for part in parts:
+            if translated and (translated[-1].isascii() and translated[-1].isalnum()) and part[0].isascii():
+                translated += " "
+            translated += part
+        return translated
+
+
+def load_term_file(path=TERMS_FILE):
+    """Load the editable term file, empty if it does not exist"""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_glossary(english_texts, chinese_texts, term_file=TERMS_FILE):
+    """Build the glossary from the fixed PDF texts plus the term file"""
+    glossary = Glossary()
+
+    for key, chinese in chinese_texts.items():
+        english = english_texts.get(key)
+        if not english:
+            continue
+        glossary.add(english, chinese)
+
+        # Section headers are also used without their numbers in the UI
+        english_match = SECTION_NUMBER.match(english)
+        chinese_match = SECTION_NUMBER.match(chinese)
+        if english_match and chinese_match and english_match.group().strip() == chinese_match.group().strip():
+            glossary.add(english[english_match.end():], chinese[chinese_match.end():])
+
+    # Term file entries win over the generated ones
+    for english, chinese in load_term_file(term_file).items():
+        glossary.add(english, chinese)
+
+    return glossary
@@ -0,0 +1,185 @@
+import asyncio
+import ipaddress
+import itertools
+import json
+import os
+import threading
+from collections import OrderedDict
+from functools import partial
+from numbers import Real
+
+import numpy as np
+from websockets.asyncio.server import serve
+
+from report_data import MEASURED_ITEMS, RECORDED_ITEMS
+
+# Instruments connect here; off unless a port is set (e.g. 8765), and only
+# this machine can connect unless the host is opened up as well
+INGEST_HOST = os.getenv("PTR_INGEST_HOST", "127.0.0.1")
+INGEST_PORT = int(os.getenv("PTR_INGEST_PORT", "0"))
+# Newline-delimited JSON over plain TCP, for serial-to-Ethernet adapters
+INGEST_TCP_PORT = int(os.getenv("PTR_INGEST_TCP_PORT", "0"))
+# Shared secret instruments send as "token"; required on any host but
+# loopback, empty accepts any local sender
+INGEST_TOKEN = os.getenv("PTR_INGEST_TOKEN", "")
+
+MAX_MESSAGE_BYTES = 64 * 1024
+MAX_READINGS_PER_ITEM = 500
+# Reports with live readings kept; the least recently fed go first
+MAX_LIVE_REPORTS = int(os.getenv("PTR_INGEST_MAX_REPORTS", "256"))
+
+# Channel names instruments send, e.g. "shoe_flex" or "eva_hardness"
+CHANNELS = {item["result"][:-len("_result")]: item["result"] for item in MEASURED_ITEMS + RECORDED_ITEMS}
+
+class LiveReadings:
+    """Readings pushed by instruments, by report number. The ingest event
+    loop writes and app sessions read, so every access takes the lock and
+    does no more than copy a few small lists"""
+    
+    def __init__(self, max_reports=MAX_LIVE_REPORTS):
+        self.max_reports = max_reports
+        # {report_no: {result_key: (version, {specimen: value})}}
+        self._reports = OrderedDict()
+        self._versions = itertools.count(1)
+        self._lock = threading.Lock()
+    
+    def push(self, report_no, result_key, values, specimen=None):
+        """Add readings; a named specimen replaces its earlier reading (a
+        cycle counter updating its count). Returns the item's reading count"""
+        with self._lock:
+            items = self._reports.setdefault(report_no, {})
+            self._reports.move_to_end(report_no)
+            _, readings = items.get(result_key, (0, {}))
+            readings = dict(readings)
+            for value in values:
+                key = ("specimen", specimen) if specimen is not None else ("auto", next(self._versions))
+                readings[key] = value
+            while len(readings) > MAX_READINGS_PER_ITEM:
+                del readings[next(iter(readings))]
+            items[result_key] = (next(self._versions), readings)
+            while len(self._reports) > self.max_reports:
+                self._reports.popitem(last=False)
+            return len(readings)
+    
+    def version(self, report_no):
+        """Latest change of a report's readings, 0 if it has none"""
+        with self._lock:
+            items = self._reports.get(report_no)
+            return max((version for version, _ in items.values()), default=0) if items else 0
+    
+    def changes(self, report_no, since=0):
+        """(version, {result_key: readings array}) of the items changed after
+        version since"""
+        with self._lock:
+            items = dict(self._reports.get(report_no, {}))
+        changed = {
+            key: np.array(list(readings.values()), dtype=float)
+            for key, (version, readings) in items.items() if version > since
+        }
+        return max((version for version, _ in items.values()), default=since), changed
+    
+    def clear(self, report_no):
+        with self._lock:
+            self._reports.pop(report_no, None)
+
+# Readings of this server process, fed by start_ingest()
+LIVE_READINGS = LiveReadings()
+
+def parse_message(text):
+    """(report_no, result_key, values, specimen) of one instrument message:
+    {"report_no": "R-1", "item": "shoe_flex", "value": 120000} or "values"
+    with a list; optional "specimen" and "token". Raises ValueError"""
+    try:
+        message = json.loads(text)
+    except ValueError:
+        raise ValueError("message is not JSON") from None
+    if not isinstance(message, dict):
+        raise ValueError("message must be a JSON object")
+    if INGEST_TOKEN and message.get("token") != INGEST_TOKEN:
+        raise ValueError("invalid token")
+    report_no = message.get("report_no")
+    if not isinstance(report_no, str) or not report_no.strip():
+        raise ValueError("report_no must be a non-empty string")
+    result_key = CHANNELS.get(message.get("item"))
+    if result_key is None:
+        raise ValueError(f"unknown item {message.get('item')!r}")
+    values = message["values"] if "values" in message else [message.get("value")]
+    if not isinstance(values, list) or not values or not all(
+        isinstance(value, Real) and not isinstance(value, bool) and np.isfinite(value) for value in values
+    ):
+        raise ValueError("value(s) must be finite numbers")
+    specimen = message.get("specimen")
+    if specimen is not None and len(values) != 1:
+        raise ValueError("a specimen takes a single value")
+    return report_no.strip(), result_key, [float(value) for value in values], specimen
+
+def handle_message(hub, text):
+    """Reply to one message, {"ok": true, "item", "n"} or {"ok": false, "error"}"""
+    try:
+        report_no, result_key, values, specimen = parse_message(text)
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}
+    count = hub.push(report_no, result_key, values, None if specimen is None else str(specimen))
+    return {"ok": True, "item": result_key, "n": count}
+
+async def websocket_client(hub, connection):
+    async for message in connection:
+        await connection.send(json.dumps(handle_message(hub, message)))
+
+async def tcp_client(hub, reader, writer):
+    try:
+        while line := await reader.readline():
+            if not line.strip():
+                continue
+            reply = handle_message(hub, line.decode("utf-8", errors="replace"))
+            writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+            await writer.drain()
+    except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+        # Dropped or garbled connection; the instrument reconnects
+        pass
+    finally:
+        writer.close()
+
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def start_ingest(hub=LIVE_READINGS, host=INGEST_HOST, port=INGEST_PORT, tcp_port=INGEST_TCP_PORT, token=INGEST_TOKEN):
+    """Serve instruments on an event loop of its own thread, so slow or many
+    connections never wait on the app. Returns once listening:
+    {"ws_port", "tcp_port", "error"} (ports None when off). Refuses to
+    listen beyond this machine without a token"""
+    status = {"ws_port": None, "tcp_port": None, "error": None}
+    if not is_loopback(host) and not token:
+        status["error"] = f"not listening on {host} without PTR_INGEST_TOKEN"
+        return status
+    ready = threading.Event()
+    
+    async def main():
+        servers = []
+        try:
+            if port:
+                server = await serve(partial(websocket_client, hub), host, port, max_size=MAX_MESSAGE_BYTES)
+                servers.append(server)
+                status["ws_port"] = next(iter(server.sockets)).getsockname()[1]
+            if tcp_port:
+                server = await asyncio.start_server(partial(tcp_client, hub), host, tcp_port, limit=MAX_MESSAGE_BYTES)
+                servers.append(server)
+                status["tcp_port"] = server.sockets[0].getsockname()[1]
+        except OSError as e:
+            status["error"] = str(e)
+            for server in servers:
+                server.close()
+            return
+        finally:
+            ready.set()
+        await asyncio.Future()
+    
+    thread = threading.Thread(target=asyncio.run, args=(main(),), name="instrument-ingest", daemon=True)
+    thread.start()
+    ready.wait()
+    return status
@@ -0,0 +1,120 @@
+# Simulated hardness testers and flex machines for trying out ingest.py
+# without the shop-floor hardware. Each device is one connection pushing
+# readings into a report. Start the app with PTR_INGEST_PORT=8765 first:
+#
+#   python instrument_sim.py --report-no R-001 --hardness 4 --flex 2
+#   python instrument_sim.py --devices 200 --interval 0.05 --count 100   (load)
+#   python instrument_sim.py --tcp 127.0.0.1:8766 --report-no R-001
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+import numpy as np
+from websockets.asyncio.client import connect
+
+# Shore A values around these means, and cycle counts a flex specimen
+# survives before the upper cracks
+HARDNESS_ITEMS = {"eva_hardness": 55.0, "outsole_hardness": 65.0}
+FLEX_ITEMS = {"upper_flex": 250000, "shoe_flex": 100000}
+
+def device_messages(kind, index, report_no, count, rng):
+    """Messages one simulated device sends, in order"""
+    if kind == "hardness":
+        item = list(HARDNESS_ITEMS)[index % len(HARDNESS_ITEMS)]
+        for _ in range(count):
+            yield {"report_no": report_no, "item": item, "value": round(rng.gauss(HARDNESS_ITEMS[item], 2.0), 1)}
+    else:
+        # A flex counter reports progress of its specimen, then the count at
+        # which it stopped; later counts replace earlier ones
+        item = list(FLEX_ITEMS)[index % len(FLEX_ITEMS)]
+        final = int(FLEX_ITEMS[item] * rng.uniform(0.9, 1.6))
+        for step in range(1, count + 1):
+            yield {"report_no": report_no, "item": item, "specimen": f"flex-{index}", "value": final * step // count}
+
+class Channel:
+    """One device connection over websockets or newline-delimited TCP"""
+    
+    def __init__(self, url=None, tcp=None):
+        self.url = url
+        self.tcp = tcp
+    
+    async def __aenter__(self):
+        if self.tcp:
+            host, port = self.tcp.rsplit(":", 1)
+            self.reader, self.writer = await asyncio.open_connection(host, int(port))
+        else:
+            self.websocket = await connect(self.url)
+        return self
+    
+    async def __aexit__(self, *exc):
+        if self.tcp:
+            self.writer.close()
+        else:
+            await self.websocket.close()
+    
+    async def request(self, message):
+        """Send one message and wait for the acknowledgement"""
+        if self.tcp:
+            self.writer.write(json.dumps(message).encode("utf-8") + b"\n")
+            await self.writer.drain()
+            return json.loads(await self.reader.readline())
+        await self.websocket.send(json.dumps(message))
+        return json.loads(await self.websocket.recv())
+
+async def run_device(kind, index, args, latencies, errors):
+    rng = random.Random(args.seed * 10007 + index)
+    report_no = args.report_no if args.report_no else f"SIM-{index % args.reports:04d}"
+    # Spread the devices' start so they do not all send at once
+    await asyncio.sleep(rng.uniform(0, args.interval))
+    async with Channel(args.url, args.tcp) as channel:
+        for message in device_messages(kind, index, report_no, args.count, rng):
+            start = time.perf_counter()
+            if args.token:
+                message["token"] = args.token
+            reply = await channel.request(message)
+            latencies.append(time.perf_counter() - start)
+            if not reply.get("ok"):
+                errors.append(reply.get("error"))
+            await asyncio.sleep(args.interval)
+
+async def simulate(args):
+    kinds = ["hardness"] * args.hardness + ["flex"] * args.flex
+    kinds += [("hardness", "flex")[i % 2] for i in range(args.devices)]
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_device(kind, i, args, latencies, errors) for i, kind in enumerate(kinds)))
+    elapsed = time.perf_counter() - start
+    
+    latencies = np.array(latencies) * 1000
+    print(f"{len(kinds)} devices, {latencies.size} readings in {elapsed:.1f} s ({latencies.size / elapsed:.0f}/s), {len(errors)} rejected")
+    if latencies.size:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(f"ack latency ms: p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f}  max {latencies.max():.1f}")
+    for error in sorted(set(errors)):
+        print(f"  rejected: {error}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated instruments feeding the ingest server")
+    parser.add_argument("--url", default="ws://127.0.0.1:8765", help="websocket address of ingest.py")
+    parser.add_argument("--tcp", help="host:port of the TCP listener instead of websockets")
+    parser.add_argument("--token", default=os.getenv("PTR_INGEST_TOKEN", ""), help="shared secret of the ingest server")
+    parser.add_argument("--report-no", help="report every device feeds; default SIM-0000 ... per --reports")
+    parser.add_argument("--reports", type=int, default=10, help="reports the devices are spread over without --report-no")
+    parser.add_argument("--hardness", type=int, default=0, help="hardness testers")
+    parser.add_argument("--flex", type=int, default=0, help="flex machines")
+    parser.add_argument("--devices", type=int, default=0, help="extra devices, half of each kind")
+    parser.add_argument("--count", type=int, default=5, help="readings each device sends")
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between a device's readings")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if not (args.hardness or args.flex or args.devices):
+        args.hardness, args.flex = 2, 2
+    asyncio.run(simulate(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from contextlib import closing
+from datetime import date
+
+# Job database and rendered artifacts, shared by the app and the workers
+JOBS_DIR = os.getenv("PTR_JOBS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "jobs"))
+JOBS_DB = os.path.join(JOBS_DIR, "jobs.sqlite3")
+ARTIFACT_DIR = os.path.join(JOBS_DIR, "artifacts")
+
+# Idle poll interval of a worker. A rendering worker stamps its job every
+# HEARTBEAT_INTERVAL; a render whose stamp is older than STALE_AFTER (or
+# whose worker process is gone) is handed to another worker
+POLL_INTERVAL = float(os.getenv("PTR_JOB_POLL_INTERVAL", "0.5"))
+HEARTBEAT_INTERVAL = float(os.getenv("PTR_JOB_HEARTBEAT_INTERVAL", "10"))
+STALE_AFTER = float(os.getenv("PTR_JOB_STALE_AFTER", "120"))
+# How often a worker looks for renders of dead workers and old artifacts
+HOUSEKEEPING_INTERVAL = float(os.getenv("PTR_JOB_HOUSEKEEPING_INTERVAL", "30"))
+# A job whose render took down its worker this often is failed, not retried
+MAX_ATTEMPTS = int(os.getenv("PTR_JOB_MAX_ATTEMPTS", "3"))
+# Rendered files are deleted after this many days; the job rows stay
+ARTIFACT_KEEP_DAYS = float(os.getenv("PTR_JOB_ARTIFACT_KEEP_DAYS", "7"))
+
+# Job states
+QUEUED = "queued"
+RENDERING = "rendering"
+DONE = "done"
+FAILED = "failed"
+PENDING_STATES = (QUEUED, RENDERING)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    mime TEXT NOT NULL,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    worker TEXT,
+    artifact TEXT,
+    size INTEGER,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    heartbeat REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_owner ON jobs (owner, created);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+"""
+
+def connect(path=None):
+    """Open the job database, creating it on first use"""
+    path = path or JOBS_DB
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    # WAL lets the app read status while a worker writes
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    # Databases created before jobs counted their attempts and heartbeats
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+    for column, declaration in (("attempts", "INTEGER NOT NULL DEFAULT 0"), ("heartbeat", "REAL")):
+        if column in columns:
+            continue
+        try:
+            conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {declaration}")
+        except sqlite3.OperationalError:
+            # Another process added it first
+            pass
+    return conn
+
+def encode_value(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    if hasattr(value, "tolist"):
+        # Specimen readings are NumPy arrays
+        return value.tolist()
+    return value
+
+def encode_data(data):
+    """Report fields as JSON; dates become ISO strings, arrays lists"""
+    return {key: encode_value(value) for key, value in data.items()}
+
+def decode_data(data):
+    """Inverse of encode_data() for the fields the renderer needs as dates"""
+    data = dict(data)
+    if data.get("test_date"):
+        data["test_date"] = date.fromisoformat(data["test_date"])
+    return data
+
+def enqueue(owner, data, selected_city, profile, langs, basename, zip_output=False, deterministic=False):
+    """Queue a render job, returns its id"""
+    job_id = uuid.uuid4().hex
+    params = {
+        "data": encode_data(data),
+        "selected_city": selected_city,
+        "profile": profile,
+        "langs": list(langs),
+        "basename": basename,
+        "zip_output": zip_output,
+        "deterministic": deterministic,
+    }
+    filename = f"{basename}.zip" if zip_output else f"{basename}.pdf"
+    mime = "application/zip" if zip_output else "application/pdf"
+    with closing(connect()) as conn:
+        conn.execute(
+            "INSERT INTO jobs (id, owner, status, params, filename, mime, created) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, owner, QUEUED, json.dumps(params, ensure_ascii=False), filename, mime, time.time())
+        )
+    return job_id
+
+def get_job(job_id):
+    """Job row as a dict, None if unknown"""
+    with closing(connect()) as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return dict(row) if row else None
+
+def list_jobs(owner, limit=20):
+    """Most recent jobs of one owner, newest first"""
+    with closing(connect()) as conn:
+        rows = conn.execute(
+            "SELECT * FROM jobs WHERE owner = ? ORDER BY created DESC LIMIT ?", (owner, limit)
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+def queue_position(job):
+    """Number of queued jobs ahead of this one"""
+    with closing(connect()) as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = ? AND created < ?", (QUEUED, job["created"])
+        ).fetchone()[0]
+
+def artifact_available(job):
+    """True if a finished job's file is still there (not yet expired)"""
+    return job["status"] == DONE and bool(job["artifact"]) and os.path.exists(job["artifact"])
+
+def read_artifact(job):
+    """Rendered file of a finished job, None if missing"""
+    if not artifact_available(job):
+        return None
+    with open(job["artifact"], "rb") as f:
+        return f.read()
+
+def claim_job(conn, worker):
+    """Atomically move the oldest queued job to rendering, None if idle"""
+    row = conn.execute(
+        """UPDATE jobs SET status = ?, started = ?, heartbeat = ?, worker = ?, attempts = attempts + 1
+           WHERE id = (SELECT id FROM jobs WHERE status = ? ORDER BY created LIMIT 1)
+           AND status = ?
+           RETURNING *""",
+        (RENDERING, time.time(), time.time(), worker, QUEUED, QUEUED)
+    ).fetchone()
+    return dict(row) if row else None
+
+def finish_job(conn, job, worker, **fields):
+    """Set the final status and fields of a render, only while it is still
+    this worker's (not requeued and claimed again meanwhile); returns
+    whether it was"""
+    assignments = ", ".join(f"{key} = ?" for key in fields)
+    return conn.execute(
+        f"UPDATE jobs SET {assignments} WHERE id = ? AND status = ? AND worker = ?",
+        (*fields.values(), job["id"], RENDERING, worker)
+    ).rowcount > 0
+
+class Heartbeat:
+    """Stamps a claimed job every HEARTBEAT_INTERVAL from a thread of its
+    own while the render runs, so a slow render is not taken for a dead one"""
+    
+    def __init__(self, job, worker, interval=HEARTBEAT_INTERVAL):
+        self.job_id = job["id"]
+        self.worker = worker
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="job-heartbeat", daemon=True)
+    
+    def run(self):
+        with closing(connect()) as conn:
+            while not self.stopped.wait(self.interval):
+                conn.execute(
+                    "UPDATE jobs SET heartbeat = ? WHERE id = ? AND status = ? AND worker = ?",
+                    (time.time(), self.job_id, RENDERING, self.worker)
+                )
+    
+    def __enter__(self):
+        self.thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+
+def worker_alive(worker):
+    """False for a worker of this host whose process is gone; workers of
+    other hosts count as alive until they go stale"""
+    host, _, pid = (worker or "").rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return True
+    return parent_alive(int(pid))
+
+def requeue_stale(conn):
+    """Hand renders of dead workers back to the queue, or fail them once they
+    have taken down MAX_ATTEMPTS workers. A worker is dead when its process
+    is gone or its heartbeat stopped; a slow render still beats"""
+    stale_before = time.time() - STALE_AFTER
+    rows = conn.execute("SELECT id, worker, started, heartbeat, attempts FROM jobs WHERE status = ?", (RENDERING,)).fetchall()
+    for row in rows:
+        beat = row["heartbeat"] or row["started"]
+        if beat >= stale_before and worker_alive(row["worker"]):
+            continue
+        if row["attempts"] >= MAX_ATTEMPTS:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished = ?, error = ? WHERE id = ? AND status = ? AND worker = ?",
+                (FAILED, time.time(), f"render stopped {row['attempts']} times", row["id"], RENDERING, row["worker"])
+            )
+        else:
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = NULL WHERE id = ? AND status = ? AND worker = ?",
+                (QUEUED, row["id"], RENDERING, row["worker"])
+            )
+
+def remove_old_artifacts(conn, keep_days=ARTIFACT_KEEP_DAYS):
+    """Delete rendered files older than keep_days, and leftovers of renders
+    that never finished writing"""
+    cutoff = time.time() - keep_days * 86400
+    conn.execute("UPDATE jobs SET artifact = NULL WHERE artifact IS NOT NULL AND finished < ?", (cutoff,))
+    if not os.path.isdir(ARTIFACT_DIR):
+        return
+    for name in os.listdir(ARTIFACT_DIR):
+        path = os.path.join(ARTIFACT_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            # Removed by another worker meanwhile
+            pass
+
+def run_job(job):
+    """Render a claimed job to ARTIFACT_DIR, returns (path, size)"""
+    from report_pdf import render_pdf_bytes
+    from render_pool import editions_zip
+    
+    params = json.loads(job["params"])
+    data = decode_data(params["data"])
+    editions = {
+        lang: render_pdf_bytes(data, lang, params["selected_city"], params["profile"], params["deterministic"])
+        for lang in params["langs"]
+    }
+    if params["zip_output"]:
+        content = editions_zip(editions, params["basename"], params["deterministic"]).getvalue()
+    else:
+        content = editions[params["langs"][0]]
+    
+    os.makedirs(ARTIFACT_DIR, exist_ok=True)
+    path = os.path.join(ARTIFACT_DIR, f"{job['id']}{os.path.splitext(job['filename'])[1]}")
+    # Write then rename so a half-written file is never served; the part
+    # file is per process in case a requeued job is rendered twice
+    part = f"{path}.{os.getpid()}.part"
+    with open(part, "wb") as f:
+        f.write(content)
+    os.replace(part, path)
+    return path, len(content)
+
+def parent_alive(pid):
+    """True while the process that started the workers is running"""
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    return True
+
+def worker_loop(poll_interval=POLL_INTERVAL, once=False, parent=None):
+    """Claim and render jobs until stopped; once=True drains the queue and
+    returns, parent=pid exits when that process is gone"""
+    import report_pdf
+    report_pdf.register_chinese_font()
+    
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    conn = connect()
+    housekeeping = 0
+    while True:
+        if time.monotonic() >= housekeeping:
+            requeue_stale(conn)
+            remove_old_artifacts(conn)
+            housekeeping = time.monotonic() + HOUSEKEEPING_INTERVAL
+        job = claim_job(conn, worker)
+        if job is None:
+            if once or (parent and not parent_alive(parent)):
+                return
+            time.sleep(poll_interval)
+            continue
+        try:
+            with Heartbeat(job, worker):
+                path, size = run_job(job)
+        except Exception as e:
+            finish_job(conn, job, worker, status=FAILED, finished=time.time(), error=str(e))
+            continue
+        if not finish_job(conn, job, worker, status=DONE, finished=time.time(), artifact=path, size=size):
+            # Requeued meanwhile: the job's status belongs to its new claim
+            continue
+        # Measurements of finished reports feed the control charts (spc.py)
+        try:
+            from spc import record_report
+            record_report(decode_data(json.loads(job["params"])["data"]), job["created"])
+        except Exception as e:
+            print(f"SPC points of job {job['id'][:8]}: {e}", file=sys.stderr)
+
+def spawn_worker(index, parent=None):
+    process = multiprocessing.get_context("spawn").Process(
+        target=worker_loop, kwargs={"parent": parent}, name=f"render-worker-{index}"
+    )
+    process.start()
+    return process
+
+def spawn_workers(count, parent=None):
+    """Start worker processes from this process, returns them"""
+    return [spawn_worker(i, parent) for i in range(count)]
+
+def supervise(count, parent=None, check_interval=1.0):
+    """Keep count workers running, starting a new one for each that dies;
+    a render it left behind goes back to the queue at once. Returns when
+    the workers exit because the parent is gone"""
+    processes = spawn_workers(count, parent)
+    while processes:
+        time.sleep(check_interval)
+        for i, process in enumerate(processes):
+            if process is None or process.is_alive():
+                continue
+            process.join()
+            if parent and not parent_alive(parent):
+                processes[i] = None
+                continue
+            print(f"{process.name} exited with {process.exitcode}, restarting", file=sys.stderr)
+            with closing(connect()) as conn:
+                requeue_stale(conn)
+            processes[i] = spawn_worker(i, parent)
+        processes = processes if any(processes) else []
+
+def start_workers(count):
+    """Run the workers as a separate `python jobs.py` process that exits
+    together with the caller; used by the Streamlit app"""
+    return subprocess.Popen([
+        sys.executable, os.path.abspath(__file__),
+        "--workers", str(count), "--parent", str(os.getpid())
+    ])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run background PDF render workers")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes to run")
+    parser.add_argument("--once", action="store_true", help="drain the queue and exit")
+    parser.add_argument("--parent", type=int, help="exit when this process id is gone")
+    args = parser.parse_args()
+    
+    if args.once:
+        worker_loop(once=True)
+    else:
+        supervise(args.workers, args.parent)
@@ -0,0 +1,190 @@
+# Local OpenAI-compatible stand-in for offline runs, CI and load tests.
+# Answers /v1/chat/completions with deterministic glossary translations and
+# can add latency, errors and a rate limit:
+#
+#   python openai_stub.py --port 8787 --latency-ms 300 --jitter-ms 100 --error-rate 0.02 --rpm 120
+#   OPENAI_API_KEY=stub OPENAI_BASE_URL=http://127.0.0.1:8787/v1 streamlit run s.py
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from glossary import build_glossary
+from report_data import ENGLISH_TEXTS, CHINESE_TEXTS
+
+# Marks text the glossary could not translate, so it is easy to spot
+UNTRANSLATED_PREFIX = "[未翻译] "
+
+class StubConfig:
+    """Behaviour knobs shared by all request threads"""
+    
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rpm=0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rpm = rpm
+        self.random = random.Random(seed)
+        self.glossary = build_glossary(ENGLISH_TEXTS, CHINESE_TEXTS)
+        self.recent = deque()
+        self.lock = threading.Lock()
+    
+    def delay(self):
+        """Seconds to wait before answering"""
+        with self.lock:
+            jitter = self.random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+        return max(0.0, self.latency + jitter)
+    
+    def should_fail(self):
+        with self.lock:
+            return self.error_rate > 0 and self.random.random() < self.error_rate
+    
+    def rate_limited(self):
+        """Seconds until the next request is allowed, 0 if within the limit"""
+        if not self.rpm:
+            return 0
+        now = time.monotonic()
+        with self.lock:
+            while self.recent and now - self.recent[0] >= 60:
+                self.recent.popleft()
+            if len(self.recent) >= self.rpm:
+                return 60 - (now - self.recent[0])
+            self.recent.append(now)
+        return 0
+    
+    def translate(self, text):
+        translated = self.glossary.translate(text)
+        return translated if translated is not None else UNTRANSLATED_PREFIX + text
+
+def completion(model, content, prompt):
+    """Chat completion response body in the OpenAI wire format"""
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": len(prompt),
+            "completion_tokens": len(content),
+            "total_tokens": len(prompt) + len(content),
+        },
+    }
+
+def completion_chunks(model, content):
+    """The same answer as server-sent event chunks, for stream=true"""
+    base = {"id": f"chatcmpl-{uuid.uuid4().hex[:24]}", "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+    yield {**base, "choices": [{"index": 0, "delta": {"role": "assistant", "content": content}, "finish_reason": None}]}
+    yield {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+
+def error_body(message, kind, code):
+    return {"error": {"message": message, "type": kind, "param": None, "code": code}}
+
+def make_handler(config):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        
+        def send_json(self, status, body, headers=()):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+        
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                self.send_json(200, {"object": "list", "data": [
+                    {"id": "gpt-4o-mini", "object": "model", "created": 0, "owned_by": "stub"}
+                ]})
+            else:
+                self.send_json(404, error_body("Not found", "invalid_request_error", None))
+        
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length)
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_json(404, error_body("Not found", "invalid_request_error", None))
+                return
+            
+            retry_after = config.rate_limited()
+            if retry_after:
+                self.send_json(
+                    429, error_body("Rate limit reached for requests", "requests", "rate_limit_exceeded"),
+                    headers=[("Retry-After", str(max(1, round(retry_after))))]
+                )
+                return
+            
+            try:
+                request = json.loads(body or b"{}")
+                messages = request["messages"]
+            except (ValueError, KeyError):
+                self.send_json(400, error_body("Invalid request body", "invalid_request_error", None))
+                return
+            
+            time.sleep(config.delay())
+            if config.should_fail():
+                self.send_json(500, error_body("The server had an error while processing your request", "server_error", None))
+                return
+            
+            prompt = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+            model = request.get("model", "gpt-4o-mini")
+            content = config.translate(prompt)
+            
+            if request.get("stream"):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for chunk in completion_chunks(model, content):
+                    self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+                return
+            self.send_json(200, completion(model, content, prompt))
+        
+        def log_message(self, format, *args):
+            pass
+    
+    return StubHandler
+
+def start_stub(port=0, latency=0.0, jitter=0.0, error_rate=0.0, rpm=0, seed=0):
+    """Serve the stub on a background thread, returns (server, base_url)"""
+    config = StubConfig(latency, jitter, error_rate, rpm, seed)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="openai-stub", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stub server")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency-ms", type=float, default=0, help="mean delay before every response")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="uniform +/- variation of the delay")
+    parser.add_argument("--error-rate", type=float, default=0, help="fraction of requests answered with HTTP 500")
+    parser.add_argument("--rpm", type=int, default=0, help="requests per minute before HTTP 429, 0 for no limit")
+    parser.add_argument("--seed", type=int, default=0, help="seed for jitter and injected errors")
+    args = parser.parse_args()
+    
+    server, base_url = start_stub(
+        args.port, args.latency_ms / 1000, args.jitter_ms / 1000, args.error_rate, args.rpm, args.seed
+    )
+    print(f"OpenAI stub on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+# Profiles are written here as <stamp>_<label>.{prof,folded,txt}
+PROFILE_DIR = os.getenv("PTR_PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "profiles"))
+PROFILE_TOP_N = int(os.getenv("PTR_PROFILE_TOP_N", "30"))
+SAMPLE_INTERVAL = float(os.getenv("PTR_PROFILE_SAMPLE_INTERVAL", "0.005"))
+
+# cProfile gives exact call counts; sampling gives a flamegraph with little
+# overhead. "both" runs them together (the sample then includes cProfile cost)
+PROFILE_MODES = ("cprofile", "sample", "both")
+
+def profile_mode(value):
+    """Profile mode from a ?profile= query value, None when profiling is off"""
+    if not value or value in ("0", "false", "off"):
+        return None
+    if value in PROFILE_MODES:
+        return value
+    return "both"
+
+def frame_name(code):
+    """Frame label for folded stacks, which split on ';' and the last space"""
+    return f"{code.co_name}@{os.path.basename(code.co_filename)}:{code.co_firstlineno}".replace(" ", "_").replace(";", ",")
+
+class StackSampler:
+    """Samples one thread's stack on a timer and counts folded stacks"""
+    
+    def __init__(self, thread_id=None, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="stack-sampler", daemon=True)
+    
+    def start(self):
+        self.thread.start()
+        return self
+    
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+    
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                # Profiled thread is gone (e.g. a rerun was interrupted)
+                break
+            stack = []
+            while frame is not None:
+                stack.append(frame_name(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+    
+    def folded(self):
+        """Stacks in Brendan Gregg's folded format (flamegraph.pl, speedscope)"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+def profile_path(label, stamp):
+    """File path without extension for one saved profile"""
+    safe_label = re.sub(r"[^\w.-]+", "_", label).strip("_") or "profile"
+    return os.path.join(PROFILE_DIR, f"{stamp}_{safe_label}")
+
+def top_summary(profiler, sampler, label, elapsed, top_n=PROFILE_TOP_N):
+    """Top-N text summary by cumulative time and by sampled leaf frame"""
+    out = io.StringIO()
+    out.write(f"{label}: {elapsed * 1000:.1f} ms wall\n\n")
+    if profiler is not None:
+        stats = pstats.Stats(profiler, stream=out)
+        stats.sort_stats("cumulative").print_stats(top_n)
+    if sampler is not None and sampler.stacks:
+        total = sum(sampler.stacks.values())
+        leaves = Counter()
+        for stack, count in sampler.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        out.write(f"Sampled leaf frames ({total} samples every {sampler.interval * 1000:.0f} ms)\n")
+        for name, count in leaves.most_common(top_n):
+            out.write(f"{count / total * 100:6.1f}%  {name}\n")
+    return out.getvalue()
+
+@contextmanager
+def profile_block(label, mode="both"):
+    """Profile the enclosed code on this thread and save it under PROFILE_DIR;
+    mode=None runs the code untouched"""
+    if mode is None:
+        yield None
+        return
+    
+    profiler = cProfile.Profile() if mode in ("cprofile", "both") else None
+    sampler = StackSampler().start() if mode in ("sample", "both") else None
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        if sampler is not None:
+            sampler.stop()
+        elapsed = time.perf_counter() - start
+        save_profile(label, profiler, sampler, elapsed)
+
+def save_profile(label, profiler, sampler, elapsed):
+    """Write .prof (pstats/snakeviz), .folded (flamegraph) and .txt (top-N)"""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = f"{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{uuid.uuid4().hex[:6]}"
+    base = profile_path(label, stamp)
+    if profiler is not None:
+        profiler.dump_stats(base + ".prof")
+    if sampler is not None:
+        with open(base + ".folded", "w") as f:
+            f.write(sampler.folded())
+    with open(base + ".txt", "w") as f:
+        f.write(top_summary(profiler, sampler, label, elapsed))
+    return base
+
+def profile_script(path, namespace, label, mode="both"):
+    """Run a whole script file, such as a Streamlit rerun, inside
+    profile_block() so the profile stops however the run ends: st.rerun(),
+    st.stop() or an error. namespace is the script's module globals"""
+    with open(path, encoding="utf-8") as f:
+        code = compile(f.read(), path, "exec")
+    namespace["PROFILED_RUN"] = True
+    with profile_block(label, mode):
+        exec(code, namespace)
+
+def recent_profiles(limit=10):
+    """Newest top-N summaries, as file paths"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    paths = [os.path.join(PROFILE_DIR, name) for name in os.listdir(PROFILE_DIR) if name.endswith(".txt")]
+    return sorted(paths, key=os.path.getmtime, reverse=True)[:limit]
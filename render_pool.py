@@ -0,0 +1,125 @@
+import io
+import os
+import sys
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.context import SpawnContext, SpawnProcess
+
+# Worker processes shared by every session of this server
+RENDER_WORKERS = int(os.getenv("PTR_RENDER_WORKERS", "2"))
+
+# Renders waiting or running across all sessions before new ones are refused
+RENDER_QUEUE_LIMIT = int(os.getenv("PTR_RENDER_QUEUE_LIMIT", str(RENDER_WORKERS * 4)))
+
+# Entry timestamp for reproducible archives (earliest date zip can store)
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+executor = None
+executor_lock = threading.Lock()
+
+# Submitted renders in submission order, for queue position and backpressure
+inflight = []
+inflight_lock = threading.Lock()
+
+class RenderQueueFull(Exception):
+    """Raised when the shared render queue is at RENDER_QUEUE_LIMIT"""
+
+# Serialises the __main__ swap of WorkerProcess.start()
+main_swap_lock = threading.Lock()
+
+class WorkerProcess(SpawnProcess):
+    """Spawned process that starts from this module. A spawned child first
+    re-runs the parent's __main__, which under Streamlit is the whole app
+    script, so while starting, this module stands in for it"""
+    
+    def start(self):
+        this_module = sys.modules[__name__]
+        with main_swap_lock:
+            app_main = sys.modules["__main__"]
+            sys.modules["__main__"] = this_module
+            try:
+                super().start()
+            finally:
+                # A rerun starting meanwhile installs its own __main__; keep it
+                if sys.modules["__main__"] is this_module:
+                    sys.modules["__main__"] = app_main
+
+class WorkerContext(SpawnContext):
+    Process = WorkerProcess
+
+def init_worker():
+    """Import ReportLab and register fonts once per worker process"""
+    import report_pdf
+    report_pdf.register_chinese_font()
+
+def get_executor():
+    """Process pool created on first use and kept for the server's lifetime"""
+    global executor
+    with executor_lock:
+        if executor is None:
+            # Spawn, not fork: the Streamlit server is multi-threaded
+            executor = ProcessPoolExecutor(
+                max_workers=RENDER_WORKERS,
+                mp_context=WorkerContext(),
+                initializer=init_worker
+            )
+        return executor
+
+def release(future):
+    """Drop a finished render from the queue"""
+    with inflight_lock:
+        if future in inflight:
+            inflight.remove(future)
+
+def submit_renders(data, selected_city, profile="email", langs=("en",), deterministic=False, profile_mode=None):
+    """Queue one render per language on the shared pool, returns {lang: future}.
+    All or nothing: raises RenderQueueFull instead of queueing past the limit"""
+    from report_pdf import render_pdf_bytes
+    pool = get_executor()
+    with inflight_lock:
+        if len(inflight) + len(langs) > RENDER_QUEUE_LIMIT:
+            raise RenderQueueFull(f"{len(inflight)} reports are already queued, try again shortly")
+        futures = {
+            lang: pool.submit(render_pdf_bytes, data, lang, selected_city, profile, deterministic, profile_mode)
+            for lang in langs
+        }
+        inflight.extend(futures.values())
+    for future in futures.values():
+        future.add_done_callback(release)
+    return futures
+
+def render_status(futures):
+    """("rendering", 0) once any of the futures runs, else ("queued", renders ahead)"""
+    futures = list(futures)
+    if any(future.running() or future.done() for future in futures):
+        return "rendering", 0
+    with inflight_lock:
+        first = min((inflight.index(f) for f in futures if f in inflight), default=0)
+        ahead = sum(1 for future in inflight[:first] if not future.done())
+    return "queued", ahead
+
+def pool_status():
+    """Renders currently running and waiting across all sessions"""
+    with inflight_lock:
+        running = sum(1 for future in inflight if future.running())
+        return {"rendering": running, "queued": len(inflight) - running, "limit": RENDER_QUEUE_LIMIT}
+
+def render_editions(data, selected_city, profile="email", langs=("en", "zh"), deterministic=False):
+    """Render one report in several languages in parallel, returns {lang: bytes}"""
+    futures = submit_renders(data, selected_city, profile, langs, deterministic)
+    return {lang: future.result() for lang, future in futures.items()}
+
+def editions_zip(editions, basename, deterministic=False):
+    """Pack rendered editions into a zip named <basename>_<LANG>.pdf"""
+    buffer = io.BytesIO()
+    # PDF streams are already compressed, so store rather than deflate
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        for lang, pdf_bytes in editions.items():
+            name = f"{basename}_{lang.upper()}.pdf"
+            if deterministic:
+                # Fixed entry timestamps so the archive is reproducible too
+                name = zipfile.ZipInfo(name, date_time=ZIP_EPOCH)
+            archive.writestr(name, pdf_bytes)
+    buffer.seek(0)
+    return buffer
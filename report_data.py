@@ -0,0 +1,513 @@
+from datetime import datetime, date, time
+from zoneinfo import ZoneInfo
+import hashlib
+import re
+
+# Reports are stamped in China local time
+CHINA_TZ = ZoneInfo("Asia/Shanghai")
+
+# Leading section number of a heading, e.g. "2. " in "2. 粘合/拉力测试"
+SECTION_NUMBER = re.compile(r"^\d+\.\s*")
+
+# Chinese cities dictionary
+CHINESE_CITIES = {
+    "Guangzhou": "广东",
+    "Shenzhen": "深圳",
+    "Dongguan": "东莞",
+    "Foshan": "佛山",
+    "Zhongshan": "中山",
+    "Huizhou": "惠州",
+    "Zhuhai": "珠海",
+    "Jiangmen": "江门",
+    "Zhaoqing": "肇庆",
+    "Shanghai": "Shanghai",
+    "Beijing": "Beijing",
+    "Suzhou": "苏州",
+    "Hangzhou": "杭州",
+    "Ningbo": "宁波",
+    "Wenzhou": "温州",
+    "Wuhan": "武汉",
+    "Chengdu": "成都",
+    "Chongqing": "重庆",
+    "Tianjin": "天津",
+    "Nanjing": "南京",
+    "Xi'an": "西安",
+    "Qingdao": "青岛",
+    "Dalian": "大连",
+    "Shenyang": "沈阳",
+    "Changsha": "长沙",
+    "Zhengzhou": "郑州",
+    "Jinan": "济南",
+    "Harbin": "哈尔滨",
+    "Changchun": "长春",
+    "Taiyuan": "太原",
+    "Shijiazhuang": "石家庄",
+    "Lanzhou": "兰州",
+    "Xiamen": "厦门",
+    "Fuzhou": "福州",
+    "Nanning": "南宁",
+    "Kunming": "昆明",
+    "Guiyang": "贵阳",
+    "Haikou": "海口",
+    "Ürümqi": "乌鲁木齐",
+    "Lhasa": "拉萨"
+}
+# Fixed English texts for PDF (no translation needed)
+ENGLISH_TEXTS = {
+    "company": "GRAND STEP (H.K.) LTD",
+    "title": "PHYSICAL TEST REPORT",
+    "test_location": "Test Location:",
+    "report_date": "Report Date:",
+    
+    # Section headers
+    "basic_info": "1. BASIC INFORMATION",
+    "adhesive_test": "2. ADHESIVE/PULL TEST",
+    "components_test": "3. COMPONENTS PHYSICAL TEST",
+    "flexing_test": "4. FLEXING TEST",
+    "abrasion_test": "5. ABRASION TEST",
+    "resistance_test": "6. RESISTANCE TEST",
+    "hardness_test": "7. HARDNESS TEST",
+    "conclusion": "8. CONCLUSION",
+    "rust_test": "RUST TEST",
+    
+    # Labels
+    "report_no": "Report No.:",
+    "date_no": "Date/No.:",
+    "ci_no": "CI / Order No.:",
+    "order_qty": "Order QTY:",
+    "brand": "Brand:",
+    "produced_qty": "Produced QTY:",
+    "style_no": "Style No.:",
+    "factory_trader": "Factory/Trader:",
+    "sales": "Sales:",
+    
+    # Standard note
+    "standard_note": "Note: This is Grand Step Company Standard only. Any priority should follow Customer or 3rd Lab Standard",
+    "standard_applied": "Standard applied:",
+    
+    # Test headers
+    "flat_shoe": "Flat Shoe",
+    "high_heel": "High Heel",
+    "sole_wedge": "Sole/Wedge",
+    "toe": "Toe",
+    "forepart": "Forepart",
+    "waist": "Waist",
+    "heel": "Heel",
+    "heel_height": "Heel Height",
+    "material": "Material",
+    "cm_5_8": "5CM-8CM",
+    "above_8cm": "Above 8CM",
+    
+    # Specimen statistics
+    "specimen_stats": "Specimen statistics",
+    "specimens": "n",
+    "stat_min": "Min",
+    "stat_mean": "Mean",
+    "stat_max": "Max",
+    "stat_std": "SD",
+    "judged_on": "Judged on",
+    "force_curves": "Force-displacement curves",
+    "displacement_mm": "Displacement (mm)",
+    "force_n": "Force (N)",
+    
+    # Table headers
+    "item": "Item",
+    "standard": "Standard",
+    "result": "Result",
+    "comments": "Comments",
+    "remark": "Remark",
+    
+    # Components
+    "buckle": "Buckle",
+    "strap": "Strap",
+    "eyelet": "Eyelet",
+    "studs": "Studs",
+    "diamond_bow": "Diamond/Bow",
+    "top_lift": "Top lift",
+    "loop": "Loop",
+    "toe_post": "Toe Post Attachment",
+    "zipper": "Zipper",
+    "perment_set": "Perment set at 400N",
+    
+    # Rust test
+    "rust_test_full": "RUST TEST",
+    
+    # Flexing test
+    "upper": "Upper",
+    "shoe_flex": "Shoe Flex",
+    "foxing": "Foxing",
+    
+    # Abrasion test
+    "top_lift_abrasion": "Top Lift",
+    "outsole_abrasion": "Outsole Abrasion",
+    
+    # Resistance test
+    "outsole_resistance": "Outsole",
+    "heel_fatigue": "Heel Fatigue",
+    
+    # Hardness test
+    "eva_hardness": "EVA",
+    "outsole_hardness": "Outsole Hardness",
+    
+    # Conclusion
+    "pass_label": "PASS",
+    "fail_label": "FAIL",
+    "accept_label": "ACCEPT",
+    
+    # Signatures
+    "verified_by": "Verified by:",
+    "testing_person": "Testing Person:",
+    "signature": "Signature",
+    
+    # Version
+    "version": "Version 2024.09"
+}
+
+# Fixed Chinese texts for PDF (no translation needed)
+CHINESE_TEXTS = {
+    "company": "GRAND STEP (H.K.) LTD",
+    "title": "物理测试报告",
+    "test_location": "测试地点:",
+    "report_date": "报告日期:",
+    
+    # Section headers
+    "basic_info": "1. 基本信息",
+    "adhesive_test": "2. 粘合/拉力测试",
+    "components_test": "3. 配件物理测试",
+    "flexing_test": "4. 弯曲测试",
+    "abrasion_test": "5. 耐磨测试",
+    "resistance_test": "6. 阻力测试",
+    "hardness_test": "7. 硬度测试",
+    "conclusion": "8. 结论",
+    "rust_test": "防锈测试",
+    
+    # Labels
+    "report_no": "报告编号:",
+    "date_no": "日期/编号:",
+    "ci_no": "CI/订单号:",
+    "order_qty": "订单数量:",
+    "brand": "品牌:",
+    "produced_qty": "生产数量:",
+    "style_no": "款式号:",
+    "factory_trader": "工厂/贸易商:",
+    "sales": "销售:",
+    
+    # Standard note
+    "standard_note": "注：此标准仅为 Grand Step 公司标准。如有冲突，应遵循客户或第三方实验室标准",
+    "standard_applied": "采用标准:",
+    
+    # Test headers
+    "flat_shoe": "平底鞋",
+    "high_heel": "高跟鞋",
+    "sole_wedge": "鞋底/楔形",
+    "toe": "鞋头",
+    "forepart": "前掌",
+    "waist": "腰窝",
+    "heel": "后跟",
+    "heel_height": "后跟高度",
+    "material": "材料",
+    "cm_5_8": "5厘米-8厘米",
+    "above_8cm": "8厘米以上",
+    
+    # Specimen statistics
+    "specimen_stats": "试样统计",
+    "specimens": "试样数",
+    "stat_min": "最小值",
+    "stat_mean": "平均值",
+    "stat_max": "最大值",
+    "stat_std": "标准差",
+    "judged_on": "判定依据",
+    "force_curves": "力-位移曲线",
+    "displacement_mm": "位移 (mm)",
+    "force_n": "力 (N)",
+    
+    # Table headers
+    "item": "项目",
+    "standard": "标准",
+    "result": "结果",
+    "comments": "备注",
+    "remark": "备注",
+    
+    # Components
+    "buckle": "鞋扣",
+    "strap": "饰带",
+    "eyelet": "眼扣",
+    "studs": "饰钉",
+    "diamond_bow": "钻石/蝴蝶结",
+    "top_lift": "天皮",
+    "loop": "穿扣",
+    "toe_post": "趾柱附件",
+    "zipper": "拉链头",
+    "perment_set": "400N永久变形测试",
+    
+    # Rust test
+    "rust_test_full": "防锈测试",
+    
+    # Flexing test
+    "upper": "鞋面",
+    "shoe_flex": "鞋弯曲",
+    "foxing": "围条",
+    
+    # Abrasion test
+    "top_lift_abrasion": "天皮",
+    "outsole_abrasion": "外底耐磨",
+    
+    # Resistance test
+    "outsole_resistance": "外底",
+    "heel_fatigue": "后跟疲劳",
+    
+    # Hardness test
+    "eva_hardness": "EVA",
+    "outsole_hardness": "外底硬度",
+    
+    # Conclusion
+    "pass_label": "通过",
+    "fail_label": "不通过",
+    "accept_label": "接受",
+    
+    # Signatures
+    "verified_by": "审核人:",
+    "testing_person": "测试人员:",
+    "signature": "签名",
+    
+    # Version
+    "version": "版本 2024.09"
+}
+
+def get_bilingual_text(key):
+    """English and Chinese text side by side, e.g. Toe / 鞋头"""
+    english = ENGLISH_TEXTS.get(key, key)
+    chinese = CHINESE_TEXTS.get(key, key)
+    if english == chinese:
+        return english
+    
+    # Keep a single section number and a single trailing colon
+    section_number = SECTION_NUMBER.match(chinese)
+    if section_number and english.startswith(section_number.group()):
+        chinese = chinese[section_number.end():]
+    if english.endswith(":") and chinese.endswith(":"):
+        english = english[:-1]
+    return f"{english} / {chinese}"
+
+def get_pdf_text(key, pdf_lang):
+    """Get text for PDF based on language (English, Chinese or bilingual)"""
+    if pdf_lang == "en":
+        return ENGLISH_TEXTS.get(key, key)
+    elif pdf_lang == "bi":
+        return get_bilingual_text(key)
+    else:
+        return CHINESE_TEXTS.get(key, key)
+
+def get_location_display(selected_city, pdf_lang):
+    """Get location display text based on language"""
+    if pdf_lang == "en":
+        # For English PDF, show only English city name
+        return f"{selected_city}"
+    else:
+        # For Chinese PDF, show Chinese city name
+        chinese_name = CHINESE_CITIES[selected_city]
+        # Check if the Chinese name contains Chinese characters
+        if any('\u4e00' <= char <= '\u9fff' for char in chinese_name):
+            return f"{selected_city} ({chinese_name})"
+        else:
+            return f"{selected_city}"
+
+def china_now():
+    """Current time in the China timezone"""
+    return datetime.now(CHINA_TZ)
+
+def report_clock(data):
+    """Fixed clock for reproducible reports: midnight of the test date"""
+    test_date = data.get('test_date') or date(2000, 1, 1)
+    stamp = datetime.combine(test_date, time(0, 0), CHINA_TZ)
+    return lambda: stamp
+
+# Session state keys that make up one report
+REPORT_FIELDS = [
+    # Basic information
+    "report_no", "ci_no", "order_qty", "style_no", "brand",
+    "produced_qty", "factory", "sales", "test_date",
+    
+    # Customer or lab standard profile, empty for the company standard
+    "standard_profile",
+    
+    # Adhesive/pull test
+    "flat_shoe_toe_result", "flat_shoe_forepart_result",
+    "flat_shoe_waist_result", "flat_shoe_heel_result",
+    "high_heel_toe_result", "high_heel_forepart_result",
+    "high_heel_waist_result", "high_heel_heel_result",
+    
+    # Components physical test
+    "buckle_result", "buckle_comments", "strap_result", "strap_comments",
+    "eyelet_result", "eyelet_comments", "studs_result", "studs_comments",
+    "diamond_result", "diamond_comments", "top_lift_result", "top_lift_comments",
+    "loop_result", "loop_comments", "toe_post_result", "toe_post_comments",
+    "zipper_result", "zipper_comments", "perment_set_result", "perment_set_comments",
+    
+    # Rust test
+    "rust_buckle_result", "rust_strap_result", "rust_eyelet_result", "rust_studs_result",
+    
+    # Flexing, abrasion, resistance and hardness tests
+    "upper_flex_result", "upper_flex_comments", "shoe_flex_result", "shoe_flex_comments",
+    "foxing_result", "foxing_comments",
+    "top_lift_abrasion_result", "top_lift_abrasion_comments",
+    "outsole_abrasion_result", "outsole_abrasion_comments",
+    "outsole_resistance_result", "outsole_resistance_comments",
+    "heel_fatigue_result", "heel_fatigue_comments",
+    "eva_hardness_result", "eva_hardness_comments",
+    "outsole_hardness_result", "outsole_hardness_comments",
+    
+    # Conclusion and signatures
+    "pass_result", "fail_result", "accept_result",
+    "verified_by", "testing_person"
+]
+
+# Result choices offered for a test item
+RESULT_OPTIONS = ("Pass", "Fail", "Accept")
+RUST_OPTIONS = ("Pass", "Fail")
+
+def test_item(section, label, standard, result, comments=None, options=RESULT_OPTIONS):
+    """One TEST_ITEMS entry"""
+    return {
+        "section": section, "label": label, "standard": standard,
+        "result": result, "comments": comments, "options": options,
+    }
+
+# Pass/fail test items: text key of the label, standards.json item, and the
+# session state keys of the result and comments; used by the grid entry mode
+TEST_ITEMS = [
+    test_item("components", "buckle", "buckle", "buckle_result", "buckle_comments"),
+    test_item("components", "strap", "strap", "strap_result", "strap_comments"),
+    test_item("components", "eyelet", "eyelet", "eyelet_result", "eyelet_comments"),
+    test_item("components", "studs", "studs", "studs_result", "studs_comments"),
+    test_item("components", "diamond_bow", "diamond_bow", "diamond_result", "diamond_comments"),
+    test_item("components", "top_lift", "top_lift", "top_lift_result", "top_lift_comments"),
+    test_item("components", "loop", "loop", "loop_result", "loop_comments"),
+    test_item("components", "toe_post", "toe_post", "toe_post_result", "toe_post_comments"),
+    test_item("components", "zipper", "zipper", "zipper_result", "zipper_comments"),
+    test_item("components", "perment_set", "perment_set", "perment_set_result", "perment_set_comments"),
+    test_item("rust", "buckle", None, "rust_buckle_result", options=RUST_OPTIONS),
+    test_item("rust", "strap", None, "rust_strap_result", options=RUST_OPTIONS),
+    test_item("rust", "eyelet", None, "rust_eyelet_result", options=RUST_OPTIONS),
+    test_item("rust", "studs", None, "rust_studs_result", options=RUST_OPTIONS),
+    test_item("flexing", "upper", "upper", "upper_flex_result", "upper_flex_comments"),
+    test_item("flexing", "shoe_flex", "shoe_flex", "shoe_flex_result", "shoe_flex_comments"),
+    test_item("flexing", "foxing", "foxing", "foxing_result", "foxing_comments"),
+    test_item("abrasion", "top_lift_abrasion", None, "top_lift_abrasion_result", "top_lift_abrasion_comments"),
+    test_item("abrasion", "outsole_abrasion", "outsole_abrasion", "outsole_abrasion_result", "outsole_abrasion_comments"),
+    test_item("resistance", "outsole_resistance", None, "outsole_resistance_result", "outsole_resistance_comments"),
+    test_item("resistance", "heel_fatigue", "heel_fatigue", "heel_fatigue_result", "heel_fatigue_comments"),
+    test_item("hardness", "eva_hardness", None, "eva_hardness_result", "eva_hardness_comments"),
+    test_item("hardness", "outsole_hardness", None, "outsole_hardness_result", "outsole_hardness_comments"),
+]
+
+def section_items(section):
+    """TEST_ITEMS of one section, in display order"""
+    return [item for item in TEST_ITEMS if item["section"] == section]
+
+def measured_item(section, label, result, standard):
+    """One MEASURED_ITEMS entry; standard is an item of standards.json"""
+    return {"section": section, "label": label, "result": result, "standard": standard}
+
+# Items with a numeric standard: specimen readings entered for one of these
+# decide its Pass/Fail result (see evaluation.py)
+MEASURED_ITEMS = [
+    measured_item("flat_shoe", "toe", "flat_shoe_toe_result", "adhesive"),
+    measured_item("flat_shoe", "forepart", "flat_shoe_forepart_result", "adhesive"),
+    measured_item("flat_shoe", "waist", "flat_shoe_waist_result", "adhesive"),
+    measured_item("high_heel", "toe", "high_heel_toe_result", "adhesive"),
+    measured_item("high_heel", "forepart", "high_heel_forepart_result", "adhesive"),
+    measured_item("high_heel", "waist", "high_heel_waist_result", "adhesive"),
+    measured_item("high_heel", "heel", "high_heel_heel_result", "heel_pull"),
+    measured_item("components", "buckle", "buckle_result", "buckle"),
+    measured_item("components", "strap", "strap_result", "strap"),
+    measured_item("components", "eyelet", "eyelet_result", "eyelet"),
+    measured_item("components", "studs", "studs_result", "studs"),
+    measured_item("components", "diamond_bow", "diamond_result", "diamond_bow"),
+    measured_item("components", "top_lift", "top_lift_result", "top_lift"),
+    measured_item("components", "loop", "loop_result", "loop"),
+    measured_item("components", "toe_post", "toe_post_result", "toe_post"),
+    measured_item("components", "zipper", "zipper_result", "zipper"),
+    measured_item("components", "perment_set", "perment_set_result", "perment_set"),
+    measured_item("flexing", "upper", "upper_flex_result", "upper"),
+    measured_item("flexing", "shoe_flex", "shoe_flex_result", "shoe_flex"),
+    measured_item("flexing", "foxing", "foxing_result", "foxing"),
+    measured_item("abrasion", "outsole_abrasion", "outsole_abrasion_result", "outsole_abrasion"),
+    measured_item("resistance", "heel_fatigue", "heel_fatigue_result", "heel_fatigue"),
+]
+
+# Items read on instruments without a numeric standard; their readings are
+# kept with the report but the result stays with the tester
+RECORDED_ITEMS = [
+    {**measured_item("hardness", "eva_hardness", "eva_hardness_result", None), "unit": "Shore A"},
+    {**measured_item("hardness", "outsole_hardness", "outsole_hardness_result", None), "unit": "Shore A"},
+]
+
+def measurement_key(result_key):
+    """Session state key of the specimen readings (a float array) behind a
+    result key"""
+    return result_key[:-len("_result")] + "_readings"
+
+def readings_text_key(result_key):
+    """Widget key of the readings as typed, e.g. "212 208 230" """
+    return result_key[:-len("_result")] + "_readings_text"
+
+def variant_key(result_key):
+    """Session state key of the chosen material/height variant"""
+    return result_key[:-len("_result")] + "_variant"
+
+def measured_section(section):
+    """MEASURED_ITEMS of one section, in display order"""
+    return [item for item in MEASURED_ITEMS if item["section"] == section]
+
+def recorded_section(section):
+    """RECORDED_ITEMS of one section, in display order"""
+    return [item for item in RECORDED_ITEMS if item["section"] == section]
+
+# Measurements and variants travel with the report like any other field
+for item in MEASURED_ITEMS:
+    REPORT_FIELDS.append(measurement_key(item["result"]))
+    REPORT_FIELDS.append(variant_key(item["result"]))
+for item in RECORDED_ITEMS:
+    REPORT_FIELDS.append(measurement_key(item["result"]))
+
+# Decimated tester curves, {result_key: [{"specimen", "x", "y"}]}
+REPORT_FIELDS.append("tester_curves")
+
+def collect_report_data(state):
+    """Copy the report fields out of session state into a plain dict"""
+    return {key: state.get(key, '') for key in REPORT_FIELDS}
+
+def field_token(value):
+    """Hashable stand-in for a field value; str() of a long array elides
+    the middle, so arrays are taken by their bytes"""
+    if hasattr(value, "tobytes"):
+        return value.tobytes().hex()
+    return str(value)
+
+def report_fingerprint(data, *variant):
+    """Stable short hash of the report fields plus render options"""
+    content = repr((sorted((key, field_token(value)) for key, value in data.items()), variant))
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()[:12]
+
+def report_basename(data, selected_city, *variant, deterministic=False):
+    """Download filename without extension; reproducible reports are named
+    by content instead of the wall clock"""
+    prefix = f"Physical_Test_Report_{data.get('ci_no', '')}_{selected_city}"
+    if deterministic:
+        return f"{prefix}_{report_fingerprint(data, selected_city, *variant)}"
+    return f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+def sample_report_data():
+    """Throwaway report used to warm up the PDF renderer"""
+    data = {key: "Pass" if key.endswith("_result") else "" for key in REPORT_FIELDS}
+    data.update({
+        "report_no": "PTR-WARMUP",
+        "ci_no": "CI-WARMUP",
+        "style_no": "WARMUP",
+        "order_qty": 1000,
+        "produced_qty": 1000,
+        "test_date": date(2024, 1, 1),
+        "pass_result": "All items",
+    })
+    return data
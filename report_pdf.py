@@ -0,0 +1,1263 @@
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.lib.utils import ImageReader
+from reportlab.graphics.shapes import Drawing, String
+from reportlab.graphics.charts.lineplots import LinePlot
+from PIL import Image
+from collections import OrderedDict
+from functools import lru_cache
+from xml.sax.saxutils import escape
+import hashlib
+import io
+import os
+import re
+import threading
+import time
+
+from report_data import (
+    CHINESE_CITIES, MEASURED_ITEMS, RECORDED_ITEMS, field_token, get_pdf_text, get_location_display, china_now,
+    measurement_key, report_clock, sample_report_data, variant_key
+)
+from evaluation import reading_stats
+from standards import OPERATORS, StandardsError, get_standards, number_text
+
+# PDF languages that need a Chinese font ("bi" is the bilingual edition)
+CHINESE_FONT_LANGUAGES = ("zh", "bi")
+
+# Company logo drawn at the top of every page, skipped if the file is missing
+LOGO_PATH = os.getenv("PTR_LOGO_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "logo.png"))
+
+# Height of the logo on the first page, the largest it is drawn
+LOGO_HEIGHT = 0.5*inch
+
+@lru_cache(maxsize=4)
+def load_logo(path, dpi=None):
+    """Decoded logo image, read once per process; with a dpi it is
+    downsampled to that resolution at the size it is drawn"""
+    if not path or not os.path.exists(path):
+        return None
+    if dpi is None:
+        return ImageReader(path)
+    with Image.open(path) as image:
+        height = round(LOGO_HEIGHT / inch * dpi)
+        if image.height <= height:
+            return ImageReader(path)
+        image = image.resize((max(1, round(image.width * height / image.height)), height), Image.LANCZOS)
+    return ImageReader(image)
+
+# Enhanced PDF Generation with Headers and Footers
+class PDFWithHeaderFooter(SimpleDocTemplate):
+    def __init__(self, *args, **kwargs):
+        self.pdf_language = kwargs.pop('pdf_language', 'en')
+        self.selected_city = kwargs.pop('selected_city', '')
+        self.chinese_city = kwargs.pop('chinese_city', '')
+        self.chinese_font = kwargs.pop('chinese_font', 'Helvetica')
+        self.logo = load_logo(kwargs.pop('logo_path', LOGO_PATH), kwargs.pop('logo_dpi', None))
+        self.clock = kwargs.pop('clock', china_now)
+        super().__init__(*args, **kwargs)
+    
+    def chrome_font(self, bold=False):
+        if self.pdf_language in CHINESE_FONT_LANGUAGES:
+            return self.chinese_font
+        return 'Helvetica-Bold' if bold else 'Helvetica'
+    
+    def draw_logo(self, x, y, height):
+        width = height * self.logo.getSize()[0] / self.logo.getSize()[1]
+        self.canv.drawImage(self.logo, x, y, width=width, height=height, mask='auto')
+    
+    def define_page_forms(self):
+        """Draw the static page chrome once per document as form XObjects"""
+        canv = self.canv
+        page_width, page_height = self.pagesize
+        
+        # Green header band with title (and logo) for pages after the first
+        canv.beginForm("pageHeader")
+        canv.setFillColor(colors.HexColor('#10b981'))
+        canv.rect(0, page_height - 0.6*inch, page_width, 0.6*inch, fill=1, stroke=0)
+        canv.setFont(self.chrome_font(bold=True), 12)
+        canv.setFillColor(colors.white)
+        canv.drawCentredString(page_width/2.0, page_height - 0.4*inch, "GRAND STEP PHYSICAL TEST REPORT")
+        if self.logo:
+            self.draw_logo(0.5*inch, page_height - 0.5*inch, 0.4*inch)
+        canv.endForm()
+        
+        # Logo alone in the top margin of the first page
+        if self.logo:
+            canv.beginForm("pageLogo")
+            self.draw_logo(0.5*inch, page_height - 0.7*inch, LOGO_HEIGHT)
+            canv.endForm()
+        
+        # Footer panel, rule and location
+        canv.beginForm("pageFooter")
+        canv.setFillColor(colors.HexColor('#f8f9fa'))
+        canv.rect(0, 0, page_width, 0.7*inch, fill=1, stroke=0)
+        canv.setStrokeColor(colors.HexColor('#10b981'))
+        canv.setLineWidth(1)
+        canv.line(0, 0.7*inch, page_width, 0.7*inch)
+        canv.setFont(self.chrome_font(), 8)
+        canv.setFillColor(colors.HexColor('#666666'))
+        location_display = get_location_display(self.selected_city, self.pdf_language)
+        location_info = f"{get_pdf_text('test_location', self.pdf_language)} {location_display}"
+        canv.drawString(0.5*inch, 0.25*inch, location_info)
+        canv.endForm()
+    
+    def afterPage(self):
+        """Add header and footer once per finished page"""
+        if not self.canv.hasForm("pageFooter"):
+            self.define_page_forms()
+        
+        # Add header on all pages except first
+        if self.page > 1:
+            self.canv.doForm("pageHeader")
+        elif self.logo:
+            self.canv.doForm("pageLogo")
+        
+        # Footer on all pages; only the timestamp and page number change
+        self.canv.doForm("pageFooter")
+        
+        self.canv.saveState()
+        self.canv.setFont(self.chrome_font(), 8)
+        self.canv.setFillColor(colors.HexColor('#666666'))
+        
+        current_time = self.clock()
+        timestamp = f"{get_pdf_text('report_date', self.pdf_language).replace(':', '')} {current_time.strftime('%Y-%m-%d %H:%M:%S')}"
+        self.canv.drawCentredString(self.pagesize[0]/2.0, 0.25*inch, timestamp)
+        
+        page_num = f"Page {self.page}"
+        self.canv.drawRightString(self.pagesize[0] - 0.5*inch, 0.25*inch, page_num)
+        
+        self.canv.restoreState()
+
+# CJK characters can break anywhere, Latin text only between words
+WRAP_TOKEN = re.compile(r"[\u2e80-\u9fff\uf900-\ufaff\uff00-\uffef]|[^\s\u2e80-\u9fff\uf900-\ufaff\uff00-\uffef]+")
+
+# Smallest font size a cell may shrink to before wrapping at that size
+MIN_CELL_FONT_SIZE = 5.5
+
+@lru_cache(maxsize=65536)
+def string_width(text, font_name, font_size):
+    """Memoized pdfmetrics.stringWidth"""
+    return pdfmetrics.stringWidth(text, font_name, font_size)
+
+def count_lines(text, font_name, font_size, width):
+    """Lines a greedy word wrap needs, None if a single token overflows"""
+    space = string_width(" ", font_name, font_size)
+    lines = 1
+    line_width = 0
+    previous_end = 0
+    for match in WRAP_TOKEN.finditer(text):
+        token_width = string_width(match.group(), font_name, font_size)
+        if token_width > width:
+            return None
+        gap = space if line_width and match.start() > previous_end else 0
+        if line_width + gap + token_width > width:
+            lines += 1
+            line_width = token_width
+        else:
+            line_width += gap + token_width
+        previous_end = match.end()
+    return lines
+
+def fit_text(text, font_name, font_size, width, max_lines=2):
+    """Fit text into a cell of the given width, returns (text, font_size)
+    
+    Shrinks to one line first, then wraps, and only truncates when the
+    text does not fit in max_lines at the smallest size.
+    """
+    text = " ".join(str(text).split()) if text else ""
+    if not text or string_width(text, font_name, font_size) <= width:
+        return text, font_size
+    
+    # Shrink, but not below 80% of the design size, to stay on one line
+    size = font_size
+    while size - 0.5 >= max(MIN_CELL_FONT_SIZE, font_size * 0.8):
+        size -= 0.5
+        if string_width(text, font_name, size) <= width:
+            return text, size
+    
+    # Wrap at the design size, then at the smallest size
+    for size in (font_size, MIN_CELL_FONT_SIZE):
+        lines = count_lines(text, font_name, size, width)
+        if lines is not None and lines <= max_lines:
+            return text, size
+    
+    # Truncate to the longest prefix that still fits
+    size = min(font_size, MIN_CELL_FONT_SIZE)
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        lines = count_lines(text[:middle].rstrip() + "...", font_name, size, width)
+        if lines is not None and lines <= max_lines:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low].rstrip() + "...", size
+
+# Output profiles trade file size against fidelity. Page streams are always
+# compressed. "email" downsamples the logo to screen resolution, keeps the
+# Chinese font as a non-embedded CID font and enforces a size budget;
+# "archive" keeps the logo as it is and prefers an embedded TrueType font
+# (ReportLab always subsets TTF glyphs) so the PDF renders anywhere. Without
+# a logo file and a TrueType font installed both give the same file.
+OUTPUT_PROFILES = {
+    "email": {
+        "logo_dpi": int(os.getenv("PTR_EMAIL_LOGO_DPI", "150")),
+        "embed_chinese_font": False,
+        "size_budget": int(os.getenv("PTR_EMAIL_SIZE_BUDGET_KB", "300")) * 1024,
+    },
+    "archive": {
+        "logo_dpi": None,
+        "embed_chinese_font": True,
+        "size_budget": None,
+    },
+}
+
+def register_cid_font():
+    """Built-in Adobe CID font, referenced but never embedded"""
+    try:
+        pdfmetrics.registerFont(UnicodeCIDFont('STSong-Light'))
+        return 'STSong-Light'
+    except Exception:
+        return None
+
+def register_ttf_font():
+    """System TrueType font, embedded as a glyph subset"""
+    for name, filename in (('SimSun', 'simsun.ttc'), ('YaHei', 'msyh.ttc')):
+        try:
+            pdfmetrics.registerFont(TTFont(name, filename))
+            return name
+        except Exception:
+            continue
+    return None
+
+@lru_cache(maxsize=None)
+def register_chinese_font(embed=False):
+    """Register the first available Chinese font once per process"""
+    order = (register_ttf_font, register_cid_font) if embed else (register_cid_font, register_ttf_font)
+    for register in order:
+        font_name = register()
+        if font_name:
+            return font_name
+    return 'Helvetica'
+
+def pdf_size_info(pdf, profile="email"):
+    """Rendered size in bytes, the profile's budget and whether it fits"""
+    size = pdf.getbuffer().nbytes if hasattr(pdf, "getbuffer") else len(pdf)
+    budget = OUTPUT_PROFILES[profile]["size_budget"]
+    return size, budget, budget is None or size <= budget
+
+# Report fields read by each PDF section, which make up its cache key
+SECTION_FIELDS = {
+    "basic_info": [
+        "report_no", "ci_no", "order_qty", "style_no", "brand",
+        "produced_qty", "factory", "sales", "test_date"
+    ],
+    "adhesive": [
+        "flat_shoe_toe_result", "flat_shoe_forepart_result",
+        "flat_shoe_waist_result", "flat_shoe_heel_result"
+    ],
+    "components": [
+        f"{item}_{field}"
+        for item in ("buckle", "strap", "eyelet", "studs", "diamond",
+                     "top_lift", "loop", "toe_post", "zipper", "perment_set")
+        for field in ("result", "comments")
+    ] + ["rust_buckle_result", "rust_strap_result", "rust_eyelet_result", "rust_studs_result"],
+    "flexing": [
+        "upper_flex_result", "upper_flex_comments", "shoe_flex_result",
+        "shoe_flex_comments", "foxing_result", "foxing_comments"
+    ],
+    "abrasion": [
+        "top_lift_abrasion_result", "top_lift_abrasion_comments",
+        "outsole_abrasion_result", "outsole_abrasion_comments"
+    ],
+    "resistance": [
+        "outsole_resistance_result", "outsole_resistance_comments",
+        "heel_fatigue_result", "heel_fatigue_comments"
+    ],
+    "hardness": [
+        "eva_hardness_result", "eva_hardness_comments",
+        "outsole_hardness_result", "outsole_hardness_comments"
+    ],
+    "conclusion": [
+        "pass_result", "fail_result", "accept_result", "verified_by", "testing_person"
+    ],
+}
+
+# Both adhesive groups print in the adhesive section
+PDF_SECTIONS = {"flat_shoe": "adhesive", "high_heel": "adhesive"}
+
+def pdf_section(item):
+    return PDF_SECTIONS.get(item["section"], item["section"])
+
+# Specimen readings and variants feed the statistics row under each section
+for item in MEASURED_ITEMS:
+    SECTION_FIELDS[pdf_section(item)].extend([measurement_key(item["result"]), variant_key(item["result"])])
+SECTION_FIELDS["adhesive"].append("tester_curves")
+for item in RECORDED_ITEMS:
+    SECTION_FIELDS[pdf_section(item)].append(measurement_key(item["result"]))
+
+# Specimen colours of tester curves, repeated past the fifth specimen
+CURVE_COLORS = [colors.HexColor(c) for c in ('#059669', '#2563eb', '#dc2626', '#d97706', '#7c3aed')]
+
+def curve_drawing(curves, title, x_label, y_label, font_name, width=2.3*inch, height=1.6*inch):
+    """Vector line plot of one item's decimated specimen curves"""
+    drawing = Drawing(width, height)
+    plot = LinePlot()
+    plot.x, plot.y = 28, 20
+    plot.width, plot.height = width - 36, height - 42
+    plot.data = [list(zip(curve["x"], curve["y"])) for curve in curves]
+    for i in range(len(curves)):
+        plot.lines[i].strokeColor = CURVE_COLORS[i % len(CURVE_COLORS)]
+        plot.lines[i].strokeWidth = 0.6
+    for axis in (plot.xValueAxis, plot.yValueAxis):
+        axis.labels.fontName = font_name
+        axis.labels.fontSize = 5
+        axis.strokeWidth = 0.5
+    plot.xValueAxis.valueMin = 0
+    plot.yValueAxis.valueMin = 0
+    drawing.add(plot)
+    drawing.add(String(width / 2, height - 9, title, textAnchor='middle', fontName=font_name, fontSize=7))
+    drawing.add(String(plot.x, height - 19, y_label, fontName=font_name, fontSize=5))
+    drawing.add(String(plot.x + plot.width, 2, x_label, textAnchor='end', fontName=font_name, fontSize=5))
+    return drawing
+
+# Flowables of recently built sections, most recently used last
+SECTION_CACHE_SIZE = int(os.getenv("PTR_SECTION_CACHE_SIZE", "256"))
+section_cache = OrderedDict()
+section_cache_lock = threading.Lock()
+
+# Cached flowables keep layout state between builds, so builds that may
+# share them must not overlap
+build_lock = threading.Lock()
+
+class CachedTable(Table):
+    """Table that keeps its measured layout when wrapped again at the same width"""
+    def wrap(self, availWidth, availHeight):
+        if getattr(self, '_wrapped_width', None) != availWidth:
+            super().wrap(availWidth, availHeight)
+            self._wrapped_width = availWidth
+        return (self._width, self._height)
+
+def cached_section(name, layout, inputs, build):
+    """Return the section's flowables, building them only on a cache miss"""
+    digest = hashlib.sha1(repr(inputs).encode("utf-8")).hexdigest()
+    key = (name, layout, digest)
+    with section_cache_lock:
+        if key in section_cache:
+            section_cache.move_to_end(key)
+            return section_cache[key]
+    
+    flowables = build()
+    with section_cache_lock:
+        section_cache[key] = flowables
+        while len(section_cache) > SECTION_CACHE_SIZE:
+            section_cache.popitem(last=False)
+    return flowables
+
+def generate_pdf(data, pdf_lang="en", selected_city="Shanghai", profile="email", deterministic=False, clock=None):
+    """Generate PDF report from a dict of report fields; deterministic=True
+    gives byte-identical output for identical inputs"""
+    buffer = io.BytesIO()
+    output = OUTPUT_PROFILES[profile]
+    
+    # Reproducible reports take their time from the report, not the wall clock
+    if clock is None:
+        clock = report_clock(data) if deterministic else china_now
+    
+    # Limits and standard texts of the report's customer/lab profile
+    standards = get_standards(data.get("standard_profile"))
+    
+    # Get location info
+    chinese_city = CHINESE_CITIES[selected_city]
+    
+    # Register Chinese font if needed
+    chinese_font = register_chinese_font(output["embed_chinese_font"]) if pdf_lang in CHINESE_FONT_LANGUAGES else 'Helvetica'
+    
+    # Create PDF with proper margins
+    doc = PDFWithHeaderFooter(
+        buffer, 
+        pagesize=A4,
+        topMargin=0.8*inch,
+        bottomMargin=0.8*inch,
+        leftMargin=0.5*inch,
+        rightMargin=0.5*inch,
+        pdf_language=pdf_lang,
+        selected_city=selected_city,
+        chinese_city=chinese_city,
+        chinese_font=chinese_font,
+        clock=clock,
+        logo_dpi=output["logo_dpi"],
+        pageCompression=1,
+        # Fixed creation date and document ID in deterministic mode
+        invariant=1 if deterministic else None,
+        title=f"Physical Test Report {data.get('report_no', '')}".strip(),
+        author="Grand Step",
+        creator="Physical Test Report System",
+        subject=f"{data.get('ci_no', '')} {data.get('style_no', '')}".strip()
+    )
+    
+    elements = []
+    styles = getSampleStyleSheet()
+    
+    # Create styles
+    title_font = 'Helvetica-Bold' if pdf_lang not in CHINESE_FONT_LANGUAGES else chinese_font
+    normal_font = 'Helvetica' if pdf_lang not in CHINESE_FONT_LANGUAGES else chinese_font
+    bold_font = 'Helvetica-Bold' if pdf_lang not in CHINESE_FONT_LANGUAGES else chinese_font
+    
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=22,
+        textColor=colors.HexColor('#10b981'),
+        spaceAfter=10,
+        alignment=TA_CENTER,
+        fontName=bold_font,
+        underlineWidth=1,
+        underlineColor=colors.HexColor('#059669'),
+        underlineOffset=-3
+    )
+    
+    company_style = ParagraphStyle(
+        'CompanyStyle',
+        parent=styles['Heading1'],
+        fontSize=16,
+        textColor=colors.HexColor('#333333'),
+        spaceAfter=5,
+        alignment=TA_CENTER,
+        fontName=bold_font
+    )
+    
+    subtitle_style = ParagraphStyle(
+        'CustomSubtitle',
+        parent=styles['Normal'],
+        fontSize=11,
+        textColor=colors.HexColor('#059669'),
+        alignment=TA_CENTER,
+        spaceAfter=20,
+        fontName=bold_font
+    )
+    
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=14,
+        textColor=colors.white,
+        spaceAfter=8,
+        spaceBefore=12,
+        fontName=bold_font,
+        borderPadding=6,
+        borderColor=colors.HexColor('#10b981'),
+        borderWidth=1,
+        borderRadius=4,
+        backColor=colors.HexColor('#10b981'),
+        alignment=TA_LEFT
+    )
+    
+    subheading_style = ParagraphStyle(
+        'CustomSubheading',
+        parent=styles['Heading3'],
+        fontSize=12,
+        textColor=colors.HexColor('#2c3e50'),
+        spaceAfter=6,
+        fontName=bold_font,
+        alignment=TA_LEFT
+    )
+    
+    normal_style = ParagraphStyle(
+        'NormalStyle',
+        parent=styles['Normal'],
+        fontSize=9,
+        leading=12,
+        fontName=normal_font
+    )
+    
+    bold_style = ParagraphStyle(
+        'BoldStyle',
+        parent=styles['Normal'],
+        fontSize=9,
+        leading=12,
+        fontName=bold_font,
+        textColor=colors.HexColor('#2c3e50')
+    )
+    
+    small_style = ParagraphStyle(
+        'SmallStyle',
+        parent=styles['Normal'],
+        fontSize=8,
+        leading=10,
+        fontName=normal_font
+    )
+    
+    # CJK text has no spaces, so let it break between characters
+    if pdf_lang in CHINESE_FONT_LANGUAGES and chinese_font != 'Helvetica':
+        for style in (normal_style, bold_style, small_style):
+            style.wordWrap = 'CJK'
+    
+    sized_styles = {}
+    
+    def sized_style(style, font_size):
+        """Copy of a style at another font size, with matching leading"""
+        key = (style.name, font_size)
+        if key not in sized_styles:
+            sized_styles[key] = ParagraphStyle(
+                f"{style.name}_{font_size}",
+                parent=style,
+                fontSize=font_size,
+                leading=style.leading * font_size / style.fontSize
+            )
+        return sized_styles[key]
+    
+    # Helper function to create paragraphs with proper font and text wrapping
+    def create_paragraph(text, bold=False, style=None, small=False, width=None, max_lines=2):
+        if style is None:
+            if small:
+                style = small_style
+            else:
+                style = bold_style if bold else normal_style
+        
+        text = "" if text is None else str(text)
+        
+        # Measure against the real cell width instead of cutting at a character count
+        if width is not None:
+            text, font_size = fit_text(text, style.fontName, style.fontSize, width, max_lines)
+            if font_size != style.fontSize:
+                style = sized_style(style, font_size)
+        
+        return Paragraph(escape(text), style)
+    
+    def standard_text(item, names=True):
+        """Display text of a standards item in the report language"""
+        return standards.text(item, pdf_lang, names)
+    
+    def stat_text(value):
+        return number_text(round(value, 2))
+    
+    def build_specimen_stats(section):
+        """Compact n/min/mean/max/SD table of the section's measured items,
+        empty when none has readings"""
+        rows = []
+        for item in MEASURED_ITEMS + RECORDED_ITEMS:
+            if pdf_section(item) != section:
+                continue
+            stats = reading_stats(data.get(measurement_key(item["result"])))
+            if stats is None:
+                continue
+            label = get_pdf_text(item["label"], pdf_lang)
+            if section != item["section"]:
+                label = f"{get_pdf_text(item['section'], pdf_lang)} {label}"
+            if item["standard"] is None:
+                # Recorded only, the result was picked by the tester
+                judged_on = item["unit"]
+            else:
+                variant = data.get(variant_key(item["result"])) or None
+                try:
+                    item_limits = standards.limit(item["standard"], variant)
+                except StandardsError:
+                    item_limits = None
+                if item_limits is None:
+                    continue
+                judged_on = f"{get_pdf_text('stat_' + item_limits['statistic'], pdf_lang)} {OPERATORS[item_limits['op']]} {number_text(item_limits['limit'])} {item_limits['unit']}"
+                # Criteria without readings are listed with their mark
+                judged_on = "; ".join([judged_on, *standards.manual_checks(item["standard"], variant, pdf_lang)])
+            rows.append([
+                create_cell(label, small=True),
+                create_cell(str(stats["n"]), small=True),
+                create_cell(stat_text(stats["min"]), small=True),
+                create_cell(stat_text(stats["mean"]), small=True),
+                create_cell(stat_text(stats["max"]), small=True),
+                create_cell(stat_text(stats["std"]), small=True),
+                create_cell(judged_on, small=True),
+                create_cell(data.get(item["result"], ''), small=True)
+            ])
+        if not rows:
+            return []
+        
+        header = [
+            create_cell(get_pdf_text(key, pdf_lang), bold=True, small=True)
+            for key in ("item", "specimens", "stat_min", "stat_mean", "stat_max", "stat_std", "judged_on", "result")
+        ]
+        stats_widths = [1.6*inch, 0.5*inch, 0.7*inch, 0.7*inch, 0.7*inch, 0.6*inch, 1.6*inch, 0.8*inch]
+        stats_table = CachedTable(fit_cells([header] + rows, stats_widths), colWidths=stats_widths)
+        stats_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f0f0f0')),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTSIZE', (0, 0), (-1, -1), 7),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e0e0e0')),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]))
+        return [Spacer(1, 4), Paragraph(get_pdf_text("specimen_stats", pdf_lang), small_style), stats_table]
+    
+    def build_curves(section, per_row=3):
+        """Force-displacement plots of the section's items that were imported
+        from tester files, empty when there are none"""
+        curves = data.get("tester_curves") or {}
+        font_name = chinese_font if pdf_lang in CHINESE_FONT_LANGUAGES else 'Helvetica'
+        drawings = []
+        for item in MEASURED_ITEMS:
+            if pdf_section(item) != section or not curves.get(item["result"]):
+                continue
+            title = get_pdf_text(item["label"], pdf_lang)
+            if section != item["section"]:
+                title = f"{get_pdf_text(item['section'], pdf_lang)} {title}"
+            drawings.append(curve_drawing(
+                curves[item["result"]], title, get_pdf_text("displacement_mm", pdf_lang),
+                get_pdf_text("force_n", pdf_lang), font_name
+            ))
+        if not drawings:
+            return []
+        
+        rows = [drawings[i:i + per_row] for i in range(0, len(drawings), per_row)]
+        rows[-1] += [""] * (per_row - len(rows[-1]))
+        curves_table = CachedTable(rows, colWidths=[2.4*inch] * per_row)
+        curves_table.setStyle(TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]))
+        return [Spacer(1, 6), Paragraph(get_pdf_text("force_curves", pdf_lang), small_style), curves_table]
+    
+    # Table cells are described first and fitted once the column widths are known
+    def create_cell(text, bold=False, small=False, max_lines=2):
+        return (text, bold, small, max_lines)
+    
+    def fit_cells(rows, col_widths, padding=12):
+        return [
+            [
+                create_paragraph(text, bold=bold, small=small, width=col_width - padding, max_lines=max_lines)
+                for (text, bold, small, max_lines), col_width in zip(row, col_widths)
+            ]
+            for row in rows
+        ]
+    
+    # Location and date
+    current_time = clock()
+    
+    # Get location display based on language
+    location_display = get_location_display(selected_city, pdf_lang)
+    location_text = f"{get_pdf_text('test_location', pdf_lang)} {location_display}"
+    date_text = f"{get_pdf_text('report_date', pdf_lang)} {current_time.strftime('%Y-%m-%d')}"
+    
+    def build_basic_info():
+        elements = []
+        
+        # Get values from session state
+        report_no = data.get('report_no', '')
+        ci_no = data.get('ci_no', '')
+        order_qty = data.get('order_qty', '')
+        style_no = data.get('style_no', '')
+        brand = data.get('brand', '')
+        produced_qty = data.get('produced_qty', '')
+        factory = data.get('factory', '')
+        sales = data.get('sales', '')
+        test_date = data.get('test_date') or current_time
+        
+        # Company Header
+        elements.append(Spacer(1, 10))
+        elements.append(Paragraph(get_pdf_text("company", pdf_lang), company_style))
+        
+        # Title
+        elements.append(Paragraph(get_pdf_text("title", pdf_lang), title_style))
+        
+        # Location and date
+        elements.append(Paragraph(location_text, subtitle_style))
+        elements.append(Paragraph(date_text, subtitle_style))
+        
+        elements.append(Paragraph("<hr width='80%' color='#10b981'/>", normal_style))
+        elements.append(Spacer(1, 15))
+        
+        # 1. Basic Information Table
+        elements.append(Paragraph(get_pdf_text("basic_info", pdf_lang), heading_style))
+        elements.append(Spacer(1, 5))
+        
+        basic_data = [
+            [
+                create_cell(get_pdf_text("report_no", pdf_lang), bold=True), 
+                create_cell(report_no), 
+                create_cell(get_pdf_text("date_no", pdf_lang), bold=True), 
+                create_cell(test_date.strftime('%Y-%m-%d') if hasattr(test_date, 'strftime') else str(test_date))
+            ],
+            [
+                create_cell(get_pdf_text("ci_no", pdf_lang), bold=True), 
+                create_cell(ci_no), 
+                create_cell(get_pdf_text("order_qty", pdf_lang), bold=True), 
+                create_cell(str(order_qty))
+            ],
+            [
+                create_cell(get_pdf_text("brand", pdf_lang), bold=True), 
+                create_cell(brand), 
+                create_cell(get_pdf_text("produced_qty", pdf_lang), bold=True), 
+                create_cell(str(produced_qty))
+            ],
+            [
+                create_cell(get_pdf_text("style_no", pdf_lang), bold=True), 
+                create_cell(style_no), 
+                create_cell(get_pdf_text("factory_trader", pdf_lang), bold=True), 
+                create_cell(factory)
+            ],
+            [
+                create_cell(get_pdf_text("sales", pdf_lang), bold=True), 
+                create_cell(sales), 
+                create_cell("", bold=True), 
+                create_cell("")
+            ]
+        ]
+        
+        basic_widths = [1.5*inch, 2.0*inch, 1.5*inch, 2.0*inch]
+        basic_table = CachedTable(fit_cells(basic_data, basic_widths, padding=16), colWidths=basic_widths)
+        basic_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f0fdf4')),
+            ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#f0fdf4')),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), bold_font),
+            ('FONTNAME', (2, 0), (2, -1), bold_font),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#d4d4d4')),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 8),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+            ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')])
+        ]))
+        elements.append(basic_table)
+        elements.append(Spacer(1, 15))
+        
+        # Standard note, and the customer or lab standard the limits come from
+        elements.append(Paragraph(get_pdf_text("standard_note", pdf_lang), small_style))
+        if standards.profile:
+            elements.append(Paragraph(f"{get_pdf_text('standard_applied', pdf_lang)} {escape(standards.name)}", small_style))
+        elements.append(Spacer(1, 10))
+        
+        return elements
+        
+    def build_adhesive():
+        elements = []
+        
+        # 2. Adhesive/Pull Test
+        elements.append(PageBreak())
+        
+        elements.append(Paragraph(get_pdf_text("adhesive_test", pdf_lang), heading_style))
+        elements.append(Spacer(1, 5))
+        
+        # Get adhesive test values
+        flat_shoe_toe_result = data.get('flat_shoe_toe_result', '')
+        flat_shoe_forepart_result = data.get('flat_shoe_forepart_result', '')
+        flat_shoe_waist_result = data.get('flat_shoe_waist_result', '')
+        flat_shoe_heel_result = data.get('flat_shoe_heel_result', '')
+        
+        adhesive_data = [
+            [
+                create_cell(get_pdf_text("flat_shoe", pdf_lang), bold=True, small=True),
+                create_cell(get_pdf_text("standard", pdf_lang), bold=True, small=True),
+                create_cell(get_pdf_text("result", pdf_lang), bold=True, small=True),
+                create_cell(get_pdf_text("high_heel", pdf_lang), bold=True, small=True),
+                create_cell(get_pdf_text("sole_wedge", pdf_lang), bold=True, small=True),
+                create_cell(get_pdf_text("standard", pdf_lang), bold=True, small=True),
+                create_cell(get_pdf_text("remark", pdf_lang), bold=True, small=True)
+            ],
+            [
+                create_cell(get_pdf_text("toe", pdf_lang), small=True),
+                create_cell(standard_text("adhesive"), small=True),
+                create_cell(flat_shoe_toe_result, small=True),
+                create_cell(get_pdf_text("toe", pdf_lang), small=True),
+                create_cell("", small=True),
+                create_cell(standard_text("adhesive"), small=True),
+                create_cell("", small=True)
+            ],
+            [
+                create_cell(get_pdf_text("forepart", pdf_lang), small=True),
+                create_cell(standard_text("adhesive"), small=True),
+                create_cell(flat_shoe_forepart_result, small=True),
+                create_cell(get_pdf_text("forepart", pdf_lang), small=True),
+                create_cell("", small=True),
+                create_cell(standard_text("adhesive"), small=True),
+                create_cell("", small=True)
+            ],
+            [
+                create_cell(get_pdf_text("waist", pdf_lang), small=True),
+                create_cell(standard_text("adhesive"), small=True),
+                create_cell(flat_shoe_waist_result, small=True),
+                create_cell(get_pdf_text("waist", pdf_lang), small=True),
+                create_cell("", small=True),
+                create_cell(standard_text("adhesive"), small=True),
+                create_cell("", small=True)
+            ],
+            [
+                create_cell(get_pdf_text("heel", pdf_lang), small=True),
+                create_cell("", small=True),
+                create_cell(flat_shoe_heel_result, small=True),
+                create_cell(get_pdf_text("heel", pdf_lang), small=True),
+                create_cell(standard_text("heel_pull", names=False), small=True),
+                create_cell(f"{get_pdf_text('heel_height', pdf_lang)} {get_pdf_text('cm_5_8', pdf_lang)} / {get_pdf_text('above_8cm', pdf_lang)}", small=True),
+                create_cell("", small=True)
+            ]
+        ]
+        
+        adhesive_widths = [0.8*inch, 1.0*inch, 0.7*inch, 0.8*inch, 1.3*inch, 1.3*inch, 1.0*inch]
+        adhesive_table = CachedTable(fit_cells(adhesive_data, adhesive_widths), colWidths=adhesive_widths)
+        adhesive_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#059669')),
+            ('BACKGROUND', (3, 0), (-1, 0), colors.HexColor('#059669')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), bold_font),
+            ('FONTSIZE', (0, 0), (-1, -1), 7),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e0e0e0')),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')])
+        ]))
+        elements.append(adhesive_table)
+        elements.extend(build_specimen_stats("adhesive"))
+        elements.extend(build_curves("adhesive"))
+        elements.append(Spacer(1, 15))
+        
+        return elements
+        
+    def build_components():
+        elements = []
+        
+        # 3. Components Physical Test
+        elements.append(Paragraph(get_pdf_text("components_test", pdf_lang), heading_style))
+        elements.append(Spacer(1, 5))
+        
+        # Get components test values
+        components_data = [
+            [
+                create_cell(get_pdf_text("item", pdf_lang), bold=True, small=True),
+                create_cell(get_pdf_text("standard", pdf_lang), bold=True, small=True),
+                create_cell(get_pdf_text("result", pdf_lang), bold=True, small=True),
+                create_cell(get_pdf_text("comments", pdf_lang), bold=True, small=True),
+                create_cell(get_pdf_text("item", pdf_lang), bold=True, small=True),
+                create_cell(get_pdf_text("standard", pdf_lang), bold=True, small=True),
+                create_cell(get_pdf_text("result", pdf_lang), bold=True, small=True),
+                create_cell(get_pdf_text("comments", pdf_lang), bold=True, small=True)
+            ]
+        ]
+        
+        # Add component test rows using fixed texts
+        components_list = [
+            (get_pdf_text("buckle", pdf_lang), standard_text("buckle"), 
+             data.get('buckle_result', ''), 
+             data.get('buckle_comments', ''),
+             get_pdf_text("top_lift", pdf_lang), standard_text("top_lift"), 
+             data.get('top_lift_result', ''), 
+             data.get('top_lift_comments', '')),
+        
+            (get_pdf_text("strap", pdf_lang), standard_text("strap"), 
+             data.get('strap_result', ''), 
+             data.get('strap_comments', ''),
+             get_pdf_text("loop", pdf_lang), standard_text("loop"), 
+             data.get('loop_result', ''), 
+             data.get('loop_comments', '')),
+        
+            (get_pdf_text("eyelet", pdf_lang), standard_text("eyelet"), 
+             data.get('eyelet_result', ''), 
+             data.get('eyelet_comments', ''),
+             get_pdf_text("toe_post", pdf_lang), standard_text("toe_post"), 
+             data.get('toe_post_result', ''), 
+             data.get('toe_post_comments', '')),
+        
+            (get_pdf_text("studs", pdf_lang), standard_text("studs"), 
+             data.get('studs_result', ''), 
+             data.get('studs_comments', ''),
+             get_pdf_text("zipper", pdf_lang), standard_text("zipper"), 
+             data.get('zipper_result', ''), 
+             data.get('zipper_comments', '')),
+        
+            (get_pdf_text("diamond_bow", pdf_lang), standard_text("diamond_bow"), 
+             data.get('diamond_result', ''), 
+             data.get('diamond_comments', ''),
+             get_pdf_text("perment_set", pdf_lang), standard_text("perment_set"), 
+             data.get('perment_set_result', ''), 
+             data.get('perment_set_comments', ''))
+        ]
+        
+        for comp1, std1, res1, com1, comp2, std2, res2, com2 in components_list:
+            components_data.append([
+                create_cell(comp1, small=True),
+                create_cell(std1, small=True),
+                create_cell(res1, small=True),
+                create_cell(com1, small=True),
+                create_cell(comp2, small=True),
+                create_cell(std2, small=True),
+                create_cell(res2, small=True),
+                create_cell(com2, small=True)
+            ])
+        
+        components_widths = [0.8*inch, 0.9*inch, 0.6*inch, 0.9*inch, 0.8*inch, 0.9*inch, 0.6*inch, 0.9*inch]
+        components_table = CachedTable(fit_cells(components_data, components_widths), colWidths=components_widths)
+        components_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#059669')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), bold_font),
+            ('FONTSIZE', (0, 0), (-1, -1), 6.5),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e0e0e0')),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')])
+        ]))
+        elements.append(components_table)
+        elements.extend(build_specimen_stats("components"))
+        
+        # Rust Test
+        elements.append(Spacer(1, 10))
+        elements.append(Paragraph(get_pdf_text("rust_test_full", pdf_lang), subheading_style))
+        
+        rust_data = [
+            [
+                create_cell(get_pdf_text("buckle", pdf_lang)),
+                create_cell(data.get('rust_buckle_result', '')),
+                create_cell(get_pdf_text("eyelet", pdf_lang)),
+                create_cell(data.get('rust_eyelet_result', ''))
+            ],
+            [
+                create_cell(get_pdf_text("strap", pdf_lang)),
+                create_cell(data.get('rust_strap_result', '')),
+                create_cell(get_pdf_text("studs", pdf_lang)),
+                create_cell(data.get('rust_studs_result', ''))
+            ]
+        ]
+        
+        rust_widths = [1.5*inch, 1.5*inch, 1.5*inch, 1.5*inch]
+        rust_table = CachedTable(fit_cells(rust_data, rust_widths), colWidths=rust_widths)
+        rust_table.setStyle(TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e0e0e0')),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')])
+        ]))
+        elements.append(rust_table)
+        
+        elements.append(PageBreak())
+        
+        return elements
+        
+    def build_flexing():
+        elements = []
+        
+        # 4. Flexing Test
+        elements.append(Paragraph(get_pdf_text("flexing_test", pdf_lang), heading_style))
+        elements.append(Spacer(1, 5))
+        
+        # Get flexing test values
+        flexing_data = [
+            [
+                create_cell(get_pdf_text("item", pdf_lang), bold=True),
+                create_cell(get_pdf_text("standard", pdf_lang), bold=True),
+                create_cell(get_pdf_text("result", pdf_lang), bold=True),
+                create_cell(get_pdf_text("comments", pdf_lang), bold=True)
+            ],
+            [
+                create_cell(get_pdf_text("upper", pdf_lang)),
+                create_cell(standard_text("upper")),
+                create_cell(data.get('upper_flex_result', '')),
+                create_cell(data.get('upper_flex_comments', ''))
+            ],
+            [
+                create_cell(get_pdf_text("shoe_flex", pdf_lang)),
+                create_cell(standard_text("shoe_flex")),
+                create_cell(data.get('shoe_flex_result', '')),
+                create_cell(data.get('shoe_flex_comments', ''))
+            ],
+            [
+                create_cell(get_pdf_text("foxing", pdf_lang)),
+                create_cell(standard_text("foxing")),
+                create_cell(data.get('foxing_result', '')),
+                create_cell(data.get('foxing_comments', ''))
+            ]
+        ]
+        
+        flexing_widths = [1.8*inch, 2.0*inch, 1.2*inch, 2.2*inch]
+        flexing_table = CachedTable(fit_cells(flexing_data, flexing_widths), colWidths=flexing_widths)
+        flexing_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#059669')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), bold_font),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e0e0e0')),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')])
+        ]))
+        elements.append(flexing_table)
+        elements.extend(build_specimen_stats("flexing"))
+        
+        return elements
+        
+    def build_abrasion():
+        elements = []
+        
+        # 5. Abrasion Test
+        elements.append(Spacer(1, 15))
+        elements.append(Paragraph(get_pdf_text("abrasion_test", pdf_lang), heading_style))
+        elements.append(Spacer(1, 5))
+        
+        abrasion_data = [
+            [
+                create_cell(get_pdf_text("item", pdf_lang), bold=True),
+                create_cell(get_pdf_text("standard", pdf_lang), bold=True),
+                create_cell(get_pdf_text("result", pdf_lang), bold=True),
+                create_cell(get_pdf_text("comments", pdf_lang), bold=True)
+            ],
+            [
+                create_cell(get_pdf_text("top_lift_abrasion", pdf_lang)),
+                create_cell(""),
+                create_cell(data.get('top_lift_abrasion_result', '')),
+                create_cell(data.get('top_lift_abrasion_comments', ''))
+            ],
+            [
+                create_cell(get_pdf_text("outsole_abrasion", pdf_lang)),
+                create_cell(standard_text("outsole_abrasion"), small=True),
+                create_cell(data.get('outsole_abrasion_result', '')),
+                create_cell(data.get('outsole_abrasion_comments', ''))
+            ]
+        ]
+        
+        abrasion_widths = [1.8*inch, 3.0*inch, 1.2*inch, 2.2*inch]
+        abrasion_table = CachedTable(fit_cells(abrasion_data, abrasion_widths), colWidths=abrasion_widths)
+        abrasion_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#059669')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), bold_font),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e0e0e0')),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')])
+        ]))
+        elements.append(abrasion_table)
+        elements.extend(build_specimen_stats("abrasion"))
+        
+        return elements
+        
+    def build_resistance():
+        elements = []
+        
+        # 6. Resistance Test
+        elements.append(Spacer(1, 15))
+        elements.append(Paragraph(get_pdf_text("resistance_test", pdf_lang), heading_style))
+        elements.append(Spacer(1, 5))
+        
+        resistance_data = [
+            [
+                create_cell(get_pdf_text("item", pdf_lang), bold=True),
+                create_cell(get_pdf_text("standard", pdf_lang), bold=True),
+                create_cell(get_pdf_text("result", pdf_lang), bold=True),
+                create_cell(get_pdf_text("comments", pdf_lang), bold=True)
+            ],
+            [
+                create_cell(get_pdf_text("outsole_resistance", pdf_lang)),
+                create_cell(""),
+                create_cell(data.get('outsole_resistance_result', '')),
+                create_cell(data.get('outsole_resistance_comments', ''))
+            ],
+            [
+                create_cell(get_pdf_text("heel_fatigue", pdf_lang)),
+                create_cell(standard_text("heel_fatigue"), small=True),
+                create_cell(data.get('heel_fatigue_result', '')),
+                create_cell(data.get('heel_fatigue_comments', ''))
+            ]
+        ]
+        
+        resistance_widths = [1.8*inch, 3.0*inch, 1.2*inch, 2.2*inch]
+        resistance_table = CachedTable(fit_cells(resistance_data, resistance_widths), colWidths=resistance_widths)
+        resistance_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#059669')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), bold_font),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e0e0e0')),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')])
+        ]))
+        elements.append(resistance_table)
+        elements.extend(build_specimen_stats("resistance"))
+        
+        return elements
+        
+    def build_hardness():
+        elements = []
+        
+        # 7. Hardness Test
+        elements.append(Spacer(1, 15))
+        elements.append(Paragraph(get_pdf_text("hardness_test", pdf_lang), heading_style))
+        elements.append(Spacer(1, 5))
+        
+        hardness_data = [
+            [
+                create_cell(get_pdf_text("item", pdf_lang), bold=True),
+                create_cell(get_pdf_text("standard", pdf_lang), bold=True),
+                create_cell(get_pdf_text("result", pdf_lang), bold=True),
+                create_cell(get_pdf_text("comments", pdf_lang), bold=True)
+            ],
+            [
+                create_cell(get_pdf_text("eva_hardness", pdf_lang)),
+                create_cell(""),
+                create_cell(data.get('eva_hardness_result', '')),
+                create_cell(data.get('eva_hardness_comments', ''))
+            ],
+            [
+                create_cell(get_pdf_text("outsole_hardness", pdf_lang)),
+                create_cell(""),
+                create_cell(data.get('outsole_hardness_result', '')),
+                create_cell(data.get('outsole_hardness_comments', ''))
+            ]
+        ]
+        
+        hardness_widths = [1.8*inch, 3.0*inch, 1.2*inch, 2.2*inch]
+        hardness_table = CachedTable(fit_cells(hardness_data, hardness_widths), colWidths=hardness_widths)
+        hardness_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#059669')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), bold_font),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e0e0e0')),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')])
+        ]))
+        elements.append(hardness_table)
+        elements.extend(build_specimen_stats("hardness"))
+        
+        return elements
+        
+    def build_conclusion():
+        elements = []
+        
+        # 8. Conclusion - FIXED TO FIT WITHIN PAGE
+        elements.append(Spacer(1, 15))  # Reduced spacing
+        elements.append(Paragraph(get_pdf_text("conclusion", pdf_lang), heading_style))
+        elements.append(Spacer(1, 5))
+        
+        # Get conclusion values
+        pass_result = data.get('pass_result', '')
+        fail_result = data.get('fail_result', '')
+        accept_result = data.get('accept_result', '')
+        
+        conclusion_data = [
+            [
+                create_cell(get_pdf_text("pass_label", pdf_lang), bold=True),
+                create_cell(pass_result, small=True, max_lines=4),
+                create_cell(get_pdf_text("fail_label", pdf_lang), bold=True),
+                create_cell(fail_result, small=True, max_lines=4),
+                create_cell(get_pdf_text("accept_label", pdf_lang), bold=True),
+                create_cell(accept_result, small=True, max_lines=4)
+            ]
+        ]
+        
+        # Adjusted column widths to fit within page
+        conclusion_widths = [0.8*inch, 1.6*inch, 0.8*inch, 1.6*inch, 0.8*inch, 1.6*inch]
+        conclusion_table = CachedTable(fit_cells(conclusion_data, conclusion_widths), colWidths=conclusion_widths)
+        conclusion_table.setStyle(TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (0, -1), bold_font),
+            ('FONTNAME', (2, 0), (2, -1), bold_font),
+            ('FONTNAME', (4, 0), (4, -1), bold_font),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),  # Reduced font size
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e0e0e0')),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white])
+        ]))
+        elements.append(conclusion_table)
+        
+        # Signatures - Moved to new page if needed
+        elements.append(Spacer(1, 10))
+        
+        # Get signature values
+        verified_by = data.get('verified_by', '')
+        testing_person = data.get('testing_person', '')
+        
+        signature_data = [
+            [
+                create_cell(get_pdf_text("verified_by", pdf_lang), bold=True),
+                create_cell(verified_by),
+                create_cell(""),
+                create_cell(get_pdf_text("testing_person", pdf_lang), bold=True),
+                create_cell(testing_person)
+            ],
+            [
+                create_cell(""),
+                create_cell("_________________________"),
+                create_cell(""),
+                create_cell(""),
+                create_cell("_________________________")
+            ],
+            [
+                create_cell(""),
+                create_cell(get_pdf_text("signature", pdf_lang)),
+                create_cell(""),
+                create_cell(""),
+                create_cell(get_pdf_text("signature", pdf_lang))
+            ]
+        ]
+        
+        signature_widths = [1.2*inch, 2.3*inch, 0.5*inch, 1.2*inch, 2.3*inch]
+        signature_table = CachedTable(fit_cells(signature_data, signature_widths), colWidths=signature_widths)
+        signature_table.setStyle(TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), bold_font),
+            ('FONTNAME', (3, 0), (3, -1), bold_font),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]))
+        elements.append(signature_table)
+        
+        elements.append(Spacer(1, 10))
+        elements.append(Paragraph(get_pdf_text("version", pdf_lang), normal_style))
+        
+        return elements
+        
+    # Sections are rebuilt only when their own inputs change
+    sections = [
+        ("basic_info", build_basic_info, (location_text, date_text)),
+        ("adhesive", build_adhesive, ()),
+        ("components", build_components, ()),
+        ("flexing", build_flexing, ()),
+        ("abrasion", build_abrasion, ()),
+        ("resistance", build_resistance, ()),
+        ("hardness", build_hardness, ()),
+        ("conclusion", build_conclusion, ()),
+    ]
+    layout = (pdf_lang, chinese_font, profile, standards.version)
+    for name, build, extra_inputs in sections:
+        inputs = tuple(field_token(data.get(field, '')) for field in SECTION_FIELDS[name]) + extra_inputs
+        elements.extend(cached_section(name, layout, inputs, build))
+    
+    # Build PDF; cached flowables are shared, so one build at a time
+    with build_lock:
+        doc.build(elements)
+    buffer.seek(0)
+    return buffer
+
+def render_pdf_bytes(data, pdf_lang="en", selected_city="Shanghai", profile="email", deterministic=False, profile_mode=None):
+    """generate_pdf() returning plain bytes, for worker processes;
+    profile_mode saves a profile of the render (see profiling.py)"""
+    if profile_mode:
+        from profiling import profile_block
+        with profile_block(f"pdf_{pdf_lang}", profile_mode):
+            return generate_pdf(data, pdf_lang, selected_city, profile, deterministic).getvalue()
+    return generate_pdf(data, pdf_lang, selected_city, profile, deterministic).getvalue()
+
+
+def warmup():
+    """Render throwaway English and Mandarin reports so imports, fonts and
+    glyph metrics are loaded before the first real request"""
+    timings = {}
+    data = sample_report_data()
+    for lang in ("en", "zh"):
+        start = time.perf_counter()
+        generate_pdf(data, pdf_lang=lang)
+        timings[lang] = time.perf_counter() - start
+    return timings
+
+
+if __name__ == "__main__":
+    for lang, seconds in warmup().items():
+        print(f"warm-up {lang}: {seconds * 1000:.1f} ms")
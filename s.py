@@ -1,32 +1,49 @@
 import streamlit as st
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch, cm
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
-from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfbase.cidfonts import UnicodeCIDFont
 from datetime import datetime
-import io
-import pytz
-from openai import OpenAI
 import os
+import threading
+import uuid
+from concurrent.futures import wait
+from contextlib import closing
 from dotenv import load_dotenv
-import base64
-from io import BytesIO
+from glossary import build_glossary, TERMS_FILE
+from report_data import (
+    CHINA_TZ, CHINESE_CITIES, ENGLISH_TEXTS, CHINESE_TEXTS, MEASURED_ITEMS, RECORDED_ITEMS, TEST_ITEMS,
+    china_now, collect_report_data, report_basename, section_items,
+    measured_section, measurement_key, readings_text_key, recorded_section, variant_key
+)
+from evaluation import as_readings, derive_results, item_limit, read_readings, readings_text, reading_stats
+from standards import StandardsError, get_standards, profile_for_brand, standard_profiles
+from tester_import import TESTER_SECTIONS, import_readings
+from drafts import DraftStore, changed_fields
+from ingest import INGEST_PORT, INGEST_TCP_PORT, LIVE_READINGS, start_ingest
+from render_pool import RenderQueueFull, submit_renders, render_status, editions_zip
+from profiling import PROFILE_DIR, profile_mode, profile_script, recent_profiles
+from session_memory import (
+    SESSION_IDLE_SECONDS, new_translation_cache, touch, start_reaper,
+    memory_report, process_rss
+)
+from jobs import (
+    QUEUED, RENDERING, FAILED, PENDING_STATES,
+    artifact_available, enqueue, list_jobs, queue_position, read_artifact, start_workers
+)
+
+# reportlab, openai and the PDF module are imported on first use so a
+# cold start only pays for streamlit itself
+
+# Opt-in profiling with ?profile=1 (or cprofile / sample); off costs nothing
+PROFILE_MODE = profile_mode(st.query_params.get("profile"))
+if PROFILE_MODE and not globals().get("PROFILED_RUN"):
+    # The rerun runs again inside a with block, which stops the profiler
+    # and sampler even when it is interrupted; this copy ends here
+    profile_script(__file__, globals(), "rerun", PROFILE_MODE)
+    st.stop()
 
 # Load environment variables
 load_dotenv()
 
-# Initialize OpenAI client
 openai_api_key = os.getenv("OPENAI_API_KEY")
-if openai_api_key:
-    openai_client = OpenAI(api_key=openai_api_key)
-else:
-    openai_client = None
+if not openai_api_key:
     st.warning("OpenAI API key not found. Translation features will be limited.")
 
 # Page config
@@ -37,48 +54,27 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Chinese cities dictionary
-CHINESE_CITIES = {
-    "Guangzhou": "广东",
-    "Shenzhen": "深圳",
-    "Dongguan": "东莞",
-    "Foshan": "佛山",
-    "Zhongshan": "中山",
-    "Huizhou": "惠州",
-    "Zhuhai": "珠海",
-    "Jiangmen": "江门",
-    "Zhaoqing": "肇庆",
-    "Shanghai": "Shanghai",
-    "Beijing": "Beijing",
-    "Suzhou": "苏州",
-    "Hangzhou": "杭州",
-    "Ningbo": "宁波",
-    "Wenzhou": "温州",
-    "Wuhan": "武汉",
-    "Chengdu": "成都",
-    "Chongqing": "重庆",
-    "Tianjin": "天津",
-    "Nanjing": "南京",
-    "Xi'an": "西安",
-    "Qingdao": "青岛",
-    "Dalian": "大连",
-    "Shenyang": "沈阳",
-    "Changsha": "长沙",
-    "Zhengzhou": "郑州",
-    "Jinan": "济南",
-    "Harbin": "哈尔滨",
-    "Changchun": "长春",
-    "Taiyuan": "太原",
-    "Shijiazhuang": "石家庄",
-    "Lanzhou": "兰州",
-    "Xiamen": "厦门",
-    "Fuzhou": "福州",
-    "Nanning": "南宁",
-    "Kunming": "昆明",
-    "Guiyang": "贵阳",
-    "Haikou": "海口",
-    "Ürümqi": "乌鲁木齐",
-    "Lhasa": "拉萨"
+
+# Background render workers started with the app, and My Reports refresh rate
+JOB_WORKERS = int(os.getenv("PTR_JOB_WORKERS", "1"))
+JOB_POLL_SECONDS = float(os.getenv("PTR_JOB_POLL_SECONDS", "2"))
+
+# Newest subgroups drawn on an SPC chart; limits and alerts use them all
+SPC_CHART_POINTS = int(os.getenv("PTR_SPC_CHART_POINTS", "1000"))
+
+# How often an open report checks for readings pushed by instruments
+LIVE_POLL_SECONDS = float(os.getenv("PTR_LIVE_POLL_SECONDS", "1"))
+
+# PDF language choices shown in the sidebar
+PDF_LANGUAGE_OPTIONS = {
+    "English": "en",
+    "Mandarin": "zh",
+    "Both": "both"
+}
+PDF_LANGUAGE_LABELS = {
+    "en": "English",
+    "zh": "Mandarin",
+    "both": "English + Mandarin"
 }
 
 # Custom icons for better UI
@@ -119,180 +115,12 @@ ICONS = {
     "result": "📈",
     "comments": "💬",
     "pull_test": "⚡",
-    "rust_test": "🛡️"
+    "rust_test": "🛡️",
+    "instrument": "📡"
 }
 
-# Custom CSS with enhanced styling - Green theme for testing
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 3.5rem;
-        font-weight: 800;
-        text-align: center;
-        background: linear-gradient(135deg, #10b981 0%, #059669 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        margin-bottom: 1.5rem;
-        padding: 0.5rem;
-        text-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-    }
-    .section-header {
-        font-size: 1.9rem;
-        font-weight: 700;
-        color: #2c3e50;
-        margin-top: 2.5rem;
-        margin-bottom: 1.5rem;
-        padding: 0.8rem 1.2rem;
-        background: linear-gradient(135deg, #f0fdf4 0%, #dcfce7 100%);
-        border-radius: 12px;
-        border-left: 5px solid #10b981;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.05);
-        display: flex;
-        align-items: center;
-        gap: 10px;
-    }
-    .section-header-icon {
-        font-size: 1.8rem;
-    }
-    .stButton>button {
-        background: linear-gradient(135deg, #10b981 0%, #059669 100%);
-        color: white;
-        font-size: 1.3rem;
-        font-weight: 600;
-        padding: 1rem 2.5rem;
-        border-radius: 12px;
-        border: none;
-        box-shadow: 0 6px 12px rgba(0,0,0,0.15);
-        transition: all 0.4s cubic-bezier(0.4, 0, 0.2, 1);
-        width: 100%;
-        position: relative;
-        overflow: hidden;
-    }
-    .stButton>button:hover {
-        transform: translateY(-3px) scale(1.02);
-        box-shadow: 0 10px 20px rgba(0,0,0,0.2);
-    }
-    .stButton>button:before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: -100%;
-        width: 100%;
-        height: 100%;
-        background: linear-gradient(90deg, transparent, rgba(255,255,255,0.2), transparent);
-        transition: 0.5s;
-    }
-    .stButton>button:hover:before {
-        left: 100%;
-    }
-    .info-box {
-        background: linear-gradient(135deg, #10b981 0%, #059669 100%);
-        padding: 1.8rem;
-        border-radius: 15px;
-        color: white;
-        margin: 1.5rem 0;
-        box-shadow: 0 8px 16px rgba(0,0,0,0.1);
-        border: 1px solid rgba(255,255,255,0.1);
-    }
-    .sidebar .sidebar-content {
-        background: linear-gradient(180deg, #f8f9fa 0%, #e9ecef 100%);
-        padding: 1.5rem;
-        border-right: 1px solid #dee2e6;
-    }
-    .stSelectbox, .stTextInput, .stTextArea, .stRadio, .stNumberInput {
-        background-color: white;
-        border-radius: 10px;
-        padding: 0.8rem;
-        box-shadow: 0 3px 6px rgba(0,0,0,0.05);
-        border: 1px solid #e0e0e0;
-        transition: all 0.3s;
-    }
-    .stSelectbox:hover, .stTextInput:hover, .stTextArea:hover, .stRadio:hover, .stNumberInput:hover {
-        border-color: #10b981;
-        box-shadow: 0 5px 10px rgba(16, 185, 129, 0.1);
-    }
-    .stExpander {
-        background-color: white;
-        border-radius: 12px;
-        box-shadow: 0 4px 8px rgba(0,0,0,0.05);
-        margin-bottom: 1.2rem;
-        border: 1px solid #e0e0e0;
-        overflow: hidden;
-    }
-    .stExpander > div:first-child {
-        background: linear-gradient(135deg, #f0fdf4 0%, #dcfce7 100%);
-        border-radius: 12px 12px 0 0;
-    }
-    div[data-baseweb="tab"] {
-        background: linear-gradient(135deg, #f0fdf4 0%, #dcfce7 100%);
-        border-radius: 10px !important;
-        padding: 0.5rem;
-        margin: 0.2rem;
-    }
-    .metric-container {
-        background: linear-gradient(135deg, #f0fdf4 0%, #dcfce7 100%);
-        border-radius: 15px;
-        padding: 1.5rem;
-        margin: 1rem 0;
-        box-shadow: 0 4px 8px rgba(0,0,0,0.05);
-    }
-    .location-badge {
-        display: inline-flex;
-        align-items: center;
-        gap: 8px;
-        background: linear-gradient(135deg, #10b981 0%, #059669 100%);
-        color: white;
-        padding: 0.5rem 1rem;
-        border-radius: 20px;
-        font-weight: 600;
-        box-shadow: 0 3px 6px rgba(0,0,0,0.1);
-    }
-    .footer {
-        text-align: center;
-        padding: 2rem;
-        background: linear-gradient(135deg, #f0fdf4 0%, #dcfce7 100%);
-        border-radius: 15px;
-        margin-top: 2rem;
-        border-top: 3px solid #10b981;
-    }
-    .test-pass {
-        background-color: #d1fae5;
-        color: #065f46;
-        padding: 4px 12px;
-        border-radius: 4px;
-        font-weight: bold;
-        border: 1px solid #a7f3d0;
-    }
-    .test-fail {
-        background-color: #fee2e2;
-        color: #991b1b;
-        padding: 4px 12px;
-        border-radius: 4px;
-        font-weight: bold;
-        border: 1px solid #fecaca;
-    }
-    .test-accept {
-        background-color: #fef3c7;
-        color: #92400e;
-        padding: 4px 12px;
-        border-radius: 4px;
-        font-weight: bold;
-        border: 1px solid #fde68a;
-    }
-    .test-icon {
-        font-size: 1.5rem;
-        animation: pulse 2s infinite;
-        display: inline-block;
-        margin-right: 15px;
-    }
-    @keyframes pulse {
-        0% { transform: scale(1); }
-        50% { transform: scale(1.1); }
-        100% { transform: scale(1); }
-    }
-</style>
-""", unsafe_allow_html=True)
+# The green theme lives in .streamlit/config.toml [theme]; the browser gets it
+# once per session instead of a <style> block on every rerun
 
 # Initialize session state
 if 'ui_language' not in st.session_state:
@@ -301,338 +129,229 @@ if 'pdf_language' not in st.session_state:
     st.session_state.pdf_language = "en"
 if 'selected_city' not in st.session_state:
     st.session_state.selected_city = "Shanghai"
+if 'both_output' not in st.session_state:
+    st.session_state.both_output = "zip"
+if 'output_profile' not in st.session_state:
+    st.session_state.output_profile = "email"
+if 'deterministic' not in st.session_state:
+    st.session_state.deterministic = False
+if 'background_render' not in st.session_state:
+    st.session_state.background_render = False
+if 'entry_mode' not in st.session_state:
+    st.session_state.entry_mode = "form"
 if 'translations_cache' not in st.session_state:
-    st.session_state.translations_cache = {}
-
-# Fixed English texts for PDF (no translation needed)
-ENGLISH_TEXTS = {
-    "company": "GRAND STEP (H.K.) LTD",
-    "title": "PHYSICAL TEST REPORT",
-    "test_location": "Test Location:",
-    "report_date": "Report Date:",
-    
-    # Section headers
-    "basic_info": "1. BASIC INFORMATION",
-    "adhesive_test": "2. ADHESIVE/PULL TEST",
-    "components_test": "3. COMPONENTS PHYSICAL TEST",
-    "flexing_test": "4. FLEXING TEST",
-    "abrasion_test": "5. ABRASION TEST",
-    "resistance_test": "6. RESISTANCE TEST",
-    "hardness_test": "7. HARDNESS TEST",
-    "conclusion": "8. CONCLUSION",
-    "rust_test": "RUST TEST",
-    
-    # Labels
-    "report_no": "Report No.:",
-    "date_no": "Date/No.:",
-    "ci_no": "CI / Order No.:",
-    "order_qty": "Order QTY:",
-    "brand": "Brand:",
-    "produced_qty": "Produced QTY:",
-    "style_no": "Style No.:",
-    "factory_trader": "Factory/Trader:",
-    "sales": "Sales:",
-    
-    # Standard note
+    st.session_state.translations_cache = new_translation_cache()
+if 'standard_profile' not in st.session_state:
+    st.session_state.standard_profile = ""
+
+@st.cache_resource
+def get_openai_client():
+    """OpenAI client shared by all sessions, created on first translation"""
+    if not openai_api_key:
+        return None
+    from openai import OpenAI
+    # OPENAI_BASE_URL points the app at a compatible server, e.g. openai_stub.py
+    return OpenAI(api_key=openai_api_key, base_url=os.getenv("OPENAI_BASE_URL") or None)
+
+@st.cache_resource
+def start_pdf_warmup():
+    """Render throwaway reports in the background once per server process"""
+    def run():
+        from report_pdf import warmup
+        warmup()
+    thread = threading.Thread(target=run, name="pdf-warmup", daemon=True)
+    thread.start()
+    return thread
+
+# Optional warm-up so the first real user sees steady-state latency
+if os.getenv("PTR_WARMUP", "").lower() in ("1", "true", "yes") and __name__ == "__main__":
+    start_pdf_warmup()
+
+@st.cache_resource
+def start_session_reaper():
+    """Close sessions left idle on shop-floor PCs, once per server process"""
+    return start_reaper()
+
+touch()
+if SESSION_IDLE_SECONDS > 0 and __name__ == "__main__":
+    start_session_reaper()
+
+@st.cache_resource
+def start_job_workers():
+    """Background render workers owned by this server process"""
+    return start_workers(JOB_WORKERS)
+
+# Set PTR_JOB_WORKERS=0 when workers run separately (python jobs.py).
+# Process-level side effects only run in the app itself, never when the
+# script is imported under another name
+if JOB_WORKERS > 0 and __name__ == "__main__":
+    start_job_workers()
+
+@st.cache_resource
+def start_instrument_ingest():
+    """Listener for networked instruments, once per server process"""
+    return start_ingest()
+
+INGEST_ENABLED = bool(INGEST_PORT or INGEST_TCP_PORT) and __name__ == "__main__"
+ingest_status = start_instrument_ingest() if INGEST_ENABLED else None
+
+@st.cache_resource
+def open_drafts():
+    """Draft store and its writer thread, once per server process"""
+    return DraftStore()
+
+drafts = open_drafts() if __name__ == "__main__" else None
+
+def report_owner():
+    """Owner id kept in the URL so My Reports survives a browser refresh"""
+    if "owner" not in st.query_params:
+        st.query_params["owner"] = uuid.uuid4().hex
+    return st.query_params["owner"]
+
+# Base English texts for UI
+UI_TEXTS = {
+    "title": "Physical Test Report",
+    "basic_info": "Basic Information",
+    "adhesive_test": "Adhesive/Pull Test",
+    "components_test": "Components Physical Test",
+    "flexing_test": "Flexing Test",
+    "abrasion_test": "Abrasion Test",
+    "resistance_test": "Resistance Test",
+    "hardness_test": "Hardness Test",
+    "conclusion": "Conclusion",
+    "signatures": "Signatures & Verification",
+    "generate_pdf": "Generate PDF Report",
+    "download_pdf": "Download PDF Report",
+    "report_no": "Report No.",
+    "ci_no": "CI / Order No.",
+    "order_qty": "Order Quantity",
+    "produced_qty": "Produced Quantity",
+    "factory": "Factory/Trader",
+    "brand": "Brand/Trademark",
+    "style": "Style No.",
+    "sales": "Sales",
+    "test_standard": "Test Standard",
+    "test_result": "Test Result",
+    "comments": "Comments",
+    "footer_text": "Physical Test Report System",
+    "generate_success": "PDF Generated Successfully!",
+    "fill_required": "Please fill in at least CI No. and Style No.!",
+    "fix_readings": "Some readings could not be read; correct them before generating the report",
+    "creating_pdf": "Creating your professional PDF report...",
+    "pdf_details": "PDF Details",
+    "report_language": "Report Language",
+    "generated": "Generated",
+    "location": "Location",
+    "error_generating": "Error generating PDF",
+    "select_location": "Select Location",
+    "user_interface_language": "User Interface Language",
+    "pdf_report_language": "PDF Report Language",
+    "test_location": "Test Location",
+    "local_time": "Local Time",
+    "quick_guide": "Quick Guide",
+    "powered_by": "Powered by Streamlit",
+    "copyright": "© 2025 - Physical Test Report Platform",
+    "upload_photo": "Upload Shoe Photo",
     "standard_note": "Note: This is Grand Step Company Standard only. Any priority should follow Customer or 3rd Lab Standard",
-    
-    # Test headers
     "flat_shoe": "Flat Shoe",
     "high_heel": "High Heel",
-    "sole_wedge": "Sole/Wedge",
     "toe": "Toe",
     "forepart": "Forepart",
     "waist": "Waist",
     "heel": "Heel",
-    "heel_height": "Heel Height",
-    "cm_5_8": "5CM-8CM",
-    "above_8cm": "Above 8CM",
-    
-    # Table headers
-    "item": "Item",
-    "standard": "Standard",
-    "result": "Result",
-    "comments": "Comments",
+    "standard_value": "Standard",
     "remark": "Remark",
-    
-    # Components
-    "buckle": "Buckle",
-    "strap": "Strap",
-    "eyelet": "Eyelet",
-    "studs": "Studs",
-    "diamond_bow": "Diamond/Bow",
-    "top_lift": "Top lift",
-    "loop": "Loop",
-    "toe_post": "Toe Post Attachment",
-    "zipper": "Zipper",
-    "perment_set": "Perment set at 400N",
-    
-    # Component standards
-    "buckle_std": "20 kg/200N",
-    "strap_std": "20 kg/200N",
-    "eyelet_std": "20 kg/200N",
-    "studs_std": "20 kg/200N",
-    "diamond_std": "7KG/70N",
-    "top_lift_std": "15 kg/140N",
-    "loop_std": "20 KG/200N",
-    "toe_post_std": "EVA/Rubber: 150N, Others: 200N",
-    "zipper_std": "25 kg/250N",
-    "perment_set_std": "Max deformation ≤ 15%",
-    
-    # Rust test
-    "rust_test_full": "RUST TEST",
-    
-    # Flexing test
-    "upper": "Upper",
+    "item": "Item",
+    "pass_fail_accept": "Pass/Fail/Accept",
+    "rust_test": "Rust Test",
+    "outsole": "Outsole",
     "shoe_flex": "Shoe Flex",
+    "upper": "Upper",
     "foxing": "Foxing",
-    "upper_std": "250,000 cycles",
-    "shoe_flex_std": "100,000 cycles",
-    "foxing_std": "≥ 2.0 N/mm",
-    
-    # Abrasion test
-    "top_lift_abrasion": "Top Lift",
+    "top_lift": "Top Lift",
     "outsole_abrasion": "Outsole Abrasion",
-    "outsole_abrasion_std": "Rubber & PU: 300mm³, TPR: 350mm³, EVA: 700mm³, PVC: 250mm³",
-    
-    # Resistance test
-    "outsole_resistance": "Outsole",
     "heel_fatigue": "Heel Fatigue",
-    "heel_fatigue_std": "20,000 cycles, Top lift area ≤ 1cm²",
-    
-    # Hardness test
-    "eva_hardness": "EVA",
+    "eva": "EVA",
     "outsole_hardness": "Outsole Hardness",
-    
-    # Conclusion
-    "pass_label": "PASS",
-    "fail_label": "FAIL",
-    "accept_label": "ACCEPT",
-    
-    # Signatures
-    "verified_by": "Verified by:",
-    "testing_person": "Testing Person:",
-    "signature": "Signature",
-    
-    # Version
-    "version": "Version 2024.09"
+    "verified_by": "Verified by",
+    "testing_person": "Testing Person",
+    "version": "Version",
+    "output_profile": "Output Profile",
+    "file_size": "File Size",
+    "size_over_budget": "Report exceeds the email size budget",
+    "render_queued": "Queued",
+    "reports_ahead": "reports ahead",
+    "rendering": "Rendering report...",
+    "render_queue_full": "The report queue is full, please try again in a moment",
+    "job_queued": "Report queued, see My Reports",
+    "my_reports": "My Reports",
+    "no_reports": "No background reports yet",
+    "prepare_download": "Prepare this report for download",
+    "spc": "Process Control (SPC)",
+    "show_spc": "Show control charts",
+    "all_factories": "All factories",
+    "xbar_r_chart": "X-bar / R chart",
+    "p_chart": "p-chart (weekly failure rate)",
+    "no_spc_data": "No stored reports with this item yet",
+    "spc_alerts": "Rule alerts",
+    "drafts": "Drafts",
+    "draft_found": "A saved draft exists for report",
+    "resume_draft": "Resume draft",
+    "start_over": "Start over",
+    "draft_autosave": "Autosaving draft of report",
+    "no_drafts": "No saved drafts",
+    "spc_rules": "Western Electric rules: 1 one point beyond 3σ · 2 two of three beyond 2σ · 3 four of five beyond 1σ · 4 eight in a row on one side",
+    "measurements": "Measurements",
+    "readings_placeholder": "one reading per specimen, e.g. 212 208 230",
+    "not_read": "Not read",
+    "ambiguous_comma": "ambiguous comma: separate readings with spaces, use a decimal point, or write the number without commas",
+    "not_a_number": "not a finite number",
+    "stat_min": "min",
+    "stat_mean": "mean",
+    "stat_max": "max",
+    "measured_result": "A measured item's result is set by comparing its readings with the standard",
+    "manual_check": "Not judged from the readings, check by hand before passing the item",
+    "tester_files": "Tester export files (CSV)",
+    "tester_help": "Name each file after its item, e.g. toe.csv or buckle_2.csv. Adhesive items take the average peel force of each specimen, the others the peak force",
+    "no_matching_item": "no item of this section matches the file name",
+    "not_a_force_item": "this item is not judged on a force",
+    "unreadable_file": "no force readings found in the file",
+    "pass": "PASS",
+    "fail": "FAIL",
+    "accept": "ACCEPT"
 }
 
-# Fixed Chinese texts for PDF (no translation needed)
-CHINESE_TEXTS = {
-    "company": "GRAND STEP (H.K.) LTD",
-    "title": "物理测试报告",
-    "test_location": "测试地点:",
-    "report_date": "报告日期:",
-    
-    # Section headers
-    "basic_info": "1. 基本信息",
-    "adhesive_test": "2. 粘合/拉力测试",
-    "components_test": "3. 配件物理测试",
-    "flexing_test": "4. 弯曲测试",
-    "abrasion_test": "5. 耐磨测试",
-    "resistance_test": "6. 阻力测试",
-    "hardness_test": "7. 硬度测试",
-    "conclusion": "8. 结论",
-    "rust_test": "防锈测试",
-    
-    # Labels
-    "report_no": "报告编号:",
-    "date_no": "日期/编号:",
-    "ci_no": "CI/订单号:",
-    "order_qty": "订单数量:",
-    "brand": "品牌:",
-    "produced_qty": "生产数量:",
-    "style_no": "款式号:",
-    "factory_trader": "工厂/贸易商:",
-    "sales": "销售:",
-    
-    # Standard note
-    "standard_note": "注：此标准仅为 Grand Step 公司标准。如有冲突，应遵循客户或第三方实验室标准",
-    
-    # Test headers
-    "flat_shoe": "平底鞋",
-    "high_heel": "高跟鞋",
-    "sole_wedge": "鞋底/楔形",
-    "toe": "鞋头",
-    "forepart": "前掌",
-    "waist": "腰窝",
-    "heel": "后跟",
-    "heel_height": "后跟高度",
-    "cm_5_8": "5厘米-8厘米",
-    "above_8cm": "8厘米以上",
-    
-    # Table headers
-    "item": "项目",
-    "standard": "标准",
-    "result": "结果",
-    "comments": "备注",
-    "remark": "备注",
-    
-    # Components
-    "buckle": "鞋扣",
-    "strap": "饰带",
-    "eyelet": "眼扣",
-    "studs": "饰钉",
-    "diamond_bow": "钻石/蝴蝶结",
-    "top_lift": "天皮",
-    "loop": "穿扣",
-    "toe_post": "趾柱附件",
-    "zipper": "拉链头",
-    "perment_set": "400N永久变形测试",
-    
-    # Component standards
-    "buckle_std": "20 kg/200N",
-    "strap_std": "20 kg/200N",
-    "eyelet_std": "20 kg/200N",
-    "studs_std": "20 kg/200N",
-    "diamond_std": "7KG/70N",
-    "top_lift_std": "15 kg/140N",
-    "loop_std": "20 KG/200N",
-    "toe_post_std": "EVA/橡胶: 150N, 其他: 200N",
-    "zipper_std": "25 kg/250N",
-    "perment_set_std": "最大变形 ≤ 15%",
-    
-    # Rust test
-    "rust_test_full": "防锈测试",
-    
-    # Flexing test
-    "upper": "鞋面",
-    "shoe_flex": "鞋弯曲",
-    "foxing": "围条",
-    "upper_std": "250,000次循环",
-    "shoe_flex_std": "100,000次循环",
-    "foxing_std": "≥ 2.0 N/mm",
-    
-    # Abrasion test
-    "top_lift_abrasion": "天皮",
-    "outsole_abrasion": "外底耐磨",
-    "outsole_abrasion_std": "橡胶 & PU: 300mm³, TPR: 350mm³, EVA: 700mm³, PVC: 250mm³",
-    
-    # Resistance test
-    "outsole_resistance": "外底",
-    "heel_fatigue": "后跟疲劳",
-    "heel_fatigue_std": "20,000次循环，天皮区域≤1cm²",
-    
-    # Hardness test
-    "eva_hardness": "EVA",
-    "outsole_hardness": "外底硬度",
-    
-    # Conclusion
-    "pass_label": "通过",
-    "fail_label": "不通过",
-    "accept_label": "接受",
-    
-    # Signatures
-    "verified_by": "审核人:",
-    "testing_person": "测试人员:",
-    "signature": "签名",
-    
-    # Version
-    "version": "版本 2024.09"
-}
+@st.cache_resource
+def get_glossary(term_file_mtime=None):
+    """Footwear glossary shared by all sessions, rebuilt when the term file changes"""
+    return build_glossary(ENGLISH_TEXTS, CHINESE_TEXTS, TERMS_FILE)
 
-def get_pdf_text(key, pdf_lang):
-    """Get text for PDF based on language (English or Chinese)"""
-    if pdf_lang == "en":
-        return ENGLISH_TEXTS.get(key, key)
-    else:
-        return CHINESE_TEXTS.get(key, key)
+def glossary_mtime():
+    """Modification time of the editable term file"""
+    try:
+        return os.path.getmtime(TERMS_FILE)
+    except OSError:
+        return None
 
-def get_location_display(selected_city, pdf_lang):
-    """Get location display text based on language"""
-    if pdf_lang == "en":
-        # For English PDF, show only English city name
-        return f"{selected_city}"
-    else:
-        # For Chinese PDF, show Chinese city name
-        chinese_name = CHINESE_CITIES[selected_city]
-        # Check if the Chinese name contains Chinese characters
-        if any('\u4e00' <= char <= '\u9fff' for char in chinese_name):
-            return f"{selected_city} ({chinese_name})"
-        else:
-            return f"{selected_city}"
+# Looked up once per rerun: an edited term file shows on the next rerun,
+# and labels cost neither a stat nor a cache lookup each
+ui_glossary = get_glossary(glossary_mtime())
 
 # Helper function to get translated text for UI with caching
 def get_text(key, fallback=None):
     """Get translated text based on current UI language"""
     lang = st.session_state.ui_language
     
-    # Base English texts for UI
-    texts = {
-        "title": "Physical Test Report",
-        "basic_info": "Basic Information",
-        "adhesive_test": "Adhesive/Pull Test",
-        "components_test": "Components Physical Test",
-        "flexing_test": "Flexing Test",
-        "abrasion_test": "Abrasion Test",
-        "resistance_test": "Resistance Test",
-        "hardness_test": "Hardness Test",
-        "conclusion": "Conclusion",
-        "signatures": "Signatures & Verification",
-        "generate_pdf": "Generate PDF Report",
-        "download_pdf": "Download PDF Report",
-        "report_no": "Report No.",
-        "ci_no": "CI / Order No.",
-        "order_qty": "Order Quantity",
-        "produced_qty": "Produced Quantity",
-        "factory": "Factory/Trader",
-        "brand": "Brand/Trademark",
-        "style": "Style No.",
-        "sales": "Sales",
-        "test_standard": "Test Standard",
-        "test_result": "Test Result",
-        "comments": "Comments",
-        "footer_text": "Physical Test Report System",
-        "generate_success": "PDF Generated Successfully!",
-        "fill_required": "Please fill in at least CI No. and Style No.!",
-        "creating_pdf": "Creating your professional PDF report...",
-        "pdf_details": "PDF Details",
-        "report_language": "Report Language",
-        "generated": "Generated",
-        "location": "Location",
-        "error_generating": "Error generating PDF",
-        "select_location": "Select Location",
-        "user_interface_language": "User Interface Language",
-        "pdf_report_language": "PDF Report Language",
-        "test_location": "Test Location",
-        "local_time": "Local Time",
-        "quick_guide": "Quick Guide",
-        "powered_by": "Powered by Streamlit",
-        "copyright": "© 2025 - Physical Test Report Platform",
-        "upload_photo": "Upload Shoe Photo",
-        "standard_note": "Note: This is Grand Step Company Standard only. Any priority should follow Customer or 3rd Lab Standard",
-        "flat_shoe": "Flat Shoe",
-        "high_heel": "High Heel",
-        "toe": "Toe",
-        "forepart": "Forepart",
-        "waist": "Waist",
-        "heel": "Heel",
-        "standard_value": "Standard",
-        "remark": "Remark",
-        "item": "Item",
-        "pass_fail_accept": "Pass/Fail/Accept",
-        "rust_test": "Rust Test",
-        "outsole": "Outsole",
-        "shoe_flex": "Shoe Flex",
-        "upper": "Upper",
-        "foxing": "Foxing",
-        "top_lift": "Top Lift",
-        "outsole_abrasion": "Outsole Abrasion",
-        "heel_fatigue": "Heel Fatigue",
-        "eva": "EVA",
-        "outsole_hardness": "Outsole Hardness",
-        "verified_by": "Verified by",
-        "testing_person": "Testing Person",
-        "version": "Version",
-        "pass": "PASS",
-        "fail": "FAIL",
-        "accept": "ACCEPT"
-    }
+    text = UI_TEXTS.get(key, fallback or key)
     
-    text = texts.get(key, fallback or key)
+    if lang == "zh" and key not in ["pass", "fail", "accept"]:
+        # Glossary first, so fixed terms match the PDF and skip the API
+        translated = ui_glossary.translate(text)
+        if translated is not None:
+            return translated
     
     # Translate if needed for UI only (not for PDF)
+    openai_client = get_openai_client() if lang == "zh" else None
     if lang == "zh" and openai_client and key not in ["pass", "fail", "accept"]:
         try:
             # Check cache
@@ -663,778 +382,280 @@ def get_text(key, fallback=None):
     return text
 
 def get_test_result_display(result):
-    """Get styled test result display"""
+    """Get styled test result display (markdown badge in the theme colors)"""
     if result == "Pass":
-        return '<span class="test-pass">Pass</span>'
+        return ':green-badge[Pass]'
     elif result == "Fail":
-        return '<span class="test-fail">Fail</span>'
+        return ':red-badge[Fail]'
     else:
-        return '<span class="test-accept">Accept</span>'
-
-# Enhanced PDF Generation with Headers and Footers
-class PDFWithHeaderFooter(SimpleDocTemplate):
-    def __init__(self, *args, **kwargs):
-        self.pdf_language = kwargs.pop('pdf_language', 'en')
-        self.selected_city = kwargs.pop('selected_city', '')
-        self.chinese_city = kwargs.pop('chinese_city', '')
-        self.chinese_font = kwargs.pop('chinese_font', 'Helvetica')
-        super().__init__(*args, **kwargs)
-        
-    def afterFlowable(self, flowable):
-        """Add header and footer"""
-        if isinstance(flowable, PageBreak):
-            return
-            
-        # Add header on all pages except first
-        if self.page > 1:
-            self.canv.saveState()
-            self.canv.setFillColor(colors.HexColor('#10b981'))
-            self.canv.rect(0, self.pagesize[1] - 0.6*inch, self.pagesize[0], 0.6*inch, fill=1, stroke=0)
-            
-            font_size = 12
-            if self.pdf_language == "zh":
-                self.canv.setFont(self.chinese_font, font_size)
-            else:
-                self.canv.setFont('Helvetica-Bold', font_size)
-                
-            self.canv.setFillColor(colors.white)
-            header_title = "GRAND STEP PHYSICAL TEST REPORT"
-            self.canv.drawCentredString(
-                self.pagesize[0]/2.0, 
-                self.pagesize[1] - 0.4*inch, 
-                header_title
-            )
-            self.canv.restoreState()
-            
-        # Footer on all pages
-        self.canv.saveState()
-        
-        self.canv.setFillColor(colors.HexColor('#f8f9fa'))
-        self.canv.rect(0, 0, self.pagesize[0], 0.7*inch, fill=1, stroke=0)
-        
-        self.canv.setStrokeColor(colors.HexColor('#10b981'))
-        self.canv.setLineWidth(1)
-        self.canv.line(0, 0.7*inch, self.pagesize[0], 0.7*inch)
-        
-        font_size = 8
-        if self.pdf_language == "zh":
-            self.canv.setFont(self.chinese_font, font_size)
-        else:
-            self.canv.setFont('Helvetica', font_size)
-            
-        self.canv.setFillColor(colors.HexColor('#666666'))
-        
-        china_tz = pytz.timezone('Asia/Shanghai')
-        current_time = datetime.now(china_tz)
-        
-        # Get location display based on language
-        location_display = get_location_display(self.selected_city, self.pdf_language)
-        if self.pdf_language == "zh":
-            location_info = f"{get_pdf_text('test_location', 'zh')} {location_display}"
-        else:
-            location_info = f"{get_pdf_text('test_location', 'en')} {location_display}"
-        
-        self.canv.drawString(0.5*inch, 0.25*inch, location_info)
-        
-        timestamp = f"{get_pdf_text('report_date', self.pdf_language).replace(':', '')} {current_time.strftime('%Y-%m-%d %H:%M:%S')}"
-        self.canv.drawCentredString(self.pagesize[0]/2.0, 0.25*inch, timestamp)
-        
-        page_num = f"Page {self.page}"
-        self.canv.drawRightString(self.pagesize[0] - 0.5*inch, 0.25*inch, page_num)
-        
-        self.canv.restoreState()
-
-def truncate_text(text, max_length=50):
-    """Truncate text if too long for PDF cells"""
-    if not text:
-        return ""
-    if len(str(text)) > max_length:
-        return str(text)[:max_length-3] + "..."
-    return str(text)
-
-def generate_pdf():
-    """Generate PDF report"""
-    buffer = io.BytesIO()
-    
-    # Get location info
-    selected_city = st.session_state.selected_city
-    chinese_city = CHINESE_CITIES[selected_city]
-    pdf_lang = st.session_state.pdf_language
-    
-    # Register Chinese font if needed
-    chinese_font = 'Helvetica'
-    
-    if pdf_lang == "zh":
-        try:
-            # Try to register Chinese fonts
-            try:
-                pdfmetrics.registerFont(UnicodeCIDFont('STSong-Light'))
-                chinese_font = 'STSong-Light'
-            except Exception as e1:
-                try:
-                    pdfmetrics.registerFont(TTFont('SimSun', 'simsun.ttc'))
-                    chinese_font = 'SimSun'
-                except Exception as e2:
-                    try:
-                        pdfmetrics.registerFont(TTFont('YaHei', 'msyh.ttc'))
-                        chinese_font = 'YaHei'
-                    except Exception as e3:
-                        chinese_font = 'Helvetica'
-        except Exception as e:
-            chinese_font = 'Helvetica'
-    
-    # Create PDF with proper margins
-    doc = PDFWithHeaderFooter(
-        buffer, 
-        pagesize=A4,
-        topMargin=0.8*inch,
-        bottomMargin=0.8*inch,
-        leftMargin=0.5*inch,
-        rightMargin=0.5*inch,
-        pdf_language=pdf_lang,
-        selected_city=selected_city,
-        chinese_city=chinese_city,
-        chinese_font=chinese_font
-    )
-    
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Create styles
-    title_font = 'Helvetica-Bold' if pdf_lang != "zh" else chinese_font
-    normal_font = 'Helvetica' if pdf_lang != "zh" else chinese_font
-    bold_font = 'Helvetica-Bold' if pdf_lang != "zh" else chinese_font
-    
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=22,
-        textColor=colors.HexColor('#10b981'),
-        spaceAfter=10,
-        alignment=TA_CENTER,
-        fontName=bold_font,
-        underlineWidth=1,
-        underlineColor=colors.HexColor('#059669'),
-        underlineOffset=-3
-    )
-    
-    company_style = ParagraphStyle(
-        'CompanyStyle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        textColor=colors.HexColor('#333333'),
-        spaceAfter=5,
-        alignment=TA_CENTER,
-        fontName=bold_font
-    )
-    
-    subtitle_style = ParagraphStyle(
-        'CustomSubtitle',
-        parent=styles['Normal'],
-        fontSize=11,
-        textColor=colors.HexColor('#059669'),
-        alignment=TA_CENTER,
-        spaceAfter=20,
-        fontName=bold_font
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        textColor=colors.white,
-        spaceAfter=8,
-        spaceBefore=12,
-        fontName=bold_font,
-        borderPadding=6,
-        borderColor=colors.HexColor('#10b981'),
-        borderWidth=1,
-        borderRadius=4,
-        backColor=colors.HexColor('#10b981'),
-        alignment=TA_LEFT
-    )
-    
-    subheading_style = ParagraphStyle(
-        'CustomSubheading',
-        parent=styles['Heading3'],
-        fontSize=12,
-        textColor=colors.HexColor('#2c3e50'),
-        spaceAfter=6,
-        fontName=bold_font,
-        alignment=TA_LEFT
-    )
-    
-    normal_style = ParagraphStyle(
-        'NormalStyle',
-        parent=styles['Normal'],
-        fontSize=9,
-        leading=12,
-        fontName=normal_font
-    )
-    
-    bold_style = ParagraphStyle(
-        'BoldStyle',
-        parent=styles['Normal'],
-        fontSize=9,
-        leading=12,
-        fontName=bold_font,
-        textColor=colors.HexColor('#2c3e50')
+        return ':orange-badge[Accept]'
+
+def item_text(key):
+    """Fixed test item text in the UI language"""
+    texts = CHINESE_TEXTS if st.session_state.ui_language == "zh" else ENGLISH_TEXTS
+    return texts.get(key, ENGLISH_TEXTS.get(key, ""))
+
+def apply_grid_edits(editor_key, result_keys):
+    """Write edited grid cells back to the per-item session state keys"""
+    items = {item["result"]: item for item in TEST_ITEMS}
+    for row, changes in st.session_state[editor_key]["edited_rows"].items():
+        item = items[result_keys[int(row)]]
+        if changes.get("result"):
+            st.session_state[item["result"]] = changes["result"]
+        if "comments" in changes and item["comments"]:
+            st.session_state[item["comments"]] = changes["comments"] or ""
+
+def item_grid(items, editor_key, results_editable):
+    """One data editor over some items of a section"""
+    standards = current_standards()
+    has_comments = any(item["comments"] for item in items)
+    rows = []
+    for item in items:
+        row = {
+            "item": item_text(item["label"]),
+            "standard": standards.text(item["standard"], st.session_state.ui_language) if item["standard"] else "",
+            "result": st.session_state[item["result"]],
+        }
+        if has_comments:
+            row["comments"] = st.session_state[item["comments"]] if item["comments"] else ""
+        rows.append(row)
+    
+    st.data_editor(
+        rows,
+        key=editor_key,
+        on_change=apply_grid_edits,
+        args=(editor_key, [item["result"] for item in items]),
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "item": st.column_config.TextColumn(get_text("item"), disabled=True),
+            "standard": st.column_config.TextColumn(get_text("test_standard"), disabled=True),
+            "result": st.column_config.SelectboxColumn(
+                get_text("test_result"), options=list(items[0]["options"]), required=True, disabled=not results_editable
+            ),
+            "comments": st.column_config.TextColumn(get_text("comments")),
+        }
     )
-    
-    small_style = ParagraphStyle(
-        'SmallStyle',
-        parent=styles['Normal'],
-        fontSize=8,
-        leading=10,
-        fontName=normal_font
+
+def test_item_grid(section):
+    """One editable grid for all items of a section instead of a selectbox
+    and a text input per item. Items whose result is derived from readings
+    get a grid of their own with the result read-only"""
+    items = section_items(section)
+    typed = [item for item in items if item["result"] not in measured_results]
+    derived = [item for item in items if item["result"] in measured_results]
+    # Which rows are derived is part of the key: when it changes, edits
+    # kept for the old rows must not land on the new ones
+    layout = "".join("m" if item in derived else "-" for item in items)
+    if typed:
+        item_grid(typed, f"{section}_grid_{layout}", True)
+    if derived:
+        st.caption(get_text("measured_result"))
+        item_grid(derived, f"{section}_measured_grid_{layout}", False)
+
+def current_standards():
+    """Compiled standard of the selected profile (cached in standards.py);
+    falls back to the company standard if the profile file went away"""
+    try:
+        return get_standards(st.session_state.standard_profile)
+    except StandardsError:
+        st.session_state.standard_profile = ""
+        return get_standards()
+
+def limit_text(item_limits):
+    """Short form of a limit with the statistic it applies to, e.g. min ≥ 200 N"""
+    symbol = "≥" if item_limits["op"] == ">=" else "≤"
+    return f"{get_text('stat_' + item_limits['statistic'])} {symbol} {item_limits['limit']:g} {item_limits['unit']}"
+
+def stats_text(stats):
+    """One-line summary of specimen readings"""
+    if stats["n"] == 1:
+        return f"n=1 · {stats['min']:g}"
+    return f"n={stats['n']} · min {stats['min']:g} · x̄ {stats['mean']:.4g} · max {stats['max']:g} · s {stats['std']:.3g}"
+
+def store_readings(result_key):
+    """Parse the typed readings into the array stored with the report; what
+    could not be read is kept to show and blocks generating the report"""
+    readings, problems = read_readings(st.session_state[readings_text_key(result_key)])
+    st.session_state[measurement_key(result_key)] = readings
+    set_readings_problems(result_key, problems)
+
+def set_readings_problems(result_key, problems=()):
+    """Record the unreadable tokens of an item; none clears them"""
+    all_problems = dict(st.session_state.get("readings_problems") or {})
+    if problems:
+        all_problems[result_key] = list(problems)
+    else:
+        all_problems.pop(result_key, None)
+    st.session_state.readings_problems = all_problems
+
+def readings_feedback(result_key):
+    """Statistics of an item's readings, and what could not be read"""
+    stats = reading_stats(st.session_state.get(measurement_key(result_key)))
+    if stats:
+        st.caption(stats_text(stats))
+    for token, reason in (st.session_state.get("readings_problems") or {}).get(result_key, []):
+        st.error(f"{get_text('not_read')} \"{token}\": {get_text(reason)}", icon=ICONS["error"])
+
+def import_tester_files(section):
+    """Fill the readings of a section's items from the uploaded tester exports"""
+    files = st.session_state[f"{section}_tester_files"] or []
+    readings, curves, problems = import_readings(files, section, current_standards())
+    for result_key, values in readings.items():
+        st.session_state[measurement_key(result_key)] = values
+        st.session_state[readings_text_key(result_key)] = readings_text(values)
+        set_readings_problems(result_key)
+    st.session_state.tester_curves = {**(st.session_state.get("tester_curves") or {}), **curves}
+    st.session_state[f"{section}_tester_problems"] = problems
+
+def tester_upload(section):
+    """Uploader for raw pull/peel tester exports of a section"""
+    st.file_uploader(
+        get_text("tester_files"),
+        type=["csv", "txt"],
+        accept_multiple_files=True,
+        help=get_text("tester_help"),
+        key=f"{section}_tester_files",
+        on_change=import_tester_files,
+        args=(section,)
     )
-    
-    # Helper function to create paragraphs with proper font and text wrapping
-    def create_paragraph(text, bold=False, style=None, small=False):
-        if style is None:
-            if small:
-                style = small_style
-            else:
-                style = bold_style if bold else normal_style
-        
-        # Truncate long text to prevent overflow
-        clean_text = truncate_text(text)
-        
-        # Ensure proper font is used based on language
-        if pdf_lang == "zh" and chinese_font != 'Helvetica':
-            style = ParagraphStyle(
-                f"CustomStyle_{bold}_{small}",
-                parent=style,
-                fontName=chinese_font if not bold else chinese_font,
-                wordWrap='LTR'
-            )
-        
-        return Paragraph(str(clean_text), style)
-    
-    # Get values from session state
-    report_no = truncate_text(st.session_state.get('report_no', ''), 15)
-    ci_no = truncate_text(st.session_state.get('ci_no', ''), 15)
-    order_qty = truncate_text(st.session_state.get('order_qty', ''), 10)
-    style_no = truncate_text(st.session_state.get('style_no', ''), 15)
-    brand = truncate_text(st.session_state.get('brand', ''), 15)
-    produced_qty = truncate_text(st.session_state.get('produced_qty', ''), 10)
-    factory = truncate_text(st.session_state.get('factory', ''), 20)
-    sales = truncate_text(st.session_state.get('sales', ''), 15)
-    test_date = st.session_state.get('test_date', datetime.now())
-    
-    # Company Header
-    elements.append(Spacer(1, 10))
-    elements.append(Paragraph(get_pdf_text("company", pdf_lang), company_style))
-    
-    # Title
-    elements.append(Paragraph(get_pdf_text("title", pdf_lang), title_style))
-    
-    # Location and date
-    china_tz = pytz.timezone('Asia/Shanghai')
-    current_time = datetime.now(china_tz)
-    
-    # Get location display based on language
-    location_display = get_location_display(selected_city, pdf_lang)
-    location_text = f"{get_pdf_text('test_location', pdf_lang)} {location_display}"
-    date_text = f"{get_pdf_text('report_date', pdf_lang)} {current_time.strftime('%Y-%m-%d')}"
-    
-    elements.append(Paragraph(location_text, subtitle_style))
-    elements.append(Paragraph(date_text, subtitle_style))
-    
-    elements.append(Paragraph("<hr width='80%' color='#10b981'/>", normal_style))
-    elements.append(Spacer(1, 15))
-    
-    # 1. Basic Information Table
-    elements.append(Paragraph(get_pdf_text("basic_info", pdf_lang), heading_style))
-    elements.append(Spacer(1, 5))
-    
-    basic_data = [
-        [
-            create_paragraph(get_pdf_text("report_no", pdf_lang), bold=True), 
-            create_paragraph(report_no), 
-            create_paragraph(get_pdf_text("date_no", pdf_lang), bold=True), 
-            create_paragraph(test_date.strftime('%Y-%m-%d') if hasattr(test_date, 'strftime') else str(test_date))
-        ],
-        [
-            create_paragraph(get_pdf_text("ci_no", pdf_lang), bold=True), 
-            create_paragraph(ci_no), 
-            create_paragraph(get_pdf_text("order_qty", pdf_lang), bold=True), 
-            create_paragraph(str(order_qty))
-        ],
-        [
-            create_paragraph(get_pdf_text("brand", pdf_lang), bold=True), 
-            create_paragraph(brand), 
-            create_paragraph(get_pdf_text("produced_qty", pdf_lang), bold=True), 
-            create_paragraph(str(produced_qty))
-        ],
-        [
-            create_paragraph(get_pdf_text("style_no", pdf_lang), bold=True), 
-            create_paragraph(style_no), 
-            create_paragraph(get_pdf_text("factory_trader", pdf_lang), bold=True), 
-            create_paragraph(factory)
-        ],
-        [
-            create_paragraph(get_pdf_text("sales", pdf_lang), bold=True), 
-            create_paragraph(sales), 
-            create_paragraph("", bold=True), 
-            create_paragraph("")
-        ]
-    ]
-    
-    basic_table = Table(basic_data, colWidths=[1.5*inch, 2.0*inch, 1.5*inch, 2.0*inch])
-    basic_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f0fdf4')),
-        ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#f0fdf4')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), bold_font),
-        ('FONTNAME', (2, 0), (2, -1), bold_font),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#d4d4d4')),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 8),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-        ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')])
-    ]))
-    elements.append(basic_table)
-    elements.append(Spacer(1, 15))
-    
-    # Standard note
-    elements.append(Paragraph(get_pdf_text("standard_note", pdf_lang), small_style))
-    elements.append(Spacer(1, 10))
-    
-    # 2. Adhesive/Pull Test
-    elements.append(PageBreak())
-    
-    elements.append(Paragraph(get_pdf_text("adhesive_test", pdf_lang), heading_style))
-    elements.append(Spacer(1, 5))
-    
-    # Get adhesive test values
-    flat_shoe_toe_result = truncate_text(st.session_state.get('flat_shoe_toe_result', ''), 8)
-    flat_shoe_forepart_result = truncate_text(st.session_state.get('flat_shoe_forepart_result', ''), 8)
-    flat_shoe_waist_result = truncate_text(st.session_state.get('flat_shoe_waist_result', ''), 8)
-    flat_shoe_heel_result = truncate_text(st.session_state.get('flat_shoe_heel_result', ''), 8)
-    
-    adhesive_data = [
-        [
-            create_paragraph(get_pdf_text("flat_shoe", pdf_lang), bold=True, small=True),
-            create_paragraph(get_pdf_text("standard", pdf_lang), bold=True, small=True),
-            create_paragraph(get_pdf_text("result", pdf_lang), bold=True, small=True),
-            create_paragraph(get_pdf_text("high_heel", pdf_lang), bold=True, small=True),
-            create_paragraph(get_pdf_text("sole_wedge", pdf_lang), bold=True, small=True),
-            create_paragraph(get_pdf_text("standard", pdf_lang), bold=True, small=True),
-            create_paragraph(get_pdf_text("remark", pdf_lang), bold=True, small=True)
-        ],
-        [
-            create_paragraph(get_pdf_text("toe", pdf_lang), small=True),
-            create_paragraph("12 kg / 3N", small=True),
-            create_paragraph(flat_shoe_toe_result, small=True),
-            create_paragraph(get_pdf_text("toe", pdf_lang), small=True),
-            create_paragraph("", small=True),
-            create_paragraph("12 kg / 3N", small=True),
-            create_paragraph("", small=True)
-        ],
-        [
-            create_paragraph(get_pdf_text("forepart", pdf_lang), small=True),
-            create_paragraph("12 kg / 3N", small=True),
-            create_paragraph(flat_shoe_forepart_result, small=True),
-            create_paragraph(get_pdf_text("forepart", pdf_lang), small=True),
-            create_paragraph("", small=True),
-            create_paragraph("12 kg / 3N", small=True),
-            create_paragraph("", small=True)
-        ],
-        [
-            create_paragraph(get_pdf_text("waist", pdf_lang), small=True),
-            create_paragraph("12 kg / 3N", small=True),
-            create_paragraph(flat_shoe_waist_result, small=True),
-            create_paragraph(get_pdf_text("waist", pdf_lang), small=True),
-            create_paragraph("", small=True),
-            create_paragraph("12 kg / 3N", small=True),
-            create_paragraph("", small=True)
-        ],
-        [
-            create_paragraph(get_pdf_text("heel", pdf_lang), small=True),
-            create_paragraph("", small=True),
-            create_paragraph(flat_shoe_heel_result, small=True),
-            create_paragraph(get_pdf_text("heel", pdf_lang), small=True),
-            create_paragraph("60 kg/500N / 80 kg/800N", small=True),
-            create_paragraph(f"{get_pdf_text('heel_height', pdf_lang)} {get_pdf_text('cm_5_8', pdf_lang)} / {get_pdf_text('above_8cm', pdf_lang)}", small=True),
-            create_paragraph("", small=True)
-        ]
-    ]
-    
-    adhesive_table = Table(adhesive_data, colWidths=[0.8*inch, 1.0*inch, 0.7*inch, 0.8*inch, 1.3*inch, 1.3*inch, 1.0*inch])
-    adhesive_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#059669')),
-        ('BACKGROUND', (3, 0), (-1, 0), colors.HexColor('#059669')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), bold_font),
-        ('FONTSIZE', (0, 0), (-1, -1), 7),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e0e0e0')),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')])
-    ]))
-    elements.append(adhesive_table)
-    elements.append(Spacer(1, 15))
-    
-    # 3. Components Physical Test
-    elements.append(Paragraph(get_pdf_text("components_test", pdf_lang), heading_style))
-    elements.append(Spacer(1, 5))
-    
-    # Get components test values
-    components_data = [
-        [
-            create_paragraph(get_pdf_text("item", pdf_lang), bold=True, small=True),
-            create_paragraph(get_pdf_text("standard", pdf_lang), bold=True, small=True),
-            create_paragraph(get_pdf_text("result", pdf_lang), bold=True, small=True),
-            create_paragraph(get_pdf_text("comments", pdf_lang), bold=True, small=True),
-            create_paragraph(get_pdf_text("item", pdf_lang), bold=True, small=True),
-            create_paragraph(get_pdf_text("standard", pdf_lang), bold=True, small=True),
-            create_paragraph(get_pdf_text("result", pdf_lang), bold=True, small=True),
-            create_paragraph(get_pdf_text("comments", pdf_lang), bold=True, small=True)
-        ]
-    ]
-    
-    # Add component test rows using fixed texts
-    components_list = [
-        (get_pdf_text("buckle", pdf_lang), get_pdf_text("buckle_std", pdf_lang), 
-         truncate_text(st.session_state.get('buckle_result', ''), 8), 
-         truncate_text(st.session_state.get('buckle_comments', ''), 12),
-         get_pdf_text("top_lift", pdf_lang), get_pdf_text("top_lift_std", pdf_lang), 
-         truncate_text(st.session_state.get('top_lift_result', ''), 8), 
-         truncate_text(st.session_state.get('top_lift_comments', ''), 12)),
-        
-        (get_pdf_text("strap", pdf_lang), get_pdf_text("strap_std", pdf_lang), 
-         truncate_text(st.session_state.get('strap_result', ''), 8), 
-         truncate_text(st.session_state.get('strap_comments', ''), 12),
-         get_pdf_text("loop", pdf_lang), get_pdf_text("loop_std", pdf_lang), 
-         truncate_text(st.session_state.get('loop_result', ''), 8), 
-         truncate_text(st.session_state.get('loop_comments', ''), 12)),
-        
-        (get_pdf_text("eyelet", pdf_lang), get_pdf_text("eyelet_std", pdf_lang), 
-         truncate_text(st.session_state.get('eyelet_result', ''), 8), 
-         truncate_text(st.session_state.get('eyelet_comments', ''), 12),
-         get_pdf_text("toe_post", pdf_lang), get_pdf_text("toe_post_std", pdf_lang), 
-         truncate_text(st.session_state.get('toe_post_result', ''), 8), 
-         truncate_text(st.session_state.get('toe_post_comments', ''), 12)),
-        
-        (get_pdf_text("studs", pdf_lang), get_pdf_text("studs_std", pdf_lang), 
-         truncate_text(st.session_state.get('studs_result', ''), 8), 
-         truncate_text(st.session_state.get('studs_comments', ''), 12),
-         get_pdf_text("zipper", pdf_lang), get_pdf_text("zipper_std", pdf_lang), 
-         truncate_text(st.session_state.get('zipper_result', ''), 8), 
-         truncate_text(st.session_state.get('zipper_comments', ''), 12)),
-        
-        (get_pdf_text("diamond_bow", pdf_lang), get_pdf_text("diamond_std", pdf_lang), 
-         truncate_text(st.session_state.get('diamond_result', ''), 8), 
-         truncate_text(st.session_state.get('diamond_comments', ''), 12),
-         get_pdf_text("perment_set", pdf_lang), get_pdf_text("perment_set_std", pdf_lang), 
-         truncate_text(st.session_state.get('perment_set_result', ''), 8), 
-         truncate_text(st.session_state.get('perment_set_comments', ''), 12))
-    ]
-    
-    for comp1, std1, res1, com1, comp2, std2, res2, com2 in components_list:
-        components_data.append([
-            create_paragraph(comp1, small=True),
-            create_paragraph(std1, small=True),
-            create_paragraph(res1, small=True),
-            create_paragraph(com1, small=True),
-            create_paragraph(comp2, small=True),
-            create_paragraph(std2, small=True),
-            create_paragraph(res2, small=True),
-            create_paragraph(com2, small=True)
-        ])
-    
-    components_table = Table(components_data, colWidths=[0.8*inch, 0.9*inch, 0.6*inch, 0.9*inch, 0.8*inch, 0.9*inch, 0.6*inch, 0.9*inch])
-    components_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#059669')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), bold_font),
-        ('FONTSIZE', (0, 0), (-1, -1), 6.5),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e0e0e0')),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')])
-    ]))
-    elements.append(components_table)
-    
-    # Rust Test
-    elements.append(Spacer(1, 10))
-    elements.append(Paragraph(get_pdf_text("rust_test_full", pdf_lang), subheading_style))
-    
-    rust_data = [
-        [
-            create_paragraph(get_pdf_text("buckle", pdf_lang)),
-            create_paragraph(truncate_text(st.session_state.get('rust_buckle_result', ''), 10)),
-            create_paragraph(get_pdf_text("eyelet", pdf_lang)),
-            create_paragraph(truncate_text(st.session_state.get('rust_eyelet_result', ''), 10))
-        ],
-        [
-            create_paragraph(get_pdf_text("strap", pdf_lang)),
-            create_paragraph(truncate_text(st.session_state.get('rust_strap_result', ''), 10)),
-            create_paragraph(get_pdf_text("studs", pdf_lang)),
-            create_paragraph(truncate_text(st.session_state.get('rust_studs_result', ''), 10))
-        ]
-    ]
-    
-    rust_table = Table(rust_data, colWidths=[1.5*inch, 1.5*inch, 1.5*inch, 1.5*inch])
-    rust_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e0e0e0')),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')])
-    ]))
-    elements.append(rust_table)
-    
-    elements.append(PageBreak())
-    
-    # 4. Flexing Test
-    elements.append(Paragraph(get_pdf_text("flexing_test", pdf_lang), heading_style))
-    elements.append(Spacer(1, 5))
-    
-    # Get flexing test values
-    flexing_data = [
-        [
-            create_paragraph(get_pdf_text("item", pdf_lang), bold=True),
-            create_paragraph(get_pdf_text("standard", pdf_lang), bold=True),
-            create_paragraph(get_pdf_text("result", pdf_lang), bold=True),
-            create_paragraph(get_pdf_text("comments", pdf_lang), bold=True)
-        ],
-        [
-            create_paragraph(get_pdf_text("upper", pdf_lang)),
-            create_paragraph(get_pdf_text("upper_std", pdf_lang)),
-            create_paragraph(truncate_text(st.session_state.get('upper_flex_result', ''), 10)),
-            create_paragraph(truncate_text(st.session_state.get('upper_flex_comments', ''), 30))
-        ],
-        [
-            create_paragraph(get_pdf_text("shoe_flex", pdf_lang)),
-            create_paragraph(get_pdf_text("shoe_flex_std", pdf_lang)),
-            create_paragraph(truncate_text(st.session_state.get('shoe_flex_result', ''), 10)),
-            create_paragraph(truncate_text(st.session_state.get('shoe_flex_comments', ''), 30))
-        ],
-        [
-            create_paragraph(get_pdf_text("foxing", pdf_lang)),
-            create_paragraph(get_pdf_text("foxing_std", pdf_lang)),
-            create_paragraph(truncate_text(st.session_state.get('foxing_result', ''), 10)),
-            create_paragraph(truncate_text(st.session_state.get('foxing_comments', ''), 30))
-        ]
-    ]
-    
-    flexing_table = Table(flexing_data, colWidths=[1.8*inch, 2.0*inch, 1.2*inch, 2.2*inch])
-    flexing_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#059669')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), bold_font),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e0e0e0')),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')])
-    ]))
-    elements.append(flexing_table)
-    
-    # 5. Abrasion Test
-    elements.append(Spacer(1, 15))
-    elements.append(Paragraph(get_pdf_text("abrasion_test", pdf_lang), heading_style))
-    elements.append(Spacer(1, 5))
-    
-    abrasion_data = [
-        [
-            create_paragraph(get_pdf_text("item", pdf_lang), bold=True),
-            create_paragraph(get_pdf_text("standard", pdf_lang), bold=True),
-            create_paragraph(get_pdf_text("result", pdf_lang), bold=True),
-            create_paragraph(get_pdf_text("comments", pdf_lang), bold=True)
-        ],
-        [
-            create_paragraph(get_pdf_text("top_lift_abrasion", pdf_lang)),
-            create_paragraph(""),
-            create_paragraph(truncate_text(st.session_state.get('top_lift_abrasion_result', ''), 10)),
-            create_paragraph(truncate_text(st.session_state.get('top_lift_abrasion_comments', ''), 30))
-        ],
-        [
-            create_paragraph(get_pdf_text("outsole_abrasion", pdf_lang)),
-            create_paragraph(get_pdf_text("outsole_abrasion_std", pdf_lang), small=True),
-            create_paragraph(truncate_text(st.session_state.get('outsole_abrasion_result', ''), 10)),
-            create_paragraph(truncate_text(st.session_state.get('outsole_abrasion_comments', ''), 30))
-        ]
-    ]
-    
-    abrasion_table = Table(abrasion_data, colWidths=[1.8*inch, 3.0*inch, 1.2*inch, 2.2*inch])
-    abrasion_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#059669')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), bold_font),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e0e0e0')),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')])
-    ]))
-    elements.append(abrasion_table)
-    
-    # 6. Resistance Test
-    elements.append(Spacer(1, 15))
-    elements.append(Paragraph(get_pdf_text("resistance_test", pdf_lang), heading_style))
-    elements.append(Spacer(1, 5))
-    
-    resistance_data = [
-        [
-            create_paragraph(get_pdf_text("item", pdf_lang), bold=True),
-            create_paragraph(get_pdf_text("standard", pdf_lang), bold=True),
-            create_paragraph(get_pdf_text("result", pdf_lang), bold=True),
-            create_paragraph(get_pdf_text("comments", pdf_lang), bold=True)
-        ],
-        [
-            create_paragraph(get_pdf_text("outsole_resistance", pdf_lang)),
-            create_paragraph(""),
-            create_paragraph(truncate_text(st.session_state.get('outsole_resistance_result', ''), 10)),
-            create_paragraph(truncate_text(st.session_state.get('outsole_resistance_comments', ''), 30))
-        ],
-        [
-            create_paragraph(get_pdf_text("heel_fatigue", pdf_lang)),
-            create_paragraph(get_pdf_text("heel_fatigue_std", pdf_lang), small=True),
-            create_paragraph(truncate_text(st.session_state.get('heel_fatigue_result', ''), 10)),
-            create_paragraph(truncate_text(st.session_state.get('heel_fatigue_comments', ''), 30))
-        ]
-    ]
-    
-    resistance_table = Table(resistance_data, colWidths=[1.8*inch, 3.0*inch, 1.2*inch, 2.2*inch])
-    resistance_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#059669')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), bold_font),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e0e0e0')),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')])
-    ]))
-    elements.append(resistance_table)
-    
-    # 7. Hardness Test
-    elements.append(Spacer(1, 15))
-    elements.append(Paragraph(get_pdf_text("hardness_test", pdf_lang), heading_style))
-    elements.append(Spacer(1, 5))
-    
-    hardness_data = [
-        [
-            create_paragraph(get_pdf_text("item", pdf_lang), bold=True),
-            create_paragraph(get_pdf_text("standard", pdf_lang), bold=True),
-            create_paragraph(get_pdf_text("result", pdf_lang), bold=True),
-            create_paragraph(get_pdf_text("comments", pdf_lang), bold=True)
-        ],
-        [
-            create_paragraph(get_pdf_text("eva_hardness", pdf_lang)),
-            create_paragraph(""),
-            create_paragraph(truncate_text(st.session_state.get('eva_hardness_result', ''), 10)),
-            create_paragraph(truncate_text(st.session_state.get('eva_hardness_comments', ''), 30))
-        ],
-        [
-            create_paragraph(get_pdf_text("outsole_hardness", pdf_lang)),
-            create_paragraph(""),
-            create_paragraph(truncate_text(st.session_state.get('outsole_hardness_result', ''), 10)),
-            create_paragraph(truncate_text(st.session_state.get('outsole_hardness_comments', ''), 30))
-        ]
-    ]
-    
-    hardness_table = Table(hardness_data, colWidths=[1.8*inch, 3.0*inch, 1.2*inch, 2.2*inch])
-    hardness_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#059669')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), bold_font),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e0e0e0')),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')])
-    ]))
-    elements.append(hardness_table)
-    
-    # 8. Conclusion - FIXED TO FIT WITHIN PAGE
-    elements.append(Spacer(1, 15))  # Reduced spacing
-    elements.append(Paragraph(get_pdf_text("conclusion", pdf_lang), heading_style))
-    elements.append(Spacer(1, 5))
-    
-    # Get conclusion values
-    pass_result = truncate_text(st.session_state.get('pass_result', ''), 35)  # Reduced from 50
-    fail_result = truncate_text(st.session_state.get('fail_result', ''), 35)  # Reduced from 50
-    accept_result = truncate_text(st.session_state.get('accept_result', ''), 35)  # Reduced from 50
-    
-    conclusion_data = [
-        [
-            create_paragraph(get_pdf_text("pass_label", pdf_lang), bold=True),
-            create_paragraph(pass_result, small=True),  # Use small font
-            create_paragraph(get_pdf_text("fail_label", pdf_lang), bold=True),
-            create_paragraph(fail_result, small=True),  # Use small font
-            create_paragraph(get_pdf_text("accept_label", pdf_lang), bold=True),
-            create_paragraph(accept_result, small=True)  # Use small font
-        ]
-    ]
-    
-    # Adjusted column widths to fit within page
-    conclusion_table = Table(conclusion_data, colWidths=[0.8*inch, 1.6*inch, 0.8*inch, 1.6*inch, 0.8*inch, 1.6*inch])
-    conclusion_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (0, -1), bold_font),
-        ('FONTNAME', (2, 0), (2, -1), bold_font),
-        ('FONTNAME', (4, 0), (4, -1), bold_font),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),  # Reduced font size
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e0e0e0')),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white])
-    ]))
-    elements.append(conclusion_table)
-    
-    # Signatures - Moved to new page if needed
-    elements.append(Spacer(1, 10))
-    
-    # Get signature values
-    verified_by = truncate_text(st.session_state.get('verified_by', ''), 20)
-    testing_person = truncate_text(st.session_state.get('testing_person', ''), 20)
-    
-    signature_data = [
-        [
-            create_paragraph(get_pdf_text("verified_by", pdf_lang), bold=True),
-            create_paragraph(verified_by),
-            create_paragraph(""),
-            create_paragraph(get_pdf_text("testing_person", pdf_lang), bold=True),
-            create_paragraph(testing_person)
-        ],
-        [
-            create_paragraph(""),
-            create_paragraph("_________________________"),
-            create_paragraph(""),
-            create_paragraph(""),
-            create_paragraph("_________________________")
-        ],
-        [
-            create_paragraph(""),
-            create_paragraph(get_pdf_text("signature", pdf_lang)),
-            create_paragraph(""),
-            create_paragraph(""),
-            create_paragraph(get_pdf_text("signature", pdf_lang))
-        ]
-    ]
-    
-    signature_table = Table(signature_data, colWidths=[1.2*inch, 2.3*inch, 0.5*inch, 1.2*inch, 2.3*inch])
-    signature_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), bold_font),
-        ('FONTNAME', (3, 0), (3, -1), bold_font),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-    ]))
-    elements.append(signature_table)
-    
-    elements.append(Spacer(1, 10))
-    elements.append(Paragraph(get_pdf_text("version", pdf_lang), normal_style))
-    
-    # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
+    for filename, problem in st.session_state.get(f"{section}_tester_problems", []):
+        st.warning(f"{ICONS['warning']} {filename}: {get_text(problem)}")
+
+def live_report_no():
+    return (st.session_state.get("report_no") or "").strip()
+
+def apply_live_readings():
+    """Copy readings instruments pushed for this report into its inputs;
+    only items changed since the last copy, so typed edits of others stay"""
+    report_no = live_report_no()
+    if not report_no:
+        return
+    seen_report, seen = st.session_state.get("live_version", ("", 0))
+    version, changed = LIVE_READINGS.changes(report_no, seen if seen_report == report_no else 0)
+    for result_key, values in changed.items():
+        st.session_state[measurement_key(result_key)] = values
+        st.session_state[readings_text_key(result_key)] = readings_text(values)
+        set_readings_problems(result_key)
+    st.session_state.live_version = (report_no, version)
+
+def watch_live_readings():
+    """Rerun the page as soon as an instrument pushed a reading for it"""
+    report_no = live_report_no()
+    seen_report, seen = st.session_state.get("live_version", ("", 0))
+    if report_no and LIVE_READINGS.version(report_no) > (seen if seen_report == report_no else 0):
+        st.rerun()
+    if ingest_status["error"]:
+        st.warning(f"{ICONS['warning']} Instrument listener: {ingest_status['error']}")
+        return
+    ports = [f"{kind} :{port}" for kind, port in (("ws", ingest_status["ws_port"]), ("tcp", ingest_status["tcp_port"])) if port]
+    st.caption(f"{ICONS['instrument']} Instruments: {', '.join(ports)} · report_no {report_no or '-'}")
+
+# Readings keys of a draft and the result keys whose typed text they fill
+DRAFT_READINGS = {measurement_key(item["result"]): item["result"] for item in MEASURED_ITEMS + RECORDED_ITEMS}
+
+def autosave_draft():
+    """Queue the fields changed since the last rerun as the draft of this
+    report number. Returns the report number if it already has a draft this
+    session did not write, which waits for Resume or Start over so that a
+    fresh form never overwrites it"""
+    report_no = live_report_no()
+    if drafts is None or not report_no:
+        return None
+    if st.session_state.get("draft_report") != report_no:
+        if drafts.exists(report_no):
+            return report_no
+        st.session_state.draft_report = report_no
+        st.session_state.draft_saved = {}
+    changes = changed_fields(collect_report_data(st.session_state), st.session_state.draft_saved)
+    if changes:
+        drafts.save(report_no, report_owner(), changes)
+    return None
+
+def choose_brand_profile():
+    """Switch to the standard profile written for the typed brand, if any;
+    other brands keep whatever profile was chosen"""
+    profile = profile_for_brand(st.session_state.brand)
+    if profile is not None:
+        st.session_state.standard_profile = st.session_state.standard_profile_select = profile
+
+def resume_draft(report_no):
+    """Fill the form from a saved draft and keep saving into it"""
+    for key, value in drafts.load(report_no).items():
+        if key in DRAFT_READINGS:
+            value = as_readings(value)
+            st.session_state[readings_text_key(DRAFT_READINGS[key])] = readings_text(value)
+            set_readings_problems(DRAFT_READINGS[key])
+        elif key == "test_date" and not value:
+            continue
+        elif key == "standard_profile":
+            if value and value not in standard_profiles():
+                continue
+            st.session_state.standard_profile_select = value
+        st.session_state[key] = value
+    st.session_state.draft_report = report_no
+    st.session_state.draft_saved = {}
+    changed_fields(collect_report_data(st.session_state), st.session_state.draft_saved)
+
+def start_over(report_no):
+    """Drop the saved draft of a report number and save this form instead"""
+    drafts.discard(report_no)
+    st.session_state.draft_report = report_no
+    st.session_state.draft_saved = {}
+
+def measurement_inputs(section, per_row=5):
+    """Specimen readings for the measured items of a section, with a material
+    or heel height choice where the limit depends on it; recorded items
+    (hardness) take readings without a limit"""
+    items = measured_section(section) + recorded_section(section)
+    standards = current_standards()
+    st.markdown(f"#### {ICONS['result']} {get_text('measurements')}")
+    if section in TESTER_SECTIONS:
+        tester_upload(section)
+    for start in range(0, len(items), per_row):
+        columns = st.columns(per_row)
+        for column, item in zip(columns, items[start:start + per_row]):
+            with column:
+                result_key = item["result"]
+                standard = item["standard"]
+                text_key = readings_text_key(result_key)
+                
+                # Readings loaded with a report (not typed) fill the input
+                if text_key not in st.session_state and measurement_key(result_key) in st.session_state:
+                    st.session_state[text_key] = readings_text(st.session_state[measurement_key(result_key)])
+                if standard is None:
+                    st.text_input(
+                        f"{item_text(item['label'])} ({item['unit']})",
+                        placeholder=f"{item['unit']}, {get_text('readings_placeholder')}",
+                        key=text_key,
+                        on_change=store_readings,
+                        args=(result_key,)
+                    )
+                    readings_feedback(result_key)
+                    continue
+                
+                variant = None
+                if standards.variants(standard):
+                    variant = st.selectbox(
+                        item_text(standards.variant_label(standard)),
+                        standards.variants(standard),
+                        format_func=lambda name, standard=standard, lang=st.session_state.ui_language: standards.variant_name(standard, name, lang),
+                        key=variant_key(result_key)
+                    )
+                item_limits = item_limit(item, variant, standards)
+                st.text_input(
+                    f"{item_text(item['label'])} ({limit_text(item_limits)})",
+                    placeholder=f"{item_limits['unit']}, {get_text('readings_placeholder')}",
+                    key=text_key,
+                    on_change=store_readings,
+                    args=(result_key,)
+                )
+                readings_feedback(result_key)
+                manual = standards.manual_checks(standard, variant, st.session_state.ui_language)
+                if manual:
+                    st.caption(f"{get_text('manual_check')}: {'; '.join(manual)}")
+    if measured_section(section):
+        st.caption(get_text("measured_result"))
 
 # Sidebar with enhanced filters
 with st.sidebar:
@@ -1452,11 +673,54 @@ with st.sidebar:
     
     pdf_language = st.selectbox(
         "PDF Report Language",
-        ["English", "Mandarin"],
-        index=0 if st.session_state.pdf_language == "en" else 1,
+        list(PDF_LANGUAGE_OPTIONS.keys()),
+        index=list(PDF_LANGUAGE_OPTIONS.values()).index(st.session_state.pdf_language),
         key="pdf_lang_select"
     )
-    st.session_state.pdf_language = "en" if pdf_language == "English" else "zh"
+    st.session_state.pdf_language = PDF_LANGUAGE_OPTIONS[pdf_language]
+    
+    if st.session_state.pdf_language == "both":
+        both_output = st.radio(
+            "Both Languages As",
+            ["Zip (EN + ZH)", "Bilingual PDF"],
+            index=0 if st.session_state.both_output == "zip" else 1,
+            key="both_output_select",
+            help="Zip renders both editions in parallel; Bilingual puts English and Chinese labels side by side"
+        )
+        st.session_state.both_output = "zip" if both_output.startswith("Zip") else "bilingual"
+    
+    output_profile = st.selectbox(
+        "Output Profile",
+        ["Email", "Archive"],
+        index=0 if st.session_state.output_profile == "email" else 1,
+        key="output_profile_select",
+        help="Email downsamples the logo and keeps reports small for sending; Archive keeps the full logo and embeds a Chinese TrueType font if one is installed"
+    )
+    st.session_state.output_profile = output_profile.lower()
+    
+    st.session_state.deterministic = st.checkbox(
+        "Reproducible Output",
+        value=st.session_state.deterministic,
+        key="deterministic_select",
+        help="Same report data gives a byte-identical file: timestamps come from the test date and the filename from the report content"
+    )
+    
+    st.session_state.background_render = st.checkbox(
+        "Background Rendering",
+        value=st.session_state.background_render,
+        key="background_render_select",
+        help="Queue the report as a job; it keeps rendering after a refresh and appears under My Reports"
+    )
+    
+    entry_mode = st.radio(
+        "Entry Mode",
+        ["Form", "Grid"],
+        index=0 if st.session_state.entry_mode == "form" else 1,
+        key="entry_mode_select",
+        horizontal=True,
+        help="Grid shows one editable table per test section for fast keyboard entry"
+    )
+    st.session_state.entry_mode = entry_mode.lower()
     
     # Location filter with enhanced UI
     st.markdown(f'#### {ICONS["location"]} Location Settings')
@@ -1470,16 +734,11 @@ with st.sidebar:
     st.session_state.selected_city = selected_city
     
     # Display selected location in a badge
-    st.markdown(f"""
-    <div class="location-badge">
-        {ICONS["location"]} {selected_city} ({CHINESE_CITIES[selected_city]})
-    </div>
-    """, unsafe_allow_html=True)
+    st.badge(f"{selected_city} ({CHINESE_CITIES[selected_city]})", icon=ICONS["location"], color="green")
     
     # Timezone information
     st.markdown(f'#### {ICONS["time"]} Timezone Info')
-    china_tz = pytz.timezone('Asia/Shanghai')
-    current_time = datetime.now(china_tz)
+    current_time = china_now()
     st.metric(
         "Local Time", 
         current_time.strftime('%H:%M:%S'),
@@ -1487,7 +746,7 @@ with st.sidebar:
     )
     
     # Translation status
-    if openai_client:
+    if openai_api_key:
         st.success(f"{ICONS['success']} Translation API: Active")
     else:
         st.warning(f"{ICONS['warning']} Translation API: Not Configured")
@@ -1496,6 +755,16 @@ with st.sidebar:
     
     # Test Standards Info
     st.markdown(f'#### {ICONS["standard"]} Test Standards')
+    profiles = {"": "Grand Step Company Standard", **standard_profiles()}
+    st.session_state.standard_profile = st.selectbox(
+        "Standard Profile",
+        list(profiles),
+        index=list(profiles).index(st.session_state.standard_profile)
+        if st.session_state.standard_profile in profiles else 0,
+        format_func=profiles.get,
+        key="standard_profile_select",
+        help="Customer or third-party lab limits from standard_profiles/; items they do not cover keep the company standard. Typing a brand a profile lists selects that profile"
+    )
     st.info(f"""
     {ICONS["info"]} **Important Note:**
     This is Grand Step Company Standard only.
@@ -1513,12 +782,29 @@ with st.sidebar:
     5. {ICONS["generate"]} Generate PDF report
     """)
 
+# Grid mode renders no per-item widgets, so keep their values as plain
+# session state; Streamlit drops state of widgets that are not rendered
+if st.session_state.entry_mode == "grid":
+    for item in TEST_ITEMS:
+        st.session_state[item["result"]] = st.session_state.get(item["result"], item["options"][0])
+        if item["comments"]:
+            st.session_state[item["comments"]] = st.session_state.get(item["comments"], "")
+
+# Readings from instruments and measured results go into session state
+# before the widgets are created; their state is read-only after that
+if ingest_status:
+    apply_live_readings()
+measured_results = derive_results(st.session_state, current_standards())
+st.session_state.update(measured_results)
+# Only queues the changed fields; a writer thread saves them
+draft_waiting = autosave_draft()
+
+def section_header(key):
+    """Section title as a plain subheader with a themed divider"""
+    st.subheader(f"{ICONS[key]} {get_text(key)}", divider="green", anchor=False)
+
 # Title with enhanced styling
-st.markdown(f"""
-<div class="main-header">
-    <span class="test-icon">🧪</span> Physical Test Report
-</div>
-""", unsafe_allow_html=True)
+st.title(f"{ICONS['title']} Physical Test Report", anchor=False)
 
 # Create tabs for better organization
 tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
@@ -1534,12 +820,7 @@ tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
 
 with tab1:
     # Basic Information Section
-    st.markdown(f"""
-    <div class="section-header">
-        <span class="section-header-icon">{ICONS["basic_info"]}</span>
-        {get_text("basic_info")}
-    </div>
-    """, unsafe_allow_html=True)
+    section_header("basic_info")
     
     # Main basic info in columns
     col1, col2 = st.columns(2)
@@ -1586,7 +867,8 @@ with tab1:
         brand = st.text_input(
             f"{ICONS['brand']} {get_text('brand')}", 
             placeholder="Brand Name",
-            key="brand"
+            key="brand",
+            on_change=choose_brand_profile
         )
         
         produced_qty = st.number_input(
@@ -1602,6 +884,16 @@ with tab1:
             key="sales"
         )
     
+    if draft_waiting:
+        st.warning(f"{ICONS['info']} {get_text('draft_found')} {draft_waiting}")
+        draft_col1, draft_col2 = st.columns(2)
+        with draft_col1:
+            st.button(get_text("resume_draft"), on_click=resume_draft, args=(draft_waiting,), key="draft_resume", use_container_width=True)
+        with draft_col2:
+            st.button(get_text("start_over"), on_click=start_over, args=(draft_waiting,), key="draft_start_over", use_container_width=True)
+    elif st.session_state.get("draft_report") and st.session_state.draft_report == live_report_no():
+        st.caption(f"{ICONS['success']} {get_text('draft_autosave')} {st.session_state.draft_report}")
+    
     # Standard note
     st.info(f"""
     {ICONS['warning']} **{get_text('standard_note')}**
@@ -1609,14 +901,10 @@ with tab1:
 
 with tab2:
     # Adhesive/Pull Test Section
-    st.markdown(f"""
-    <div class="section-header">
-        <span class="section-header-icon">{ICONS["adhesive_test"]}</span>
-        {get_text("adhesive_test")}
-    </div>
-    """, unsafe_allow_html=True)
+    section_header("adhesive_test")
     
     st.markdown(f"### {ICONS['pull_test']} Flat Shoe Tests")
+    measurement_inputs("flat_shoe")
     
     col1, col2, col3 = st.columns(3)
     
@@ -1626,6 +914,7 @@ with tab2:
             "Toe Result",
             ["Pass", "Fail", "Accept"],
             key="flat_shoe_toe_result",
+            disabled="flat_shoe_toe_result" in measured_results,
             label_visibility="collapsed"
         )
     
@@ -1635,6 +924,7 @@ with tab2:
             "Forepart Result",
             ["Pass", "Fail", "Accept"],
             key="flat_shoe_forepart_result",
+            disabled="flat_shoe_forepart_result" in measured_results,
             label_visibility="collapsed"
         )
     
@@ -1644,6 +934,7 @@ with tab2:
             "Waist Result",
             ["Pass", "Fail", "Accept"],
             key="flat_shoe_waist_result",
+            disabled="flat_shoe_waist_result" in measured_results,
             label_visibility="collapsed"
         )
     
@@ -1656,6 +947,7 @@ with tab2:
     )
     
     st.markdown(f"### {ICONS['pull_test']} High Heel Tests")
+    measurement_inputs("high_heel")
     
     col1, col2, col3 = st.columns(3)
     
@@ -1665,6 +957,7 @@ with tab2:
             "High Heel Toe Result",
             ["Pass", "Fail", "Accept"],
             key="high_heel_toe_result",
+            disabled="high_heel_toe_result" in measured_results,
             label_visibility="collapsed"
         )
     
@@ -1674,6 +967,7 @@ with tab2:
             "High Heel Forepart Result",
             ["Pass", "Fail", "Accept"],
             key="high_heel_forepart_result",
+            disabled="high_heel_forepart_result" in measured_results,
             label_visibility="collapsed"
         )
     
@@ -1683,6 +977,7 @@ with tab2:
             "High Heel Waist Result",
             ["Pass", "Fail", "Accept"],
             key="high_heel_waist_result",
+            disabled="high_heel_waist_result" in measured_results,
             label_visibility="collapsed"
         )
     
@@ -1691,276 +986,277 @@ with tab2:
         "High Heel Heel Result",
         ["Pass", "Fail", "Accept"],
         key="high_heel_heel_result",
+        disabled="high_heel_heel_result" in measured_results,
         label_visibility="collapsed"
     )
 
 with tab3:
     # Components Physical Test Section
-    st.markdown(f"""
-    <div class="section-header">
-        <span class="section-header-icon">{ICONS["components_test"]}</span>
-        {get_text("components_test")}
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Components Test Grid
-    st.markdown("#### Component Tests - Left Side")
+    section_header("components_test")
+    measurement_inputs("components")
     
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        buckle_result = st.selectbox("Buckle", ["Pass", "Fail", "Accept"], key="buckle_result")
-        strap_result = st.selectbox("Strap", ["Pass", "Fail", "Accept"], key="strap_result")
-        eyelet_result = st.selectbox("Eyelet", ["Pass", "Fail", "Accept"], key="eyelet_result")
-        studs_result = st.selectbox("Studs", ["Pass", "Fail", "Accept"], key="studs_result")
-        diamond_result = st.selectbox("Diamond/Bow", ["Pass", "Fail", "Accept"], key="diamond_result")
-    
-    with col2:
-        buckle_comments = st.text_input("Buckle Comments", key="buckle_comments", placeholder="Comments...")
-        strap_comments = st.text_input("Strap Comments", key="strap_comments", placeholder="Comments...")
-        eyelet_comments = st.text_input("Eyelet Comments", key="eyelet_comments", placeholder="Comments...")
-        studs_comments = st.text_input("Studs Comments", key="studs_comments", placeholder="Comments...")
-        diamond_comments = st.text_input("Diamond Comments", key="diamond_comments", placeholder="Comments...")
-    
-    st.markdown("#### Component Tests - Right Side")
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        top_lift_result = st.selectbox("Top Lift", ["Pass", "Fail", "Accept"], key="top_lift_result")
-        loop_result = st.selectbox("Loop", ["Pass", "Fail", "Accept"], key="loop_result")
-        toe_post_result = st.selectbox("Toe Post", ["Pass", "Fail", "Accept"], key="toe_post_result")
-        zipper_result = st.selectbox("Zipper", ["Pass", "Fail", "Accept"], key="zipper_result")
-        perment_set_result = st.selectbox("Perment Set", ["Pass", "Fail", "Accept"], key="perment_set_result")
-    
-    with col2:
-        top_lift_comments = st.text_input("Top Lift Comments", key="top_lift_comments", placeholder="Comments...")
-        loop_comments = st.text_input("Loop Comments", key="loop_comments", placeholder="Comments...")
-        toe_post_comments = st.text_input("Toe Post Comments", key="toe_post_comments", placeholder="Comments...")
-        zipper_comments = st.text_input("Zipper Comments", key="zipper_comments", placeholder="Comments...")
-        perment_set_comments = st.text_input("Perment Set Comments", key="perment_set_comments", placeholder="Comments...")
-    
-    # Rust Test
-    st.markdown(f"### {ICONS['rust_test']} {get_text('rust_test')}")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        rust_buckle_result = st.selectbox("Rust Buckle", ["Pass", "Fail"], key="rust_buckle_result")
-        rust_strap_result = st.selectbox("Rust Strap", ["Pass", "Fail"], key="rust_strap_result")
-    
-    with col2:
-        rust_eyelet_result = st.selectbox("Rust Eyelet", ["Pass", "Fail"], key="rust_eyelet_result")
-        rust_studs_result = st.selectbox("Rust Studs", ["Pass", "Fail"], key="rust_studs_result")
+    if st.session_state.entry_mode == "grid":
+        test_item_grid("components")
+        
+        # Rust Test
+        st.markdown(f"### {ICONS['rust_test']} {get_text('rust_test')}")
+        test_item_grid("rust")
+    else:
+        # Components Test Grid
+        st.markdown("#### Component Tests - Left Side")
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            buckle_result = st.selectbox("Buckle", ["Pass", "Fail", "Accept"], key="buckle_result", disabled="buckle_result" in measured_results)
+            strap_result = st.selectbox("Strap", ["Pass", "Fail", "Accept"], key="strap_result", disabled="strap_result" in measured_results)
+            eyelet_result = st.selectbox("Eyelet", ["Pass", "Fail", "Accept"], key="eyelet_result", disabled="eyelet_result" in measured_results)
+            studs_result = st.selectbox("Studs", ["Pass", "Fail", "Accept"], key="studs_result", disabled="studs_result" in measured_results)
+            diamond_result = st.selectbox("Diamond/Bow", ["Pass", "Fail", "Accept"], key="diamond_result", disabled="diamond_result" in measured_results)
+        
+        with col2:
+            buckle_comments = st.text_input("Buckle Comments", key="buckle_comments", placeholder="Comments...")
+            strap_comments = st.text_input("Strap Comments", key="strap_comments", placeholder="Comments...")
+            eyelet_comments = st.text_input("Eyelet Comments", key="eyelet_comments", placeholder="Comments...")
+            studs_comments = st.text_input("Studs Comments", key="studs_comments", placeholder="Comments...")
+            diamond_comments = st.text_input("Diamond Comments", key="diamond_comments", placeholder="Comments...")
+        
+        st.markdown("#### Component Tests - Right Side")
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            top_lift_result = st.selectbox("Top Lift", ["Pass", "Fail", "Accept"], key="top_lift_result", disabled="top_lift_result" in measured_results)
+            loop_result = st.selectbox("Loop", ["Pass", "Fail", "Accept"], key="loop_result", disabled="loop_result" in measured_results)
+            toe_post_result = st.selectbox("Toe Post", ["Pass", "Fail", "Accept"], key="toe_post_result", disabled="toe_post_result" in measured_results)
+            zipper_result = st.selectbox("Zipper", ["Pass", "Fail", "Accept"], key="zipper_result", disabled="zipper_result" in measured_results)
+            perment_set_result = st.selectbox("Perment Set", ["Pass", "Fail", "Accept"], key="perment_set_result", disabled="perment_set_result" in measured_results)
+        
+        with col2:
+            top_lift_comments = st.text_input("Top Lift Comments", key="top_lift_comments", placeholder="Comments...")
+            loop_comments = st.text_input("Loop Comments", key="loop_comments", placeholder="Comments...")
+            toe_post_comments = st.text_input("Toe Post Comments", key="toe_post_comments", placeholder="Comments...")
+            zipper_comments = st.text_input("Zipper Comments", key="zipper_comments", placeholder="Comments...")
+            perment_set_comments = st.text_input("Perment Set Comments", key="perment_set_comments", placeholder="Comments...")
+        
+        # Rust Test
+        st.markdown(f"### {ICONS['rust_test']} {get_text('rust_test')}")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            rust_buckle_result = st.selectbox("Rust Buckle", ["Pass", "Fail"], key="rust_buckle_result")
+            rust_strap_result = st.selectbox("Rust Strap", ["Pass", "Fail"], key="rust_strap_result")
+        
+        with col2:
+            rust_eyelet_result = st.selectbox("Rust Eyelet", ["Pass", "Fail"], key="rust_eyelet_result")
+            rust_studs_result = st.selectbox("Rust Studs", ["Pass", "Fail"], key="rust_studs_result")
 
 with tab4:
     # Flexing Test Section
-    st.markdown(f"""
-    <div class="section-header">
-        <span class="section-header-icon">{ICONS["flexing_test"]}</span>
-        {get_text("flexing_test")}
-    </div>
-    """, unsafe_allow_html=True)
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.markdown(f"**{get_text('upper')}**")
-        upper_flex_result = st.selectbox(
-            "Upper Flex Result",
-            ["Pass", "Fail", "Accept"],
-            key="upper_flex_result",
-            label_visibility="collapsed"
-        )
-    
-    with col2:
-        st.markdown(f"**{get_text('shoe_flex')}**")
-        shoe_flex_result = st.selectbox(
-            "Shoe Flex Result",
-            ["Pass", "Fail", "Accept"],
-            key="shoe_flex_result",
-            label_visibility="collapsed"
-        )
-    
-    with col3:
-        st.markdown(f"**{get_text('foxing')}**")
-        foxing_result = st.selectbox(
-            "Foxing Result",
-            ["Pass", "Fail", "Accept"],
-            key="foxing_result",
-            label_visibility="collapsed"
-        )
-    
-    # Comments
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        upper_flex_comments = st.text_input(
-            "Upper Flex Comments",
-            key="upper_flex_comments",
-            placeholder="Comments..."
-        )
-    
-    with col2:
-        shoe_flex_comments = st.text_input(
-            "Shoe Flex Comments",
-            key="shoe_flex_comments",
-            placeholder="Comments..."
-        )
+    section_header("flexing_test")
+    measurement_inputs("flexing")
     
-    with col3:
-        foxing_comments = st.text_input(
-            "Foxing Comments",
-            key="foxing_comments",
-            placeholder="Comments..."
-        )
+    if st.session_state.entry_mode == "grid":
+        test_item_grid("flexing")
+    else:
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.markdown(f"**{get_text('upper')}**")
+            upper_flex_result = st.selectbox(
+                "Upper Flex Result",
+                ["Pass", "Fail", "Accept"],
+                key="upper_flex_result",
+                disabled="upper_flex_result" in measured_results,
+                label_visibility="collapsed"
+            )
+        
+        with col2:
+            st.markdown(f"**{get_text('shoe_flex')}**")
+            shoe_flex_result = st.selectbox(
+                "Shoe Flex Result",
+                ["Pass", "Fail", "Accept"],
+                key="shoe_flex_result",
+                disabled="shoe_flex_result" in measured_results,
+                label_visibility="collapsed"
+            )
+        
+        with col3:
+            st.markdown(f"**{get_text('foxing')}**")
+            foxing_result = st.selectbox(
+                "Foxing Result",
+                ["Pass", "Fail", "Accept"],
+                key="foxing_result",
+                disabled="foxing_result" in measured_results,
+                label_visibility="collapsed"
+            )
+        
+        # Comments
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            upper_flex_comments = st.text_input(
+                "Upper Flex Comments",
+                key="upper_flex_comments",
+                placeholder="Comments..."
+            )
+        
+        with col2:
+            shoe_flex_comments = st.text_input(
+                "Shoe Flex Comments",
+                key="shoe_flex_comments",
+                placeholder="Comments..."
+            )
+        
+        with col3:
+            foxing_comments = st.text_input(
+                "Foxing Comments",
+                key="foxing_comments",
+                placeholder="Comments..."
+            )
 
 with tab5:
     # Abrasion Test Section
-    st.markdown(f"""
-    <div class="section-header">
-        <span class="section-header-icon">{ICONS["abrasion_test"]}</span>
-        {get_text("abrasion_test")}
-    </div>
-    """, unsafe_allow_html=True)
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown(f"**{get_text('top_lift')}**")
-        top_lift_abrasion_result = st.selectbox(
-            "Top Lift Abrasion Result",
-            ["Pass", "Fail", "Accept"],
-            key="top_lift_abrasion_result",
-            label_visibility="collapsed"
-        )
-    
-    with col2:
-        st.markdown(f"**{get_text('outsole_abrasion')}**")
-        outsole_abrasion_result = st.selectbox(
-            "Outsole Abrasion Result",
-            ["Pass", "Fail", "Accept"],
-            key="outsole_abrasion_result",
-            label_visibility="collapsed"
-        )
-    
-    # Comments
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        top_lift_abrasion_comments = st.text_input(
-            "Top Lift Abrasion Comments",
-            key="top_lift_abrasion_comments",
-            placeholder="Comments..."
-        )
+    section_header("abrasion_test")
+    measurement_inputs("abrasion")
     
-    with col2:
-        outsole_abrasion_comments = st.text_input(
-            "Outsole Abrasion Comments",
-            key="outsole_abrasion_comments",
-            placeholder="Comments..."
-        )
+    if st.session_state.entry_mode == "grid":
+        test_item_grid("abrasion")
+    else:
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown(f"**{get_text('top_lift')}**")
+            top_lift_abrasion_result = st.selectbox(
+                "Top Lift Abrasion Result",
+                ["Pass", "Fail", "Accept"],
+                key="top_lift_abrasion_result",
+                label_visibility="collapsed"
+            )
+        
+        with col2:
+            st.markdown(f"**{get_text('outsole_abrasion')}**")
+            outsole_abrasion_result = st.selectbox(
+                "Outsole Abrasion Result",
+                ["Pass", "Fail", "Accept"],
+                key="outsole_abrasion_result",
+                disabled="outsole_abrasion_result" in measured_results,
+                label_visibility="collapsed"
+            )
+        
+        # Comments
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            top_lift_abrasion_comments = st.text_input(
+                "Top Lift Abrasion Comments",
+                key="top_lift_abrasion_comments",
+                placeholder="Comments..."
+            )
+        
+        with col2:
+            outsole_abrasion_comments = st.text_input(
+                "Outsole Abrasion Comments",
+                key="outsole_abrasion_comments",
+                placeholder="Comments..."
+            )
 
 with tab6:
     # Resistance Test Section
-    st.markdown(f"""
-    <div class="section-header">
-        <span class="section-header-icon">{ICONS["resistance_test"]}</span>
-        {get_text("resistance_test")}
-    </div>
-    """, unsafe_allow_html=True)
-    
-    col1, col2 = st.columns(2)
+    section_header("resistance_test")
+    measurement_inputs("resistance")
     
-    with col1:
-        st.markdown(f"**{get_text('outsole')}**")
-        outsole_resistance_result = st.selectbox(
-            "Outsole Resistance Result",
-            ["Pass", "Fail", "Accept"],
-            key="outsole_resistance_result",
-            label_visibility="collapsed"
-        )
-    
-    with col2:
-        st.markdown(f"**{get_text('heel_fatigue')}**")
-        heel_fatigue_result = st.selectbox(
-            "Heel Fatigue Result",
-            ["Pass", "Fail", "Accept"],
-            key="heel_fatigue_result",
-            label_visibility="collapsed"
-        )
-    
-    # Comments
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        outsole_resistance_comments = st.text_input(
-            "Outsole Resistance Comments",
-            key="outsole_resistance_comments",
-            placeholder="Comments..."
-        )
-    
-    with col2:
-        heel_fatigue_comments = st.text_input(
-            "Heel Fatigue Comments",
-            key="heel_fatigue_comments",
-            placeholder="Comments..."
-        )
+    if st.session_state.entry_mode == "grid":
+        test_item_grid("resistance")
+    else:
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown(f"**{get_text('outsole')}**")
+            outsole_resistance_result = st.selectbox(
+                "Outsole Resistance Result",
+                ["Pass", "Fail", "Accept"],
+                key="outsole_resistance_result",
+                label_visibility="collapsed"
+            )
+        
+        with col2:
+            st.markdown(f"**{get_text('heel_fatigue')}**")
+            heel_fatigue_result = st.selectbox(
+                "Heel Fatigue Result",
+                ["Pass", "Fail", "Accept"],
+                key="heel_fatigue_result",
+                disabled="heel_fatigue_result" in measured_results,
+                label_visibility="collapsed"
+            )
+        
+        # Comments
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            outsole_resistance_comments = st.text_input(
+                "Outsole Resistance Comments",
+                key="outsole_resistance_comments",
+                placeholder="Comments..."
+            )
+        
+        with col2:
+            heel_fatigue_comments = st.text_input(
+                "Heel Fatigue Comments",
+                key="heel_fatigue_comments",
+                placeholder="Comments..."
+            )
 
 with tab7:
     # Hardness Test Section
-    st.markdown(f"""
-    <div class="section-header">
-        <span class="section-header-icon">{ICONS["hardness_test"]}</span>
-        {get_text("hardness_test")}
-    </div>
-    """, unsafe_allow_html=True)
+    section_header("hardness_test")
     
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown(f"**{get_text('eva')}**")
-        eva_hardness_result = st.selectbox(
-            "EVA Hardness Result",
-            ["Pass", "Fail", "Accept"],
-            key="eva_hardness_result",
-            label_visibility="collapsed"
-        )
+    measurement_inputs("hardness")
     
-    with col2:
-        st.markdown(f"**{get_text('outsole_hardness')}**")
-        outsole_hardness_result = st.selectbox(
-            "Outsole Hardness Result",
-            ["Pass", "Fail", "Accept"],
-            key="outsole_hardness_result",
-            label_visibility="collapsed"
-        )
-    
-    # Comments
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        eva_hardness_comments = st.text_input(
-            "EVA Hardness Comments",
-            key="eva_hardness_comments",
-            placeholder="Comments..."
-        )
-    
-    with col2:
-        outsole_hardness_comments = st.text_input(
-            "Outsole Hardness Comments",
-            key="outsole_hardness_comments",
-            placeholder="Comments..."
-        )
+    if st.session_state.entry_mode == "grid":
+        test_item_grid("hardness")
+    else:
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown(f"**{get_text('eva')}**")
+            eva_hardness_result = st.selectbox(
+                "EVA Hardness Result",
+                ["Pass", "Fail", "Accept"],
+                key="eva_hardness_result",
+                label_visibility="collapsed"
+            )
+        
+        with col2:
+            st.markdown(f"**{get_text('outsole_hardness')}**")
+            outsole_hardness_result = st.selectbox(
+                "Outsole Hardness Result",
+                ["Pass", "Fail", "Accept"],
+                key="outsole_hardness_result",
+                label_visibility="collapsed"
+            )
+        
+        # Comments
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            eva_hardness_comments = st.text_input(
+                "EVA Hardness Comments",
+                key="eva_hardness_comments",
+                placeholder="Comments..."
+            )
+        
+        with col2:
+            outsole_hardness_comments = st.text_input(
+                "Outsole Hardness Comments",
+                key="outsole_hardness_comments",
+                placeholder="Comments..."
+            )
 
 with tab8:
     # Conclusion and Signatures
-    st.markdown(f"""
-    <div class="section-header">
-        <span class="section-header-icon">{ICONS["conclusion"]}</span>
-        {get_text("conclusion")}
-    </div>
-    """, unsafe_allow_html=True)
+    section_header("conclusion")
     
     # Overall Conclusion
     st.markdown("### Overall Test Results")
@@ -1995,12 +1291,7 @@ with tab8:
         )
     
     # Signatures
-    st.markdown(f"""
-    <div class="section-header">
-        <span class="section-header-icon">{ICONS["signatures"]}</span>
-        {get_text("signatures")}
-    </div>
-    """, unsafe_allow_html=True)
+    section_header("signatures")
     
     col1, col2 = st.columns(2)
     
@@ -2018,65 +1309,301 @@ with tab8:
             key="testing_person"
         )
 
+def record_measurements(report_data):
+    """Measurements of a generated report for the control charts; a
+    failure there never costs the user the report"""
+    from spc import record_report
+    try:
+        record_report(report_data)
+    except Exception as e:
+        st.warning(f"{ICONS['warning']} SPC: {e}")
+
+def render_request(selected_city):
+    """Report data, languages, zip flag and filename for the current settings"""
+    report_data = collect_report_data(st.session_state)
+    pdf_lang = st.session_state.pdf_language
+    zip_output = pdf_lang == "both" and st.session_state.both_output == "zip"
+    if zip_output:
+        langs = ("en", "zh")
+    else:
+        langs = ("bi" if pdf_lang == "both" else pdf_lang,)
+    basename = report_basename(
+        report_data, selected_city, pdf_lang, st.session_state.both_output,
+        st.session_state.output_profile, deterministic=st.session_state.deterministic
+    )
+    return report_data, langs, zip_output, basename
+
 # Generate PDF Button
 st.markdown("---")
 col1, col2, col3 = st.columns([1, 2, 1])
 with col2:
-    if st.button(f"{ICONS['generate']} {get_text('generate_pdf')}", use_container_width=True):
+    if st.button(f"{ICONS['generate']} {get_text('generate_pdf')}", type="primary", use_container_width=True):
         if not st.session_state.get('ci_no') or not st.session_state.get('style_no'):
             st.error(f"{ICONS['error']} {get_text('fill_required')}")
+        elif st.session_state.get("readings_problems"):
+            st.error(f"{ICONS['error']} {get_text('fix_readings')}")
+        elif st.session_state.background_render:
+            # Durable job: survives refreshes and frees the script thread
+            report_data, langs, zip_output, basename = render_request(selected_city)
+            job_id = enqueue(
+                report_owner(), report_data, selected_city, st.session_state.output_profile,
+                langs, basename, zip_output, st.session_state.deterministic
+            )
+            st.success(f"{ICONS['success']} {get_text('job_queued')}: {job_id[:8]}")
         else:
             with st.spinner(f"{ICONS['time']} {get_text('creating_pdf')}"):
                 try:
-                    pdf_buffer = generate_pdf()
+                    from report_pdf import pdf_size_info
+                    report_data, langs, zip_output, basename = render_request(selected_city)
+                    pdf_lang = st.session_state.pdf_language
+                    profile = st.session_state.output_profile
+                    deterministic = st.session_state.deterministic
+                    
+                    # Rendering runs in the server-wide process pool so other
+                    # sessions' reruns are not stalled behind ReportLab
+                    futures = submit_renders(report_data, selected_city, profile, langs, deterministic, PROFILE_MODE)
+                    render_status_box = st.empty()
+                    while not all(future.done() for future in futures.values()):
+                        render_state, ahead = render_status(futures.values())
+                        if render_state == "queued":
+                            render_status_box.info(f"{ICONS['time']} {get_text('render_queued')}: {ahead} {get_text('reports_ahead')}")
+                        else:
+                            render_status_box.info(f"{ICONS['process']} {get_text('rendering')}")
+                        wait(futures.values(), timeout=0.25)
+                    render_status_box.empty()
+                    editions = {lang: future.result() for lang, future in futures.items()}
+                    record_measurements(report_data)
+                    
+                    if zip_output:
+                        sizes = [pdf_size_info(pdf_bytes, profile) for pdf_bytes in editions.values()]
+                        pdf_size, size_budget, _ = max(sizes)
+                        within_budget = all(within for _, _, within in sizes)
+                        download_data = editions_zip(editions, basename, deterministic)
+                        filename = f"{basename}.zip"
+                        mime = "application/zip"
+                    else:
+                        download_data = editions[langs[0]]
+                        pdf_size, size_budget, within_budget = pdf_size_info(download_data, profile)
+                        filename = f"{basename}.pdf"
+                        mime = "application/pdf"
+                    
                     st.success(f"{ICONS['success']} {get_text('generate_success')}")
+                    if not within_budget:
+                        st.warning(f"{ICONS['warning']} {get_text('size_over_budget')}: {pdf_size / 1024:.1f} KB > {size_budget / 1024:.0f} KB")
                     
                     # Display PDF preview info
                     with st.expander(f"{ICONS['info']} {get_text('pdf_details')}"):
                         col_info1, col_info2 = st.columns(2)
                         with col_info1:
                             st.metric(get_text("location"), f"{selected_city} ({CHINESE_CITIES[selected_city]})")
-                            st.metric(get_text("report_language"), "Mandarin" if st.session_state.pdf_language == "zh" else "English")
+                            st.metric(get_text("report_language"), PDF_LANGUAGE_LABELS[pdf_lang])
                         with col_info2:
-                            china_tz = pytz.timezone('Asia/Shanghai')
-                            current_time = datetime.now(china_tz)
+                            current_time = china_now()
                             st.metric(get_text("generated"), current_time.strftime('%H:%M:%S'))
+                            st.metric(get_text("file_size"), f"{pdf_size / 1024:.1f} KB")
                     
                     # Download button
-                    filename = f"Physical_Test_Report_{st.session_state.get('ci_no', '')}_{selected_city}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
                     st.download_button(
                         label=f"{ICONS['download']} {get_text('download_pdf')}",
-                        data=pdf_buffer,
+                        data=download_data,
                         file_name=filename,
-                        mime="application/pdf",
+                        mime=mime,
                         use_container_width=True
                     )
                     
+                except RenderQueueFull:
+                    st.warning(f"{ICONS['warning']} {get_text('render_queue_full')}")
                 except Exception as e:
                     st.error(f"{ICONS['error']} {get_text('error_generating')}: {str(e)}")
 
+# My Reports: background jobs of this owner, polled while any are pending
+def choose_download(job_id):
+    st.session_state.download_job = job_id
+
+def show_my_reports():
+    jobs = list_jobs(report_owner())
+    if not jobs:
+        st.caption(get_text("no_reports"))
+        return
+    for job in jobs:
+        job_col1, job_col2, job_col3 = st.columns([3, 1, 1])
+        with job_col1:
+            created = datetime.fromtimestamp(job["created"], CHINA_TZ).strftime('%Y-%m-%d %H:%M:%S')
+            st.markdown(f"**{job['filename']}**  \n{created}")
+        with job_col2:
+            if job["status"] == QUEUED:
+                st.write(f"{ICONS['time']} {get_text('render_queued')} ({queue_position(job)} {get_text('reports_ahead')})")
+            elif job["status"] == RENDERING:
+                st.write(f"{ICONS['process']} {get_text('rendering')}")
+            elif job["status"] == FAILED:
+                st.write(f"{ICONS['error']} {get_text('error_generating')}")
+            else:
+                st.write(f"{ICONS['success']} {job['size'] / 1024:.1f} KB")
+        with job_col3:
+            # Only the chosen report's file is read and sent to the browser;
+            # the others stay on disk
+            if not artifact_available(job):
+                pass
+            elif st.session_state.get("download_job") == job["id"]:
+                artifact = read_artifact(job)
+                if artifact is not None:
+                    st.download_button(
+                        label=f"{ICONS['download']}",
+                        data=artifact,
+                        file_name=job["filename"],
+                        mime=job["mime"],
+                        type="primary",
+                        key=f"job_download_{job['id']}"
+                    )
+            else:
+                st.button(
+                    ICONS["po"],
+                    help=get_text("prepare_download"),
+                    on_click=choose_download,
+                    args=(job["id"],),
+                    key=f"job_prepare_{job['id']}"
+                )
+    
+    # Stop polling once everything has finished
+    pending = any(job["status"] in PENDING_STATES for job in jobs)
+    if st.session_state.get("jobs_pending") and not pending:
+        st.session_state.jobs_pending = False
+        st.rerun()
+    st.session_state.jobs_pending = pending
+
+# Process control over all stored reports; charts load only when asked for
+def spc_chart(chart, value, title, tooltip):
+    """Altair line of value with its centre line, control limits and the
+    points that broke a rule"""
+    import altair as alt
+    base = alt.Chart(chart).encode(x=alt.X("day:T", title=None))
+    line = base.mark_line(point=True, color="#059669", strokeWidth=1).encode(
+        y=alt.Y(f"{value}:Q", title=title, scale=alt.Scale(zero=False)),
+        tooltip=tooltip
+    )
+    prefix = "r_" if value == "range" else ""
+    limits = [
+        base.mark_line(interpolate="step-after", color=color, strokeDash=dash, strokeWidth=1).encode(y=f"{prefix}{column}:Q")
+        for column, color, dash in (("cl", "#6b7280", [1, 0]), ("ucl", "#dc2626", [4, 3]), ("lcl", "#dc2626", [4, 3]))
+    ]
+    alerts = base.transform_filter(alt.datum.rules != "").mark_point(color="#dc2626", size=70, filled=True).encode(
+        y=f"{value}:Q", tooltip=tooltip + ["rules:N"]
+    )
+    return alt.layer(line, *limits, alerts).properties(height=220)
+
+def show_spc():
+    from spc import SPC_ITEMS, connect_spc, control_limits, factories, load_points, p_chart, xbar_r
+    items = {item["result"]: item for item in MEASURED_ITEMS + RECORDED_ITEMS}
+    labels = {
+        key: f"{item_text(item['section'])} {item_text(item['label'])}" if item["section"] in ("flat_shoe", "high_heel") else item_text(item["label"])
+        for key, item in items.items()
+    }
+    charts = {"xbar_r": get_text("xbar_r_chart"), "p": get_text("p_chart")}
+    all_factories = get_text("all_factories")
+    
+    with closing(connect_spc()) as conn:
+        col1, col2, col3 = st.columns([2, 2, 3])
+        with col1:
+            item_key = st.selectbox(get_text("item"), SPC_ITEMS, format_func=labels.get, key="spc_item")
+        with col2:
+            factory = st.selectbox(
+                get_text("factory"), [""] + factories(conn, item_key),
+                format_func=lambda name, all_factories=all_factories: name or all_factories,
+                key="spc_factory"
+            )
+        with col3:
+            chart_kind = st.radio("Chart", list(charts), format_func=charts.get, horizontal=True, key="spc_chart", label_visibility="hidden")
+        limits = control_limits(conn, item_key, factory or None)
+        points = load_points(conn, item_key, factory or None)
+    
+    if chart_kind == "xbar_r":
+        chart = xbar_r(points, limits)
+        if chart.empty:
+            st.info(get_text("no_spc_data"))
+            return
+        st.caption(f"X̿ {limits['center']:.4g} · σ̂ {limits['sigma']:.4g} · {len(chart)} subgroups")
+        shown = chart.tail(SPC_CHART_POINTS)
+        tooltip = ["day:T", "report:N", "factory:N", "n:Q", "mean:Q", "range:Q"]
+        st.altair_chart(spc_chart(shown, "mean", "X̄", tooltip), use_container_width=True)
+        st.altair_chart(spc_chart(shown, "range", "R", tooltip), use_container_width=True)
+        columns = ["day", "report", "factory", "n", "mean", "range", "rules"]
+    else:
+        chart = p_chart(points, limits)
+        if chart.empty:
+            st.info(get_text("no_spc_data"))
+            return
+        st.caption(f"p̄ {limits['p']:.2%} · {int(chart['reports'].sum())} reports")
+        shown = chart.tail(SPC_CHART_POINTS)
+        st.altair_chart(spc_chart(shown, "p", "p", ["day:T", "reports:Q", "failures:Q", "p:Q"]), use_container_width=True)
+        columns = ["day", "reports", "failures", "p", "rules"]
+    
+    alerts = chart[chart["rules"] != ""]
+    st.markdown(f"**{get_text('spc_alerts')}** ({len(alerts)})")
+    st.caption(get_text("spc_rules"))
+    if not alerts.empty:
+        st.dataframe(alerts[columns].iloc[::-1].head(50), hide_index=True, use_container_width=True)
+
+jobs_pending = any(job["status"] in PENDING_STATES for job in list_jobs(report_owner()))
+st.session_state.jobs_pending = jobs_pending
+with st.expander(f"{ICONS['po']} {get_text('my_reports')}", expanded=jobs_pending):
+    st.fragment(show_my_reports, run_every=JOB_POLL_SECONDS if jobs_pending else None)()
+
+with st.expander(f"{ICONS['result']} {get_text('spc')}"):
+    if st.toggle(get_text("show_spc"), key="show_spc"):
+        show_spc()
+
 # Footer
 st.markdown("---")
-st.markdown(f"""
-<div class="footer">
-    <p style='font-size: 1.2rem; font-weight: 600; color: #10b981; margin-bottom: 0.5rem;'>
-        {ICONS['title']} {get_text('footer_text')}
-    </p>
-    <p style='font-size: 0.9rem; color: #666666;'>
-        {ICONS['location']} {get_text('location')}: {selected_city} ({CHINESE_CITIES[selected_city]}) | 
-        {ICONS['language']} {get_text('report_language')}: {'Mandarin' if st.session_state.pdf_language == 'zh' else 'English'}
-    </p>
-    <p style='font-size: 0.8rem; color: #999999; margin-top: 1rem;'>
-        {get_text('powered_by')} | {get_text('copyright')}
-    </p>
-</div>
-""", unsafe_allow_html=True)
+with st.container(border=True):
+    st.markdown(f"**:green[{ICONS['title']} {get_text('footer_text')}]**")
+    st.caption(
+        f"{ICONS['location']} {get_text('location')}: {selected_city} ({CHINESE_CITIES[selected_city]}) | "
+        f"{ICONS['language']} {get_text('report_language')}: {PDF_LANGUAGE_LABELS[st.session_state.pdf_language]}"
+    )
+    st.caption(f"{get_text('powered_by')} | {get_text('copyright')}")
 
 # Create .env file instructions in sidebar
 with st.sidebar:
+    if ingest_status:
+        st.fragment(watch_live_readings, run_every=LIVE_POLL_SECONDS)()
+    
+    # Drafts of earlier sessions, e.g. after a browser crash
+    with st.expander(f"{ICONS['comments']} {get_text('drafts')}"):
+        recent_drafts = {draft["report_no"]: draft for draft in drafts.recent()} if drafts else {}
+        if recent_drafts:
+            draft_labels = {
+                report_no: f"{report_no} {draft['style_no']} · {datetime.fromtimestamp(draft['updated'], CHINA_TZ).strftime('%m-%d %H:%M')}"
+                for report_no, draft in recent_drafts.items()
+            }
+            chosen_draft = st.selectbox(get_text("report_no"), list(recent_drafts), format_func=draft_labels.get, key="draft_select")
+            st.button(get_text("resume_draft"), on_click=resume_draft, args=(chosen_draft,), key="draft_select_resume")
+        else:
+            st.caption(get_text("no_drafts"))
+    
     with st.expander(f"{ICONS['info']} API Setup"):
         st.code("""
 # Create .env file in your project folder
 OPENAI_API_KEY=your-api-key-here
 """)
         st.info("Restart the app after adding your API key to enable translations.")
+    
+    # Memory report for sizing, shown with ?memory=1
+    if st.query_params.get("memory") == "1":
+        with st.expander(f"{ICONS['info']} Memory"):
+            rss = process_rss()
+            if rss:
+                st.metric("Server RSS", f"{rss / 1024 / 1024:.1f} MB")
+            sessions = memory_report()
+            if sessions is None:
+                st.caption("Session list unavailable with this Streamlit version")
+            else:
+                st.metric("Session State", f"{sum(row['bytes'] for row in sessions) / 1024:.1f} KB", f"{len(sessions)} sessions", delta_color="off")
+                st.dataframe(sessions, hide_index=True)
+    
+    # Latest profile summaries while profiling is on
+    if PROFILE_MODE:
+        with st.expander(f"{ICONS['time']} Profiling ({PROFILE_MODE})"):
+            st.caption(f"Saved to {PROFILE_DIR}")
+            for path in recent_profiles(3):
+                with open(path) as f:
+                    st.code(f.read(2000), language=None)
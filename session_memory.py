@@ -0,0 +1,174 @@
+import os
+import sys
+import threading
+import time
+
+from cachetools import TTLCache
+
+# Per-session translation cache: bounded entries, each kept for a limited time
+TRANSLATION_CACHE_SIZE = int(os.getenv("PTR_TRANSLATION_CACHE_SIZE", "500"))
+TRANSLATION_CACHE_TTL = float(os.getenv("PTR_TRANSLATION_CACHE_TTL", "3600"))
+
+# Sessions without a rerun for this long are closed; 0 disables reaping
+SESSION_IDLE_SECONDS = float(os.getenv("PTR_SESSION_IDLE_SECONDS", "3600"))
+REAPER_INTERVAL = float(os.getenv("PTR_REAPER_INTERVAL", "60"))
+
+# Last rerun time per session id, shared by all sessions of the server
+last_activity = {}
+activity_lock = threading.Lock()
+
+def new_translation_cache():
+    """Bounded LRU cache with expiry for one session's translations"""
+    return TTLCache(maxsize=TRANSLATION_CACHE_SIZE, ttl=TRANSLATION_CACHE_TTL)
+
+def current_session_id():
+    """Id of the session running this script thread, None outside Streamlit"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
+
+def touch():
+    """Record activity for the current session"""
+    session_id = current_session_id()
+    if session_id:
+        with activity_lock:
+            last_activity[session_id] = time.time()
+
+def deep_sizeof(obj, seen=None):
+    """Approximate bytes held by an object and everything it contains"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool)) or obj is None:
+        return size
+    if hasattr(obj, "getbuffer"):
+        # BytesIO and friends report only the object header
+        return size + obj.getbuffer().nbytes
+    if isinstance(obj, dict) or hasattr(obj, "items"):
+        try:
+            return size + sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in list(obj.items()))
+        except TypeError:
+            return size
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(deep_sizeof(item, seen) for item in obj)
+    if hasattr(obj, "__dict__"):
+        return size + deep_sizeof(vars(obj), seen)
+    return size
+
+def process_rss():
+    """Resident set size of this process in bytes, None if unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+# Streamlit has no public API to list sessions or to reach the server's
+# event loop, so the functions below reach into Runtime internals (tested
+# with the Streamlit version pinned in requirements.txt). If an upgrade
+# moves them, the memory report shows as unavailable and reaping stops
+# instead of raising
+INTERNALS_ERRORS = (AttributeError, ImportError, TypeError)
+internals_reported = set()
+
+def internals_unavailable(what, error):
+    """Print once per process which internal could not be used"""
+    if what in internals_reported:
+        return
+    internals_reported.add(what)
+    import streamlit
+    print(f"session_memory: {what} unavailable with Streamlit {streamlit.__version__}: {error!r}", file=sys.stderr)
+
+def get_runtime():
+    """The running Streamlit server, None in bare mode or if unavailable"""
+    try:
+        from streamlit.runtime import Runtime
+        return Runtime.instance() if Runtime.exists() else None
+    except INTERNALS_ERRORS as e:
+        internals_unavailable("runtime", e)
+        return None
+
+def list_sessions(runtime):
+    """(session id, session state, connected) of every session, None if the
+    session manager is unavailable"""
+    try:
+        return [
+            (info.session.id, info.session.session_state.filtered_state, info.client is not None)
+            for info in runtime._session_mgr.list_sessions()
+        ]
+    except INTERNALS_ERRORS as e:
+        internals_unavailable("session list", e)
+        return None
+
+def session_closer(runtime):
+    """Function closing a session by id from any thread, None if the
+    server's event loop is unavailable"""
+    try:
+        eventloop = runtime._get_async_objs().eventloop
+        close_session = runtime.close_session
+    except INTERNALS_ERRORS as e:
+        internals_unavailable("closing sessions", e)
+        return None
+    # close_session must run on the server's event loop
+    return lambda session_id: eventloop.call_soon_threadsafe(close_session, session_id)
+
+def memory_report():
+    """Bytes of session state per session, largest first; None if the
+    sessions cannot be listed with this Streamlit version"""
+    runtime = get_runtime()
+    if runtime is None:
+        return []
+    sessions = list_sessions(runtime)
+    if sessions is None:
+        return None
+    now = time.time()
+    rows = []
+    for session_id, state, connected in sessions:
+        with activity_lock:
+            seen_at = last_activity.get(session_id)
+        rows.append({
+            "session": session_id[:8],
+            "keys": len(state),
+            "bytes": deep_sizeof(state),
+            "idle_seconds": round(now - seen_at) if seen_at else None,
+            "connected": connected,
+        })
+    rows.sort(key=lambda row: row["bytes"], reverse=True)
+    return rows
+
+def reap_idle_sessions(idle_seconds=SESSION_IDLE_SECONDS):
+    """Close sessions idle for longer than idle_seconds, returns their ids;
+    None if sessions cannot be closed with this Streamlit version"""
+    runtime = get_runtime()
+    if runtime is None or idle_seconds <= 0:
+        return []
+    close = session_closer(runtime)
+    if close is None:
+        return None
+    cutoff = time.time() - idle_seconds
+    with activity_lock:
+        idle = [session_id for session_id, seen_at in last_activity.items() if seen_at < cutoff]
+        for session_id in idle:
+            del last_activity[session_id]
+    for session_id in idle:
+        close(session_id)
+    return idle
+
+def start_reaper(interval=REAPER_INTERVAL):
+    """Background thread reaping idle sessions every interval seconds"""
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                if reap_idle_sessions() is None:
+                    # Reported once; nothing to do until the app is fixed
+                    return
+            except Exception:
+                pass
+    thread = threading.Thread(target=run, name="session-reaper", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,283 @@
+import argparse
+import json
+import time
+from contextlib import closing
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from evaluation import as_readings, segment_stats
+from jobs import DONE, connect, decode_data, encode_data
+from report_data import MEASURED_ITEMS, RECORDED_ITEMS, measurement_key, report_fingerprint
+
+# Items charted: everything that takes specimen readings
+SPC_ITEMS = [item["result"] for item in MEASURED_ITEMS + RECORDED_ITEMS]
+
+# Finished jobs read from the job table per backfill step
+BACKFILL_BATCH = 2000
+
+# Range control chart constants by subgroup size (ASTM E2587); larger
+# subgroups use the n=25 values
+D2 = np.array([np.nan, np.nan, 1.128, 1.693, 2.059, 2.326, 2.534, 2.704, 2.847, 2.970, 3.078,
+               3.173, 3.258, 3.336, 3.407, 3.472, 3.532, 3.588, 3.640, 3.689, 3.735,
+               3.778, 3.819, 3.858, 3.895, 3.931])
+D3 = np.array([np.nan, np.nan, 0.853, 0.888, 0.880, 0.864, 0.848, 0.833, 0.820, 0.808, 0.797,
+               0.787, 0.778, 0.770, 0.763, 0.756, 0.750, 0.744, 0.739, 0.734, 0.729,
+               0.724, 0.720, 0.716, 0.712, 0.708])
+
+# Western Electric rules: one point beyond 3 sigma, then (window, points,
+# sigma) runs on one side of the centre line
+RULES = ["1", "2", "3", "4"]
+RUN_RULES = [(3, 2, 2), (5, 4, 1), (8, 8, 0)]
+
+# One row per report and item, and running sums per factory and item from
+# which control limits follow without reading the points
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS spc_points (
+    report TEXT NOT NULL,
+    item TEXT NOT NULL,
+    factory TEXT NOT NULL,
+    day TEXT NOT NULL,
+    created REAL NOT NULL,
+    n INTEGER NOT NULL,
+    mean REAL,
+    range REAL,
+    failed INTEGER,
+    PRIMARY KEY (report, item)
+);
+CREATE INDEX IF NOT EXISTS spc_points_chart ON spc_points (item, factory, day, created);
+CREATE TABLE IF NOT EXISTS spc_limits (
+    factory TEXT NOT NULL,
+    item TEXT NOT NULL,
+    subgroups INTEGER NOT NULL,
+    mean_sum REAL NOT NULL,
+    ranged INTEGER NOT NULL,
+    sigma_sum REAL NOT NULL,
+    judged INTEGER NOT NULL,
+    failures INTEGER NOT NULL,
+    PRIMARY KEY (factory, item)
+);
+"""
+
+def connect_spc(path=None):
+    """Job database with the SPC tables, filled as reports are generated"""
+    conn = connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+def report_points(created, data):
+    """spc_points rows of one stored report; the specimens of an item are
+    its subgroup. Readings of all items go through one reduceat pass.
+    Reports without a number are told apart by their content (as stored
+    with a job, so both ways of rendering agree), and the same report
+    generated again replaces its points instead of adding more"""
+    report = str(data.get("report_no") or "").strip() or report_fingerprint(encode_data(data))
+    factory = str(data.get("factory") or "").strip() or "-"
+    day = str(data.get("test_date") or "")[:10] or datetime.fromtimestamp(created).date().isoformat()
+    readings = [as_readings(data.get(measurement_key(item))) for item in SPC_ITEMS]
+    lengths = np.array([r.size for r in readings])
+    flat = np.concatenate(readings) if lengths.any() else np.empty(0)
+    mins, means, maxs = segment_stats(flat, lengths)
+    rows = []
+    for item, n, mean, low, high in zip(SPC_ITEMS, lengths, means, mins, maxs):
+        result = data.get(item)
+        failed = {"Fail": 1, "Pass": 0, "Accept": 0}.get(result)
+        if not n and failed is None:
+            continue
+        rows.append({
+            "report": report, "item": item, "factory": factory, "day": day, "created": created,
+            "n": int(n), "mean": float(mean) if n else None,
+            "range": float(high - low) if n > 1 else None, "failed": failed,
+        })
+    return rows
+
+def limit_terms(row, sign=1):
+    """Contribution of one point to its spc_limits sums"""
+    n = row["n"]
+    sigma = row["range"] / D2[min(n, 25)] if n > 1 else 0.0
+    return np.array([n > 0, row["mean"] or 0.0, n > 1, sigma, row["failed"] is not None, row["failed"] or 0]) * sign
+
+def fold_points(conn, rows):
+    """Store points and add them to the running limit sums; a report
+    generated again replaces its old points. Runs in the caller's
+    transaction"""
+    deltas = {}
+    for row in rows:
+        old = conn.execute(
+            "SELECT * FROM spc_points WHERE report = ? AND item = ?", (row["report"], row["item"])
+        ).fetchone()
+        if old is not None:
+            key = (old["factory"], old["item"])
+            deltas[key] = deltas.get(key, 0) + limit_terms(dict(old), -1)
+        conn.execute(
+            "INSERT OR REPLACE INTO spc_points VALUES (:report, :item, :factory, :day, :created, :n, :mean, :range, :failed)",
+            row
+        )
+        key = (row["factory"], row["item"])
+        deltas[key] = deltas.get(key, 0) + limit_terms(row)
+    for (factory, item), delta in deltas.items():
+        conn.execute(
+            """INSERT INTO spc_limits VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (factory, item) DO UPDATE SET
+                subgroups = subgroups + excluded.subgroups, mean_sum = mean_sum + excluded.mean_sum,
+                ranged = ranged + excluded.ranged, sigma_sum = sigma_sum + excluded.sigma_sum,
+                judged = judged + excluded.judged, failures = failures + excluded.failures""",
+            (factory, item, int(delta[0]), float(delta[1]), int(delta[2]), float(delta[3]), int(delta[4]), int(delta[5]))
+        )
+
+def record_report(data, created=None):
+    """Add the measurements of one generated report, whichever way it was
+    rendered"""
+    rows = report_points(created or time.time(), data)
+    with closing(connect_spc()) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            fold_points(conn, rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+def backfill(conn, batch=BACKFILL_BATCH):
+    """Fold in the finished background jobs, e.g. of reports generated
+    before their measurements were recorded; safe to repeat. Returns the
+    number of jobs read"""
+    last_created, last_id = 0.0, ""
+    total = 0
+    while True:
+        jobs = conn.execute(
+            "SELECT id, created, params FROM jobs WHERE status = ? AND (created, id) > (?, ?) ORDER BY created, id LIMIT ?",
+            (DONE, last_created, last_id, batch)
+        ).fetchall()
+        if not jobs:
+            return total
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for job in jobs:
+                fold_points(conn, report_points(job["created"], decode_data(json.loads(job["params"])["data"])))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        last_created, last_id = jobs[-1]["created"], jobs[-1]["id"]
+        total += len(jobs)
+
+def factories(conn, item=None):
+    """Factories with points, of one item or any"""
+    if item:
+        rows = conn.execute("SELECT DISTINCT factory FROM spc_limits WHERE item = ? ORDER BY factory", (item,))
+    else:
+        rows = conn.execute("SELECT DISTINCT factory FROM spc_limits ORDER BY factory")
+    return [row["factory"] for row in rows]
+
+def control_limits(conn, item, factory=None):
+    """{"center", "sigma", "p"} from the running sums; None for all factories
+    together. sigma is estimated from the mean of R/d2 over subgroups of 2+"""
+    where, args = ("item = ?", (item,)) if factory is None else ("item = ? AND factory = ?", (item, factory))
+    row = conn.execute(
+        f"SELECT SUM(subgroups), SUM(mean_sum), SUM(ranged), SUM(sigma_sum), SUM(judged), SUM(failures) FROM spc_limits WHERE {where}",
+        args
+    ).fetchone()
+    subgroups, mean_sum, ranged, sigma_sum, judged, failures = (value or 0 for value in row)
+    return {
+        "center": mean_sum / subgroups if subgroups else np.nan,
+        "sigma": sigma_sum / ranged if ranged else np.nan,
+        "p": failures / judged if judged else np.nan,
+    }
+
+def load_points(conn, item, factory=None):
+    """Points of one item in test date order as a DataFrame"""
+    where, args = ("item = ?", (item,)) if factory is None else ("item = ? AND factory = ?", (item, factory))
+    points = pd.read_sql_query(
+        f"SELECT report, factory, day, n, mean, range, failed FROM spc_points WHERE {where} ORDER BY day, created",
+        conn, params=args
+    )
+    points["day"] = pd.to_datetime(points["day"], errors="coerce")
+    return points
+
+def western_electric(z):
+    """(points, 4) flags of Western Electric rules 1-4 on z, the distance
+    from the centre line in sigmas; a run rule flags the point completing it"""
+    z = np.nan_to_num(np.asarray(z, dtype=float))
+    flags = np.zeros((z.size, len(RULES)), dtype=bool)
+    flags[:, 0] = np.abs(z) > 3
+    if not z.size:
+        return flags
+    for col, (window, need, level) in enumerate(RUN_RULES, start=1):
+        for side in (1, -1):
+            beyond = (side * z > level).astype(np.intp)
+            flags[:, col] |= np.convolve(beyond, np.ones(window, dtype=np.intp))[:z.size] >= need
+    return flags
+
+def rule_labels(flags):
+    """"1,4" style text per point, empty where no rule fired"""
+    return [",".join(r for r, hit in zip(RULES, row) if hit) for row in flags]
+
+def xbar_r(points, limits):
+    """X-bar and R chart of the points that have readings. Limits follow
+    each subgroup's size, so mixed specimen counts chart correctly"""
+    chart = points[points["n"] > 0].reset_index(drop=True)
+    n = np.minimum(chart["n"].to_numpy(dtype=np.intp), 25)
+    sigma = limits["sigma"]
+    spread = 3 * sigma / np.sqrt(n)
+    chart["cl"] = limits["center"]
+    chart["ucl"] = limits["center"] + spread
+    chart["lcl"] = limits["center"] - spread
+    chart["r_cl"] = D2[n] * sigma
+    chart["r_ucl"] = (D2[n] + 3 * D3[n]) * sigma
+    chart["r_lcl"] = np.maximum(D2[n] - 3 * D3[n], 0) * sigma
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (chart["mean"].to_numpy() - limits["center"]) / (sigma / np.sqrt(n))
+    flags = western_electric(z)
+    # Ranges above their upper limit count as rule 1 too
+    flags[:, 0] |= chart["range"].to_numpy(dtype=float) > chart["r_ucl"].to_numpy()
+    chart["rules"] = rule_labels(flags)
+    return chart
+
+def p_chart(points, limits, freq="W"):
+    """Fraction of failed reports per period (weekly by default)"""
+    judged = points.dropna(subset=["failed", "day"])
+    chart = (
+        judged.groupby(judged["day"].dt.to_period(freq))["failed"]
+        .agg(reports="size", failures="sum")
+        .reset_index()
+    )
+    chart["day"] = chart["day"].dt.start_time
+    p = limits["p"]
+    n = chart["reports"].to_numpy()
+    chart["p"] = chart["failures"] / n
+    spread = 3 * np.sqrt(p * (1 - p) / n)
+    chart["cl"] = p
+    chart["ucl"] = np.minimum(p + spread, 1)
+    chart["lcl"] = np.maximum(p - spread, 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (chart["p"].to_numpy() - p) / (spread / 3)
+    chart["rules"] = rule_labels(western_electric(z))
+    return chart
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List SPC rule alerts of the recorded reports")
+    parser.add_argument("--item", default="outsole_abrasion_result", choices=SPC_ITEMS)
+    parser.add_argument("--factory", help="one factory, default all together")
+    parser.add_argument("--backfill", action="store_true", help="first fold in finished background jobs")
+    args = parser.parse_args()
+    
+    with closing(connect_spc()) as conn:
+        start = time.perf_counter()
+        count = backfill(conn) if args.backfill else 0
+        refreshed = time.perf_counter()
+        limits = control_limits(conn, args.item, args.factory)
+        points = load_points(conn, args.item, args.factory)
+        chart = xbar_r(points, limits)
+        weekly = p_chart(points, limits)
+        elapsed = time.perf_counter()
+    
+    print(f"backfill: {count} jobs in {(refreshed - start) * 1000:.0f} ms; "
+          f"charts of {len(points)} points in {(elapsed - refreshed) * 1000:.0f} ms")
+    print(f"X-bar centre {limits['center']:.4g}, sigma {limits['sigma']:.4g}, p {limits['p']:.3f}")
+    alerts = chart[chart["rules"] != ""]
+    print(f"{len(alerts)} X-bar/R alerts, {int((weekly['rules'] != '').sum())} p-chart alerts")
+    for row in alerts.tail(10).itertuples():
+        print(f"  {row.day:%Y-%m-%d}  {row.report}  {row.factory}  mean {row.mean:.4g}  rules {row.rules}")
@@ -0,0 +1,305 @@
+import json
+import os
+from functools import lru_cache
+from numbers import Real
+from types import MappingProxyType
+
+# Machine-readable test standards: limits, units and material variants
+STANDARDS_FILE = os.getenv("PTR_STANDARDS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "standards.json"))
+
+# Customer and third-party lab profiles, one <key>.json per profile, each
+# overriding some items of the company standard
+PROFILES_DIR = os.getenv("PTR_STANDARD_PROFILES_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "standard_profiles"))
+PROFILE_CACHE_SIZE = int(os.getenv("PTR_STANDARD_PROFILE_CACHE_SIZE", "32"))
+
+OPERATORS = {">=": "≥", "<=": "≤"}
+LANGS = ("en", "zh")
+
+# Statistic of the specimen readings a limit is applied to. By default every
+# specimen must comply: minimum limits check the lowest reading, maximum
+# limits the highest
+STATISTICS = ("min", "mean", "max")
+DEFAULT_STATISTIC = {">=": "min", "<=": "max"}
+
+# Minimum forces and cycle counts read as plain figures on the report
+# ("20 kg/200N", "100,000 cycles"); everything else shows its operator
+PLAIN_UNITS = ("kg", "N", "cycles")
+
+# "also" criteria have no readings of their own: the tester checks them by
+# hand, and their text says so
+MANUAL_CHECK = {"en": " (checked by hand)", "zh": "（人工检查）"}
+
+class StandardsError(ValueError):
+    """The standards file is malformed"""
+
+def check(condition, where, message):
+    if not condition:
+        raise StandardsError(f"{where}: {message}")
+
+def check_texts(value, where):
+    """A {"en": ..., "zh": ...} pair of non-empty strings"""
+    check(isinstance(value, dict), where, "must be an object with en and zh texts")
+    for lang in LANGS:
+        check(isinstance(value.get(lang), str) and value[lang].strip(), f"{where}.{lang}", "must be a non-empty string")
+
+def check_number(value, where):
+    check(isinstance(value, Real) and not isinstance(value, bool), where, "must be a number")
+
+def check_criterion(criterion, units, where):
+    check(isinstance(criterion, dict), where, "must be an object")
+    check(criterion.get("op") in OPERATORS, f"{where}.op", f"must be one of {', '.join(OPERATORS)}")
+    check_number(criterion.get("limit"), f"{where}.limit")
+    check(criterion.get("unit") in units, f"{where}.unit", f"unknown unit {criterion.get('unit')!r}")
+    for unit in ("kg", "N"):
+        if unit in criterion:
+            check_number(criterion[unit], f"{where}.{unit}")
+    if "label" in criterion:
+        check_texts(criterion["label"], f"{where}.label")
+    if "statistic" in criterion:
+        check(criterion["statistic"] in STATISTICS, f"{where}.statistic", f"must be one of {', '.join(STATISTICS)}")
+    if "decimals" in criterion:
+        check(isinstance(criterion["decimals"], int) and 0 <= criterion["decimals"] <= 6, f"{where}.decimals", "must be an integer from 0 to 6")
+    for i, extra in enumerate(criterion.get("also", [])):
+        check_criterion(extra, units, f"{where}.also[{i}]")
+
+def validate(spec, source="standards"):
+    """Raise StandardsError on the first problem in a parsed standards file"""
+    check(isinstance(spec, dict), source, "must be a JSON object")
+    units = spec.get("units")
+    check(isinstance(units, dict) and units, f"{source}.units", "must be a non-empty object")
+    for unit, texts in units.items():
+        check_texts(texts, f"{source}.units.{unit}")
+    items = spec.get("items")
+    check(isinstance(items, dict) and items, f"{source}.items", "must be a non-empty object")
+    for key, item in items.items():
+        where = f"{source}.items.{key}"
+        check(isinstance(item, dict), where, "must be an object")
+        if "variants" not in item:
+            check_criterion(item, units, where)
+            continue
+        variants = item["variants"]
+        check(isinstance(variants, list) and variants, f"{where}.variants", "must be a non-empty list")
+        check(isinstance(item.get("variant_label", "material"), str), f"{where}.variant_label", "must be a string")
+        names = set()
+        for i, variant in enumerate(variants):
+            check_criterion(variant, units, f"{where}.variants[{i}]")
+            check_texts(variant.get("name"), f"{where}.variants[{i}].name")
+            check(variant["name"]["en"] not in names, f"{where}.variants[{i}].name", "is a duplicate")
+            names.add(variant["name"]["en"])
+
+def number_text(value, decimals=None):
+    """250000 -> 250,000; decimals keeps trailing zeros, e.g. 2.0"""
+    if decimals is not None:
+        return f"{value:,.{decimals}f}"
+    return f"{value:,g}"
+
+def manual_texts(criterion, units, lang):
+    """Texts of a criterion's "also" checks, each marked as checked by hand"""
+    return [criterion_text(extra, units, lang) + MANUAL_CHECK[lang] for extra in criterion.get("also", [])]
+
+def criterion_text(criterion, units, lang):
+    """Display text of one criterion, e.g. "20 kg/200N" or "≤ 15%" """
+    unit = criterion["unit"]
+    value = number_text(criterion["limit"], criterion.get("decimals"))
+    if unit == "kg" and "N" in criterion:
+        text = f"{value}{units['kg'][lang]}/{number_text(criterion['N'])}{units['N'][lang]}"
+    elif unit == "N" and "kg" in criterion:
+        text = f"{number_text(criterion['kg'])}{units['kg'][lang]}/{value}{units['N'][lang]}"
+    elif unit in PLAIN_UNITS and criterion["op"] == ">=":
+        text = f"{value}{units[unit][lang]}"
+    else:
+        text = f"{OPERATORS[criterion['op']]} {value}{units[unit][lang]}"
+    if "label" in criterion:
+        text = f"{criterion['label'][lang]} {text}"
+    return ("，" if lang == "zh" else ", ").join([text] + manual_texts(criterion, units, lang))
+
+def bilingual(english, chinese):
+    return english if english == chinese else f"{english} / {chinese}"
+
+class StandardsTable:
+    """Standards compiled for O(1) lookup: limits by (item, variant), variant
+    names and the display text of every item in each report language"""
+    
+    def __init__(self, name, limits, variants, variant_labels, variant_names, texts, manual, profile=None, version=None, brands=()):
+        self.name = name
+        # Brands whose reports are judged by this table by default
+        self.brands = brands
+        # Profile key (None for the company standard) and a token that
+        # changes whenever the underlying files do, for cache keys
+        self.profile = profile
+        self.version = version
+        # Read-only views: compiled tables are shared between sessions
+        self._limits = MappingProxyType({k: MappingProxyType(v) for k, v in limits.items()})
+        self._variants = MappingProxyType(variants)
+        self._variant_labels = MappingProxyType(variant_labels)
+        self._variant_names = MappingProxyType(variant_names)
+        self._texts = MappingProxyType(texts)
+        self._manual = MappingProxyType(manual)
+    
+    def __contains__(self, item):
+        return (item, None) in self._limits
+    
+    def limit(self, item, variant=None):
+        """{"op", "limit", "unit", "statistic"} for an item; a missing variant
+        gives the item's first, unknown items None. An unknown variant raises
+        StandardsError rather than judging against another variant's limit"""
+        if not variant or item not in self._variants:
+            return self._limits.get((item, None))
+        if (item, variant) not in self._limits:
+            raise StandardsError(f"{self.name}: {item} has no variant {variant!r}")
+        return self._limits[(item, variant)]
+    
+    def manual_checks(self, item, variant, lang):
+        """Texts of the criteria the readings do not judge, e.g. "Top lift
+        area ≤ 1cm² (checked by hand)", in "en", "zh" or "bi"; empty for
+        most items"""
+        return self._manual.get((item, variant or self._variants.get(item, (None,))[0], lang), ())
+    
+    def variants(self, item):
+        """Variant names (English) of an item, empty if it has a single limit"""
+        return self._variants.get(item, ())
+    
+    def variant_label(self, item):
+        """Text key naming what the variants differ by (material, heel height)"""
+        return self._variant_labels.get(item)
+    
+    def variant_name(self, item, variant, lang):
+        return self._variant_names.get((item, variant, lang), variant)
+    
+    def text(self, item, lang, names=True):
+        """Display text in "en", "zh" or "bi"; names=False lists the variant
+        limits without their names, e.g. "60 kg/500N / 80 kg/800N" """
+        return self._texts.get((item, lang, names), "")
+
+def compile_standards(spec, source="standards", profile=None, version=None):
+    """Validate a parsed standards file and compile it into a StandardsTable"""
+    validate(spec, source)
+    units = spec["units"]
+    limits, variants, variant_labels, variant_names, texts, manual = {}, {}, {}, {}, {}, {}
+    for key, item in spec["items"].items():
+        criteria = item["variants"] if "variants" in item else [item]
+        for criterion in criteria:
+            variant = criterion["name"]["en"] if "variants" in item else None
+            limits[(key, variant)] = {
+                "op": criterion["op"],
+                "limit": float(criterion["limit"]),
+                "unit": criterion["unit"],
+                "statistic": criterion.get("statistic", DEFAULT_STATISTIC[criterion["op"]]),
+            }
+            limits.setdefault((key, None), limits[(key, variant)])
+            if "also" in criterion:
+                for lang in LANGS:
+                    manual[(key, variant, lang)] = tuple(manual_texts(criterion, units, lang))
+                manual[(key, variant, "bi")] = tuple(map(bilingual, manual[(key, variant, "en")], manual[(key, variant, "zh")]))
+        
+        for lang in LANGS:
+            if "variants" in item:
+                named = [f"{v['name'][lang]}: {criterion_text(v, units, lang)}" for v in item["variants"]]
+                texts[(key, lang, True)] = ", ".join(named)
+                texts[(key, lang, False)] = " / ".join(criterion_text(v, units, lang) for v in item["variants"])
+                for v in item["variants"]:
+                    variant_names[(key, v["name"]["en"], lang)] = v["name"][lang]
+            else:
+                texts[(key, lang, True)] = texts[(key, lang, False)] = criterion_text(item, units, lang)
+        for names in (True, False):
+            texts[(key, "bi", names)] = bilingual(texts[(key, "en", names)], texts[(key, "zh", names)])
+        
+        if "variants" in item:
+            variants[key] = tuple(v["name"]["en"] for v in item["variants"])
+            variant_labels[key] = item.get("variant_label", "material")
+    
+    name = spec.get("name", source)
+    brands = frozenset(brand_key(brand) for brand in spec.get("brands", ()))
+    return StandardsTable(name, limits, variants, variant_labels, variant_names, texts, manual, profile, version, brands)
+
+def brand_key(brand):
+    """Brands match whatever their case and spacing: "Example  brand" is "Example Brand" """
+    return " ".join(brand.split()).casefold()
+
+def load_spec(path):
+    """Parsed JSON of a standards or profile file"""
+    with open(path, encoding="utf-8") as f:
+        try:
+            return json.load(f)
+        except json.JSONDecodeError as e:
+            raise StandardsError(f"{os.path.basename(path)}: {e}") from None
+
+# Built-in company standard, parsed and compiled once per process
+DEFAULT_SPEC = load_spec(STANDARDS_FILE)
+DEFAULT_STANDARDS = compile_standards(DEFAULT_SPEC, os.path.basename(STANDARDS_FILE), version=os.path.getmtime(STANDARDS_FILE))
+
+def profile_path(key):
+    return os.path.join(PROFILES_DIR, f"{key}.json")
+
+def merge_profile(profile, base=DEFAULT_SPEC, source="profile"):
+    """Company standard with a profile's item overrides applied"""
+    check(isinstance(profile, dict), source, "must be a JSON object")
+    check(isinstance(profile.get("name"), str) and profile["name"].strip(), f"{source}.name", "must be a non-empty string")
+    items = profile.get("items")
+    check(isinstance(items, dict) and items, f"{source}.items", "must be a non-empty object")
+    for key in items:
+        check(key in base["items"], f"{source}.items.{key}", "is not an item of the company standard")
+    brands = profile.get("brands", [])
+    check(isinstance(brands, list), f"{source}.brands", "must be a list")
+    for i, brand in enumerate(brands):
+        check(isinstance(brand, str) and brand.strip(), f"{source}.brands[{i}]", "must be a non-empty string")
+    return {
+        "name": profile["name"],
+        "brands": brands,
+        "units": {**base["units"], **profile.get("units", {})},
+        "items": {**base["items"], **items},
+    }
+
+@lru_cache(maxsize=PROFILE_CACHE_SIZE)
+def compile_profile(key, mtime):
+    """Compiled table of one profile file; mtime in the cache key picks up edits"""
+    source = f"{key}.json"
+    spec = merge_profile(load_spec(profile_path(key)), source=source)
+    return compile_standards(spec, source, profile=key, version=(key, mtime))
+
+def get_standards(profile=None):
+    """Compiled table of a profile, the company standard for None or "";
+    only the first use of each profile version parses anything"""
+    if not profile:
+        return DEFAULT_STANDARDS
+    try:
+        mtime = os.path.getmtime(profile_path(profile))
+    except OSError:
+        raise StandardsError(f"unknown standard profile {profile!r}") from None
+    return compile_profile(profile, mtime)
+
+@lru_cache(maxsize=4)
+def read_profile_names(files):
+    names = {}
+    for filename, mtime in files:
+        key = filename[:-len(".json")]
+        try:
+            names[key] = compile_profile(key, mtime).name
+        except (StandardsError, OSError):
+            # A broken profile must not hide the others
+            continue
+    return names
+
+def standard_profiles():
+    """{key: name} of the valid profiles in PROFILES_DIR"""
+    try:
+        files = tuple(sorted(
+            (filename, os.path.getmtime(os.path.join(PROFILES_DIR, filename)))
+            for filename in os.listdir(PROFILES_DIR) if filename.endswith(".json")
+        ))
+    except OSError:
+        return {}
+    return read_profile_names(files)
+
+def profile_for_brand(brand):
+    """Key of the first valid profile listing a brand, None if none does"""
+    key = brand_key(brand or "")
+    if not key:
+        return None
+    for profile in standard_profiles():
+        try:
+            if key in get_standards(profile).brands:
+                return profile
+        except StandardsError:
+            continue
+    return None
@@ -0,0 +1,288 @@
+import argparse
+import csv
+import hashlib
+import io
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from report_data import MEASURED_ITEMS, measured_section
+from standards import DEFAULT_STANDARDS
+
+# Rows parsed per chunk; memory use depends on this, not on the file size
+CHUNK_ROWS = int(os.getenv("PTR_TESTER_CHUNK_ROWS", "50000"))
+
+# Readings below this force (N) are taken before contact or after the bond
+# separated and are left out of the average peel force
+CONTACT_FORCE = float(os.getenv("PTR_TESTER_CONTACT_N", "5"))
+
+# Points kept of each specimen's force-displacement curve for the report.
+# Curves are thinned to min/max pairs of CURVE_BUCKET_ROWS rows while the
+# file is read, then once more to CURVE_POINTS
+CURVE_POINTS = int(os.getenv("PTR_TESTER_CURVE_POINTS", "400"))
+CURVE_BUCKET_ROWS = 32
+
+# Parsed files by content hash, so re-uploads and reruns skip the parse
+FILE_CACHE_SIZE = int(os.getenv("PTR_TESTER_CACHE_SIZE", "64"))
+file_cache = OrderedDict()
+file_cache_lock = threading.Lock()
+
+# Exports start with a few lines of machine and method settings
+HEADER_SEARCH_LINES = 50
+
+FORCE_COLUMNS = ("force", "load", "力")
+SPECIMEN_COLUMNS = ("specimen", "sample", "试样")
+DISPLACEMENT_COLUMNS = ("displacement", "extension", "position", "stroke", "位移")
+
+# Units found in exports, in newtons and millimetres
+KGF = 9.80665
+FORCE_UNITS = {"n": 1.0, "kn": 1000.0, "kgf": KGF, "kg": KGF, "gf": KGF / 1000, "lbf": 4.4482216}
+LENGTH_UNITS = {"mm": 1.0, "cm": 10.0, "m": 1000.0, "in": 25.4}
+
+# Value of a curve that is judged against each standard item: bond strength
+# is the average peel force, pull tests the peak
+TESTER_VALUES = {"adhesive": "average"}
+
+# Sections whose items are measured on the pull/peel testers
+TESTER_SECTIONS = ("flat_shoe", "high_heel", "components")
+
+class TesterFileError(ValueError):
+    """The file is not a tester export with a force column"""
+
+def find_column(columns, names):
+    """Index of the first column whose header contains one of names"""
+    for i, column in enumerate(columns):
+        if any(name in column.lower() for name in names):
+            return i
+    return None
+
+def unit_scale(text, units):
+    """Scale of a header like "Force (kN)" or a units row cell to the base
+    unit of units; None when no known unit is given"""
+    match = re.search(r"[(\[]\s*([^)\]]+?)\s*[)\]]", text)
+    unit = (match.group(1) if match else text).strip().lower()
+    return units.get(unit)
+
+def read_header(text):
+    """Skip the settings preamble; returns (delimiter, {"force", "specimen",
+    "displacement"} column indexes, newtons and millimetres per unit) with
+    text positioned at the data. Missing columns are None"""
+    for _ in range(HEADER_SEARCH_LINES):
+        line = text.readline()
+        if not line:
+            break
+        try:
+            delimiter = csv.Sniffer().sniff(line, delimiters=",;\t").delimiter
+        except csv.Error:
+            delimiter = ","
+        columns = [column.strip().strip('"') for column in next(csv.reader([line], delimiter=delimiter))]
+        force = find_column(columns, FORCE_COLUMNS)
+        if force is None:
+            continue
+        displacement = find_column(columns, DISPLACEMENT_COLUMNS)
+        scale = unit_scale(columns[force], FORCE_UNITS)
+        x_scale = None if displacement is None else unit_scale(columns[displacement], LENGTH_UNITS)
+        
+        # Some testers put the units on a row of their own under the header
+        position = text.tell()
+        units = next(csv.reader([text.readline()], delimiter=delimiter), [])
+        if len(units) > force and scale is None:
+            scale = unit_scale(units[force], FORCE_UNITS)
+        if displacement is not None and len(units) > displacement and x_scale is None:
+            x_scale = unit_scale(units[displacement], LENGTH_UNITS)
+        text.seek(position)
+        layout = {"force": force, "specimen": find_column(columns, SPECIMEN_COLUMNS), "displacement": displacement}
+        return delimiter, layout, scale or 1.0, x_scale or 1.0
+    raise TesterFileError("no force column found")
+
+def run_starts(labels):
+    """Start index of every run of equal specimen labels"""
+    if not labels.size:
+        return np.empty(0, dtype=np.intp)
+    return np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+
+def minmax_indices(y, buckets):
+    """Indexes of the lowest and highest point of each of buckets equal runs
+    of y, in order; keeps peaks and drops that plain striding would miss"""
+    if y.size <= 2 * buckets:
+        return np.arange(y.size)
+    starts = np.linspace(0, y.size, buckets + 1).astype(np.intp)[:-1]
+    bucket = np.repeat(np.arange(buckets), np.diff(np.r_[starts, y.size]))
+    picks = []
+    for reduce in (np.minimum, np.maximum):
+        hits = np.flatnonzero(y == reduce.reduceat(y, starts)[bucket])
+        # First hit per bucket
+        picks.append(hits[np.unique(bucket[hits], return_index=True)[1]])
+    return np.unique(np.concatenate(picks))
+
+def read_tester_file(stream, chunk_rows=CHUNK_ROWS):
+    """Peak and average peel force (N) per specimen of one export, parsed
+    chunk by chunk: [{"specimen", "peak", "average", "rows", "curve"}] in
+    file order. curve is the decimated (displacement mm, force N) series,
+    None without a displacement column. Files without a specimen column
+    hold a single specimen"""
+    binary = not isinstance(stream, io.TextIOBase)
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="") if binary else stream
+    try:
+        delimiter, layout, scale, x_scale = read_header(text)
+        force, specimen, displacement = layout["force"], layout["specimen"], layout["displacement"]
+        usecols = [column for column in layout.values() if column is not None]
+        chunks = pd.read_csv(
+            text, sep=delimiter, header=None, usecols=usecols, dtype=str,
+            chunksize=chunk_rows, on_bad_lines="skip", skip_blank_lines=True
+        )
+        
+        # Running totals per specimen, in the order specimens appear
+        totals = {}
+        for chunk in chunks:
+            forces = pd.to_numeric(chunk[force], errors="coerce").to_numpy(dtype=float) * scale
+            valid = ~np.isnan(forces)
+            if displacement is not None:
+                positions = pd.to_numeric(chunk[displacement], errors="coerce").to_numpy(dtype=float) * x_scale
+                valid &= ~np.isnan(positions)
+                positions = positions[valid]
+            forces = forces[valid]
+            if specimen is None:
+                labels = np.zeros(forces.size, dtype=np.int8)
+            else:
+                labels = chunk[specimen].fillna("").str.strip().to_numpy()[valid]
+            starts = run_starts(labels)
+            if not starts.size:
+                continue
+            
+            loaded = forces >= CONTACT_FORCE
+            peaks = np.maximum.reduceat(forces, starts)
+            sums = np.add.reduceat(np.where(loaded, forces, 0.0), starts)
+            counts = np.add.reduceat(loaded.astype(np.intp), starts)
+            rows = np.diff(np.r_[starts, forces.size])
+            for start, label, peak, load_sum, count, row_count in zip(starts, labels[starts], peaks, sums, counts, rows):
+                total = totals.setdefault(label, [-np.inf, 0.0, 0, 0, [], []])
+                total[0] = max(total[0], peak)
+                total[1] += load_sum
+                total[2] += count
+                total[3] += row_count
+                if displacement is not None:
+                    run = slice(start, start + row_count)
+                    keep = minmax_indices(forces[run], -(-row_count // CURVE_BUCKET_ROWS))
+                    total[4].append(positions[run][keep])
+                    total[5].append(forces[run][keep])
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeError) as e:
+        raise TesterFileError(str(e)) from None
+    finally:
+        if binary:
+            # Leave the caller's stream open
+            text.detach()
+    
+    if not totals:
+        raise TesterFileError("no force readings found")
+    return [
+        {
+            "specimen": None if specimen is None else str(label),
+            "peak": float(peak),
+            "average": load_sum / count if count else float("nan"),
+            "rows": int(rows),
+            "curve": decimated_curve(xs, ys) if xs else None,
+        }
+        for label, (peak, load_sum, count, rows, xs, ys) in totals.items()
+    ]
+
+def decimated_curve(xs, ys, points=CURVE_POINTS):
+    """{"x", "y"} lists of at most about points points from the thinned
+    chunks of one specimen, rounded for storage with the report"""
+    x, y = np.concatenate(xs), np.concatenate(ys)
+    keep = minmax_indices(y, max(1, points // 2))
+    return {"x": np.round(x[keep], 3).tolist(), "y": np.round(y[keep], 2).tolist()}
+
+def read_cached(file, chunk_rows=CHUNK_ROWS):
+    """read_tester_file() of an uploaded file, parsed once per content hash"""
+    digest = hashlib.file_digest(file, "sha1").hexdigest()
+    file.seek(0)
+    key = (digest, chunk_rows, CONTACT_FORCE)
+    with file_cache_lock:
+        if key in file_cache:
+            file_cache.move_to_end(key)
+            return file_cache[key]
+    
+    specimens = read_tester_file(file, chunk_rows)
+    with file_cache_lock:
+        file_cache[key] = specimens
+        while len(file_cache) > FILE_CACHE_SIZE:
+            file_cache.popitem(last=False)
+    return specimens
+
+def from_newtons(value, unit):
+    """Force in a standard's unit, None for units that are not forces"""
+    if unit == "N":
+        return value
+    if unit == "kg":
+        return value / KGF
+    return None
+
+def item_aliases(item):
+    return {item["label"], item["result"][:-len("_result")]}
+
+# Names a file may be called after, longer first so toe_post.csv is never
+# read as toe
+FILE_ALIASES = sorted({alias for item in MEASURED_ITEMS for alias in item_aliases(item)}, key=len, reverse=True)
+
+def file_item(filename, items):
+    """The item of items a file is named after, e.g. toe_2.csv or Buckle-A.csv"""
+    name = "_" + re.sub(r"[^a-z0-9]+", "_", os.path.splitext(filename)[0].lower()) + "_"
+    alias = next((alias for alias in FILE_ALIASES if f"_{alias}_" in name), None)
+    return next((item for item in items if alias in item_aliases(item)), None)
+
+def import_readings(files, section, standards=DEFAULT_STANDARDS, chunk_rows=CHUNK_ROWS):
+    """Readings of a section's items from tester exports, one per specimen in
+    the standard's unit, and their curves: ({result_key: array},
+    {result_key: [{"specimen", "x", "y"}]}, [(filename, problem key)])"""
+    items = measured_section(section)
+    readings, curves, problems = {}, {}, []
+    for file in sorted(files, key=lambda file: file.name):
+        item = file_item(file.name, items)
+        if item is None:
+            problems.append((file.name, "no_matching_item"))
+            continue
+        item_limits = standards.limit(item["standard"])
+        if item_limits is None or from_newtons(1.0, item_limits["unit"]) is None:
+            problems.append((file.name, "not_a_force_item"))
+            continue
+        try:
+            specimens = read_cached(file, chunk_rows)
+        except TesterFileError:
+            problems.append((file.name, "unreadable_file"))
+            continue
+        value = TESTER_VALUES.get(item["standard"], "peak")
+        values = [from_newtons(s[value], item_limits["unit"]) for s in specimens]
+        readings.setdefault(item["result"], []).extend(round(v, 2) for v in values if not np.isnan(v))
+        curves.setdefault(item["result"], []).extend(
+            {"specimen": s["specimen"] or os.path.splitext(file.name)[0], **s["curve"]}
+            for s in specimens if s["curve"]
+        )
+    readings = {key: np.array(values) for key, values in readings.items()}
+    return readings, {key: value for key, value in curves.items() if value}, problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Peak and average peel force per specimen of tester exports")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+    
+    for path in args.files:
+        start = time.perf_counter()
+        with open(path, "rb") as f:
+            try:
+                specimens = read_tester_file(f, args.chunk_rows)
+            except TesterFileError as e:
+                print(f"{path}: {e}")
+                continue
+        elapsed = time.perf_counter() - start
+        rows = sum(s["rows"] for s in specimens)
+        print(f"{path}: {len(specimens)} specimens, {rows} rows in {elapsed * 1000:.0f} ms")
+        for s in specimens:
+            print(f"  {s['specimen'] or '-'}  peak {s['peak']:.1f} N  average {s['average']:.1f} N")
@@ -0,0 +1,34 @@
+import numpy as np
+
+from evaluation import read_readings
+
+def test_decimal_comma_is_reported_not_split():
+    for text in ("12,5", "1,5"):
+        readings, problems = read_readings(text)
+        assert readings.size == 0
+        assert problems == [(text, "ambiguous_comma")]
+
+def test_decimal_comma_among_other_readings():
+    readings, problems = read_readings("12,5 13")
+    np.testing.assert_array_equal(readings, [13.0])
+    assert problems == [("12,5", "ambiguous_comma")]
+
+def test_lone_thousands_group_is_ambiguous():
+    assert read_readings("250,000")[1] == [("250,000", "ambiguous_comma")]
+    assert read_readings("212,208,230")[1] == [("212,208,230", "ambiguous_comma")]
+
+def test_thousands_groups_among_separated_readings():
+    readings, problems = read_readings("250,000 1,200")
+    np.testing.assert_array_equal(readings, [250000.0, 1200.0])
+    assert problems == []
+
+def test_separators():
+    for text in ("212 208 230", "212, 208, 230", "212;208\n230", "212 208 230,"):
+        readings, problems = read_readings(text)
+        np.testing.assert_array_equal(readings, [212.0, 208.0, 230.0])
+        assert problems == []
+
+def test_unreadable_and_non_finite_tokens():
+    readings, problems = read_readings("abc 1 inf nan")
+    np.testing.assert_array_equal(readings, [1.0])
+    assert problems == [("abc", "not_a_number"), ("inf", "not_a_number"), ("nan", "not_a_number")]